@@ -1,39 +1,222 @@
+import contextlib
+import json
+import os
+import re
 import numpy as np
 import pyvisa
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from .Rigol_decode import decode_ascii_trace, read_block, read_blocks, read_blocks_with_fields, read_raw_blocks
+    from .Rigol_stream import SweepFrame, SweepRing
+    from .Rigol_traceio import EXTENSION as TRACE_FILE_EXTENSION, export_csv, write_trace
+except ImportError:
+    from Rigol_decode import decode_ascii_trace, read_block, read_blocks, read_blocks_with_fields, read_raw_blocks
+    from Rigol_stream import SweepFrame, SweepRing
+    from Rigol_traceio import EXTENSION as TRACE_FILE_EXTENSION, export_csv, write_trace
+
+
+# Settings whose instrument-side value is recomputed when another setting
+# changes, unless the user has pinned them with an explicit set_* call.
+# (RBW/VBW/sweep time are auto-coupled to span on the DSA815.)
+_COUPLED_SETTINGS = {
+    'span':  ('rbw', 'vbw', 'sweep_time'),
+    'rbw':   ('vbw', 'sweep_time'),
+    'vbw':   ('sweep_time',),
+}
+
+# :STATus:OPERation:CONDition? bit set while a sweep is running
+_SWEEPING_BIT = 1 << 3
+
+# Sweep-completion strategies accepted by wait_for_sweep()
+WAIT_METHODS = ("poll", "opc", "srq")
+
+# Longest program message a configuration transaction sends; larger
+# batches are split at command boundaries.
+MAX_MESSAGE_LENGTH = 512
+
+# configure() keyword -> cache entries its set_* method writes, used to skip
+# settings that are already in effect.
+_SETTING_KEYS = {
+    'TG_amp':           lambda amp: (('tg_amp', amp),),
+    'freq_limits':      lambda f_low, f_hi: (('start', f_low), ('stop', f_hi)),
+    'center_frequency': lambda freq: (('center', freq),),
+    'span':             lambda span: (('span', span),),
+    'RBW':              lambda RBW: (('rbw', RBW),),
+    'VBW':              lambda VBW: (('vbw', VBW),),
+    'input_atten':      lambda atten: (('atten', atten),),
+    'continuous':       lambda state: (('continuous', bool(state)),),
+    'trace_mode':       lambda trace_num, mode: ((f'trace{trace_num}_mode', mode),),
+    'sweep_time':       lambda sweep_time: (('sweep_time', sweep_time),),
+    'sweep_count':      lambda count: (('sweep_count', count),),
+    'format':           lambda data_format: (('format', data_format),),
+}
+
+# Remembers the resource string of the last instrument per serial number
+DISCOVERY_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".rigol_dsa815.json")
+
+
+def _read_discovery_cache(path):
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_discovery_cache(path, cache):
+    if not path:
+        return
+    try:
+        with open(path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"[Rigol] Could not write discovery cache {path}: {e}")
 
 
 class DSA815(object):
-    def __init__(self):
+    """
+    Driver for the Rigol DSA815 spectrum analyzer.
+
+    Settings written through the set_* methods are kept in a write-through
+    cache and served back by the get_* methods, so repeated reads (and the
+    frequency-axis queries in get_sweep_data()) cost no VISA round trip.
+    Changes made on the front panel or through raw ``inst.write`` calls are
+    not seen by the cache; call resync() after them.
+
+    Args:
+        use_cache (bool): Enable the settings cache (default True).
+        wait_method (str): Default sweep-completion strategy, one of
+            'poll', 'opc' or 'srq' (see wait_for_sweep()).
+        sweep_timeout_s (float | None): Default sweep-completion timeout in
+            seconds. None derives it from the expected sweep duration.
+    """
+
+    def __init__(self, use_cache=True, wait_method="poll", sweep_timeout_s=None):
+        if wait_method not in WAIT_METHODS:
+            raise ValueError(f"wait_method must be one of: {', '.join(WAIT_METHODS)}")
         self.inst = None
         self.rm = None
+        self.resource_name = None
+        self.serial = None
+        self.connect_time_s = None
+        self.use_cache = use_cache
+        self._cache = {}
+        self._pinned = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.wait_method = wait_method
+        self.sweep_timeout_s = sweep_timeout_s
+        self._sweep_started = None
+        self._wait_count = 0
+        self._wait_overhead_s = 0.0
+        self._wait_sweep_s = 0.0
+        self._freq_axis = None
+        self._freq_axis_key = None
+        self._batch = None
+        self._batch_flushed = False
+
+    def conn(self, rm=None, resource_name=None, serial=None, probe_timeout_ms=2000,
+             cache_path=DISCOVERY_CACHE_PATH):
+        """
+        Auto-detect and connect to the first Rigol DSA815 found on any VISA interface.
 
-    def conn(self):
-        """Auto-detect and connect to the first Rigol DSA815 found on any VISA interface."""
-        self.rm = pyvisa.ResourceManager()
-        devices = self.rm.list_resources()
-        print("[Rigol] Detected VISA devices:", devices)
-        for dev in devices:
-            if dev.startswith("ASRL"):
-                continue  # DSA815 connects via USB or LAN, never serial
-            try:
-                inst = self.rm.open_resource(dev)
-                idn = inst.query("*IDN?")
-                if "DSA815" in idn or "Rigol" in idn:
-                    self.inst = inst
-                    self.inst.timeout = 10000  # ms
-                    print(f"[Rigol] Connected to: {dev} ({idn.strip()})")
-                    return
-                else:
-                    inst.close()
-            except Exception as e:
-                print(f"[Rigol] Failed to connect to {dev}: {e}")
-        raise IOError("[Rigol] DSA815 not found. Check USB/LAN connection.")
+        The resource used last time (stored in ``cache_path``) is tried first.
+        Otherwise every candidate resource is probed concurrently with a
+        short timeout and the first DSA815 to answer *IDN? wins, so
+        unreachable LAN resources cost one probe timeout in total rather than
+        one each. The time taken is stored in ``connect_time_s``.
+
+        Args:
+            rm: Resource manager to search. Defaults to a new
+                pyvisa.ResourceManager(); pass a Rigol_emulator.EmulatedResourceManager
+                to run against the simulated instrument.
+            resource_name (str | None): Connect to this VISA resource only
+                instead of scanning every resource.
+            serial (str | None): Only accept the instrument with this serial
+                number (third *IDN? field).
+            probe_timeout_ms (int): VISA timeout for each discovery probe.
+            cache_path (str | None): JSON file remembering the last resource
+                per serial number; None disables the cache.
+        """
+        t0 = time.perf_counter()
+        self.rm = rm if rm is not None else pyvisa.ResourceManager()
+        cache = _read_discovery_cache(cache_path)
+        if resource_name:
+            candidates = [resource_name]
+        else:
+            cached = cache.get('serials', {}).get(serial) if serial else cache.get('last')
+            if cached:
+                found = self._probe(cached, serial, probe_timeout_ms)
+                if found is not None:
+                    return self._connected(found, t0, cache, cache_path)
+            devices = self.rm.list_resources()
+            print("[Rigol] Detected VISA devices:", devices)
+            # DSA815 connects via USB or LAN, never serial
+            candidates = [d for d in devices if not d.startswith("ASRL") and d != cached]
+
+        found = None
+        if len(candidates) == 1:
+            found = self._probe(candidates[0], serial, probe_timeout_ms)
+        elif candidates:
+            pool = ThreadPoolExecutor(max_workers=min(len(candidates), 16))
+            futures = [pool.submit(self._probe, dev, serial, probe_timeout_ms) for dev in candidates]
+            for future in as_completed(futures):
+                found = future.result()
+                if found is not None:
+                    break
+            # Probes still running (unreachable hosts) finish in the background;
+            # any other instrument they open is closed again.
+            for future in futures:
+                future.add_done_callback(
+                    lambda f, keep=found: f.result() not in (None, keep) and f.result()[1].close()
+                )
+            pool.shutdown(wait=False)
+        if found is None:
+            raise IOError("[Rigol] DSA815 not found. Check USB/LAN connection.")
+        return self._connected(found, t0, cache, cache_path)
+
+    def _probe(self, dev, serial, timeout_ms):
+        """Open ``dev`` and return (dev, inst, idn) if it is a matching DSA815."""
+        try:
+            inst = self.rm.open_resource(dev, open_timeout=timeout_ms)
+            inst.timeout = timeout_ms
+            idn = inst.query("*IDN?")
+        except Exception as e:
+            print(f"[Rigol] Failed to connect to {dev}: {e}")
+            return None
+        fields = idn.split(",")
+        if ("DSA815" in idn or "Rigol" in idn) and (
+            serial is None or (len(fields) > 2 and fields[2].strip() == serial)
+        ):
+            return dev, inst, idn
+        inst.close()
+        return None
+
+    def _connected(self, found, t0, cache, cache_path):
+        dev, inst, idn = found
+        self.inst = inst
+        self.inst.timeout = 10000  # ms
+        self.resource_name = dev
+        fields = idn.split(",")
+        self.serial = fields[2].strip() if len(fields) > 2 else None
+        self.connect_time_s = time.perf_counter() - t0
+        print(f"[Rigol] Connected to: {dev} ({idn.strip()}) in {self.connect_time_s:.2f} s")
+        cache['last'] = dev
+        if self.serial:
+            cache.setdefault('serials', {})[self.serial] = dev
+        _write_discovery_cache(cache_path, cache)
 
     def dis(self):
         if self.inst:
             self.inst.close()
             self.inst = None
+        self.resync()
         # Keep self.rm alive — closing a ResourceManager on NI-VISA can invalidate
         # sessions opened through other RMs in the same process.
 
@@ -46,11 +229,198 @@ class DSA815(object):
         """
         return self.inst.query("*IDN?")
 
+    # ─── Settings cache ──────────────────────────────────────────────────────
+
+    def resync(self):
+        """
+        Drop every cached setting so the next get_* call re-reads it from the
+        instrument. Call after front-panel changes or raw ``inst`` writes.
+        """
+        self._cache.clear()
+        self._pinned.clear()
+
+    def reset_cache_stats(self):
+        """Zero the cache_hits / cache_misses counters."""
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cached_query(self, key, command, cast):
+        """Return a cached setting, querying the instrument on a miss."""
+        if self.use_cache and key in self._cache:
+            self.cache_hits += 1
+            return self._cache[key]
+        self.cache_misses += 1
+        if self._batch:
+            self._flush_batch()
+        value = cast(self.inst.query(command))
+        if self.use_cache:
+            self._cache[key] = value
+        return value
+
+    def _cache_store(self, key, value, pinned=True):
+        """Record a value just written to the instrument and drop settings coupled to it."""
+        if not self.use_cache:
+            return
+        self._cache[key] = value
+        if pinned:
+            self._pinned.add(key)
+        for dependent in _COUPLED_SETTINGS.get(key, ()):
+            if dependent not in self._pinned:
+                self._cache.pop(dependent, None)
+
+    def _cache_drop(self, *keys):
+        """
+        Forget settings just written that the instrument may coerce (snap to
+        its grid or clamp to its range), so the next get_* reads back the
+        applied value, and drop the settings coupled to them.
+        """
+        if not self.use_cache:
+            return
+        for key in keys:
+            self._cache.pop(key, None)
+            self._pinned.add(key)
+            for dependent in _COUPLED_SETTINGS.get(key, ()):
+                if dependent not in self._pinned:
+                    self._cache.pop(dependent, None)
+
+    # ─── Transactions ────────────────────────────────────────────────────────
+
+    def _write(self, command):
+        """Send a settings command, or queue it while a transaction is open."""
+        if self._batch is not None:
+            self._batch.append(command)
+        else:
+            self.inst.write(command)
+
+    @staticmethod
+    def _join_commands(commands, reserve=0):
+        """Join commands with ';' into messages of at most MAX_MESSAGE_LENGTH characters."""
+        messages, message = [], ""
+        for command in commands:
+            if message and len(message) + 1 + len(command) + reserve > MAX_MESSAGE_LENGTH:
+                messages.append(message)
+                message = ""
+            message = f"{message};{command}" if message else command
+        if message:
+            messages.append(message)
+        return messages
+
+    def _flush_batch(self):
+        """Send the queued commands early (a query inside a transaction needs them applied)."""
+        for message in self._join_commands(self._batch):
+            self.inst.write(message)
+        self._batch = []
+        self._batch_flushed = True
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Queue the writes of every set_* call in the block and send them as
+        few ';'-joined messages as possible, followed by one :SYSTem:ERRor?
+        query that confirms the whole batch.
+
+        Each set_* call validates its arguments before queuing, so a
+        ValueError or TypeError inside the block sends nothing and leaves
+        the settings cache as it was. Nested transactions join the outer one.
+
+            with sa.transaction():
+                sa.set_center_frequency(100e6)
+                sa.set_RBW(10e3)
+
+        Raises:
+            IOError: The instrument reported an error for the batch. The
+                settings cache is dropped, as the instrument state is unknown.
+        """
+        if self._batch is not None:
+            yield self
+            return
+        cache, pinned = dict(self._cache), set(self._pinned)
+        self._batch, self._batch_flushed = [], False
+        try:
+            yield self
+            commands = self._batch
+        except BaseException:
+            if self._batch_flushed:
+                self.resync()
+            else:
+                self._cache, self._pinned = cache, pinned
+            raise
+        finally:
+            self._batch = None
+        if commands or self._batch_flushed:
+            self._confirm_batch(commands)
+
+    def _confirm_batch(self, commands):
+        messages = self._join_commands(commands, reserve=len(";:SYSTem:ERRor?"))
+        for message in messages[:-1]:
+            self.inst.write(message)
+        confirm = ":SYSTem:ERRor?"
+        errors = self._drain_errors(self.inst.query(f"{messages[-1]};{confirm}" if messages else confirm))
+        if errors:
+            self.resync()
+            raise IOError(f"[Rigol] Instrument rejected settings: {'; '.join(errors)}")
+
+    def _drain_errors(self, reply=None):
+        """Read :SYSTem:ERRor? until the queue is empty; return the errors found."""
+        confirm = ":SYSTem:ERRor?"
+        reply = (self.inst.query(confirm) if reply is None else reply).strip()
+        errors = []
+        while not reply.startswith("0") and len(errors) < 32:
+            errors.append(reply)
+            reply = self.inst.query(confirm).strip()
+        return errors
+
+    def configure(self, **settings):
+        """
+        Apply several settings in one transaction (see transaction()).
+
+        Keywords are set_* method names without the prefix and are applied
+        in the order given; tuple values are unpacked. Settings whose cached
+        value already matches are not sent again.
+
+            sa.configure(freq_limits=(90e6, 110e6), RBW=10e3, sweep_time=0.05)
+
+        Returns:
+            list[str]: Names of the settings actually sent.
+
+        Raises:
+            ValueError: Unknown setting or out-of-range value; nothing is sent.
+            IOError: The instrument rejected a setting.
+        """
+        calls = []
+        for name, value in settings.items():
+            setter = getattr(self, f"set_{name}", None)
+            if setter is None:
+                raise ValueError(f"Unknown setting: {name}")
+            calls.append((name, setter, value if isinstance(value, tuple) else (value,)))
+        sent = []
+        with self.transaction():
+            for name, setter, args in calls:
+                if not self._in_effect(name, args):
+                    setter(*args)
+                    sent.append(name)
+        return sent
+
+    def _in_effect(self, name, args):
+        """True if the cache shows the setting already holds these values."""
+        if not self.use_cache or name not in _SETTING_KEYS:
+            return False
+        try:
+            entries = _SETTING_KEYS[name](*args)
+        except TypeError:
+            return False
+        coupled = {key for keys in _COUPLED_SETTINGS.values() for key in keys}
+        # An auto-coupled value read back from the instrument is not the
+        # same as one set explicitly, which also switches auto coupling off.
+        return all(key in self._cache and self._cache[key] == value
+                   and (key in self._pinned or key not in coupled)
+                   for key, value in entries)
+
     # ─── Settings ────────────────────────────────────────────────────────────
 
     def TG_enable(self, state):
         """Turn the tracking generator on (True) or off (False)."""
-        self.inst.write(f":OUTput:STATe {'1' if state else '0'}")
+        self._write(f":OUTput:STATe {'1' if state else '0'}")
 
     def set_TG_amp(self, amp):
         """
@@ -61,11 +431,12 @@ class DSA815(object):
         """
         if amp > 0 or amp < -40:
             raise ValueError("Amplitude outside allowed range [-40, 0] dBm")
-        self.inst.write(f":SOURce:POWer:LEVel:IMMediate:AMPLitude {amp}")
+        self._write(f":SOURce:POWer:LEVel:IMMediate:AMPLitude {amp}")
+        self._cache_store('tg_amp', float(amp))
 
     def get_TG_amp(self):
         """Return current TG output amplitude in dBm."""
-        return float(self.inst.query(":SOURce:POWer:LEVel:IMMediate:AMPLitude?"))
+        return self._cached_query('tg_amp', ":SOURce:POWer:LEVel:IMMediate:AMPLitude?", float)
 
     def set_freq_limits(self, f_low, f_hi):
         """
@@ -77,8 +448,22 @@ class DSA815(object):
         """
         if not (0 <= f_low <= 3.2e9) or not (0 <= f_hi <= 3.2e9):
             raise ValueError("Frequencies must be between 0 Hz and 3.2 GHz")
-        self.inst.write(f":SENSe:FREQuency:STARt {f_low}")
-        self.inst.write(f":SENSe:FREQuency:STOP {f_hi}")
+        self._write(f":SENSe:FREQuency:STARt {f_low}")
+        self._write(f":SENSe:FREQuency:STOP {f_hi}")
+        # The instrument clamps at its own upper frequency, so the limits are
+        # re-read rather than taken from the request.
+        self._cache_drop('start', 'stop', 'center', 'span')
+
+    def get_freq_limits(self):
+        """
+        Return the start and stop frequency of the sweep.
+
+        Returns:
+            tuple[float, float]: (start, stop) in Hz.
+        """
+        start = self._cached_query('start', ':SENSe:FREQuency:STARt?', float)
+        stop  = self._cached_query('stop', ':SENSe:FREQuency:STOP?', float)
+        return start, stop
 
     def set_center_frequency(self, freq):
         """
@@ -89,11 +474,14 @@ class DSA815(object):
         """
         if not (0 <= freq <= 3.2e9):
             raise ValueError("Frequency must be between 0 Hz and 3.2 GHz")
-        self.inst.write(f":SENSe:FREQuency:CENTer {freq}")
+        self._write(f":SENSe:FREQuency:CENTer {freq}")
+        # The instrument clamps the center and shrinks the span at the band
+        # edges, so they are re-read rather than derived from the request.
+        self._cache_drop('start', 'stop', 'center', 'span')
 
     def get_center_frequency(self):
         """Return current center frequency in Hz."""
-        return float(self.inst.query(":SENSe:FREQuency:CENTer?"))
+        return self._cached_query('center', ":SENSe:FREQuency:CENTer?", float)
 
     def set_span(self, span):
         """
@@ -104,11 +492,12 @@ class DSA815(object):
         """
         if not (0 <= span <= 3.2e9):
             raise ValueError("Span must be between 0 Hz and 3.2 GHz")
-        self.inst.write(f":SENSe:FREQuency:SPAN {span}")
+        self._write(f":SENSe:FREQuency:SPAN {span}")
+        self._cache_drop('start', 'stop', 'center', 'span')
 
     def get_span(self):
         """Return current span in Hz."""
-        return float(self.inst.query(":SENSe:FREQuency:SPAN?"))
+        return self._cached_query('span', ":SENSe:FREQuency:SPAN?", float)
 
     def set_RBW(self, RBW):
         """
@@ -119,11 +508,12 @@ class DSA815(object):
         """
         if not (10 <= RBW <= 1e6):
             raise ValueError("RBW must be between 10 Hz and 1 MHz")
-        self.inst.write(f":SENSe:BANDwidth:RESolution {RBW}")
+        self._write(f":SENSe:BANDwidth:RESolution {RBW}")
+        self._cache_drop('rbw')     # snapped to the 1-3-10 grid by the instrument
 
     def get_RBW(self):
         """Return current RBW in Hz."""
-        return float(self.inst.query(":SENSe:BANDwidth:RESolution?"))
+        return self._cached_query('rbw', ":SENSe:BANDwidth:RESolution?", float)
 
     def set_VBW(self, VBW):
         """
@@ -134,15 +524,16 @@ class DSA815(object):
         """
         if not (1 <= VBW <= 3e6):
             raise ValueError("VBW must be between 1 Hz and 3 MHz")
-        self.inst.write(f":SENSe:BANDwidth:VIDeo {VBW}")
+        self._write(f":SENSe:BANDwidth:VIDeo {VBW}")
+        self._cache_drop('vbw')     # snapped to the 1-3-10 grid by the instrument
 
     def get_VBW(self):
         """Return current VBW in Hz."""
-        return int(self.inst.query(":SENSe:BANDwidth:VIDeo?"))
+        return self._cached_query('vbw', ":SENSe:BANDwidth:VIDeo?", lambda r: int(float(r)))
 
     def enable_RF(self, state):
         """Turn the RF preamplifier on (True) or off (False)."""
-        self.inst.write(f":SENSe:POWer:RF:GAIN:STATe {'1' if state else '0'}")
+        self._write(f":SENSe:POWer:RF:GAIN:STATe {'1' if state else '0'}")
 
     def set_input_atten(self, atten):
         """
@@ -155,20 +546,187 @@ class DSA815(object):
             raise ValueError("Input attenuation must be between 0 and 30 dB")
         if not isinstance(atten, int):
             raise TypeError("Attenuation must be an integer")
-        self.inst.write(f":SENSe:POWer:RF:ATTenuation {atten}")
+        self._write(f":SENSe:POWer:RF:ATTenuation {atten}")
+        self._cache_store('atten', atten)
 
     def get_input_atten(self):
         """Return current input attenuation in dB."""
-        return int(self.inst.query(":SENSe:POWer:RF:ATTenuation?"))
+        return self._cached_query('atten', ":SENSe:POWer:RF:ATTenuation?", lambda r: int(float(r)))
 
     # ─── Initiate ────────────────────────────────────────────────────────────
 
-    def initiate_measurement(self):
-        """Trigger a single sweep and block until it completes."""
-        self.inst.write(":INITiate:CONTinuous OFF")
+    def set_continuous(self, state):
+        """Switch between continuous (True) and single (False) sweep mode."""
+        self._write(f":INITiate:CONTinuous {'ON' if state else 'OFF'}")
+        self._cache_store('continuous', bool(state))
+
+    def start_sweep(self):
+        """Trigger a single sweep and return without waiting for it."""
+        if not (self.use_cache and self._cache.get('continuous') is False):
+            self.set_continuous(False)
         self.inst.write(":INITiate:IMMediate")
-        while int(self.inst.query(":STATus:OPERation:CONDition?")) & (1 << 3):
-            pass
+        self._sweep_started = time.perf_counter()
+
+    def initiate_measurement(self, timeout=None, method=None, idle=None):
+        """
+        Trigger a single sweep and block until it completes.
+
+        Args:
+            timeout, method, idle: See wait_for_sweep().
+        """
+        self.start_sweep()
+        self.wait_for_sweep(timeout=timeout, method=method, idle=idle)
+
+    def expected_sweep_duration(self):
+        """Return sweep time x sweep count in seconds (from the settings cache)."""
+        return self.get_sweep_time() * self.get_sweep_count()
+
+    def wait_for_sweep(self, timeout=None, method=None, idle=None):
+        """
+        Block until the sweep started by start_sweep() has completed.
+
+        Methods:
+            'poll': sleep for the expected sweep duration, then poll
+                :STATus:OPERation:CONDition? with a growing back-off.
+            'opc':  a single *OPC? query; the VISA timeout is raised to
+                cover the sweep for the duration of the call.
+            'srq':  arm *OPC with *ESE/*SRE and wait for the service request
+                event. Falls back to 'poll' when the interface has no SRQ
+                support (e.g. raw LAN sockets).
+
+        Args:
+            timeout (float | None): Seconds to wait before giving up. Defaults
+                to sweep_timeout_s, or twice the expected duration plus 10 s.
+            method (str | None): Completion strategy; defaults to wait_method.
+            idle (callable | None): Called between status polls, e.g.
+                QApplication.processEvents to keep a GUI responsive.
+                Forces the 'poll' method.
+
+        Raises:
+            TimeoutError: The sweep did not complete within ``timeout``.
+        """
+        method = method or self.wait_method
+        if method not in WAIT_METHODS:
+            raise ValueError(f"method must be one of: {', '.join(WAIT_METHODS)}")
+        if idle is not None:
+            method = "poll"
+        started, expected, deadline = self._begin_wait(timeout)
+
+        if method == "srq" and not self._wait_srq(deadline):
+            method = "poll"
+        if method == "opc":
+            self._wait_opc(deadline)
+        elif method == "poll":
+            self._wait_poll(started, expected, deadline, idle)
+        self._end_wait(started, expected)
+
+    def _begin_wait(self, timeout):
+        """Return (trigger time, expected duration, deadline) of the sweep being waited for."""
+        started = self._sweep_started if self._sweep_started is not None else time.perf_counter()
+        expected = self.expected_sweep_duration()
+        if timeout is None:
+            timeout = self.sweep_timeout_s
+        if timeout is None:
+            timeout = 2 * expected + 10.0
+        return started, expected, started + timeout
+
+    def _end_wait(self, started, expected):
+        """Record a completed wait in the wait statistics."""
+        self._sweep_started = None
+        self._wait_count += 1
+        self._wait_sweep_s += expected
+        self._wait_overhead_s += time.perf_counter() - started - expected
+
+    def is_sweeping(self):
+        """Return True while a sweep is in progress."""
+        return bool(int(self.inst.query(":STATus:OPERation:CONDition?")) & _SWEEPING_BIT)
+
+    def get_wait_stats(self):
+        """
+        Return completion-latency statistics for the waits made so far.
+
+        Returns:
+            dict: count, mean_sweep_s (expected sweep duration) and
+                mean_overhead_s (time from trigger to return beyond it).
+        """
+        count = self._wait_count
+        return {
+            'count': count,
+            'mean_sweep_s': self._wait_sweep_s / count if count else 0.0,
+            'mean_overhead_s': self._wait_overhead_s / count if count else 0.0,
+        }
+
+    def reset_wait_stats(self):
+        """Zero the completion-latency statistics."""
+        self._wait_count = 0
+        self._wait_overhead_s = 0.0
+        self._wait_sweep_s = 0.0
+
+    def _sleep_until(self, until, idle):
+        while True:
+            remaining = until - time.perf_counter()
+            if remaining <= 0:
+                return
+            if idle is None:
+                time.sleep(remaining)
+                return
+            idle()
+            time.sleep(min(remaining, 0.02))
+
+    def _wait_poll(self, started, expected, deadline, idle):
+        # Nothing to learn from the instrument before the sweep can have finished
+        self._sleep_until(min(started + expected, deadline), idle)
+        interval = min(max(expected * 0.02, 1e-3), 0.1)
+        while self.is_sweeping():
+            if time.perf_counter() >= deadline:
+                raise TimeoutError("[Rigol] Sweep did not complete before the timeout")
+            self._sleep_until(min(time.perf_counter() + interval, deadline), idle)
+            interval = min(interval * 1.5, 0.1)
+
+    def _wait_opc(self, deadline):
+        old_timeout = self.inst.timeout
+        self.inst.timeout = max(int((deadline - time.perf_counter()) * 1000), 1)
+        try:
+            self.inst.query("*OPC?")
+        except pyvisa.errors.VisaIOError as e:
+            if e.error_code == pyvisa.constants.VI_ERROR_TMO:
+                self.inst.clear()  # discard the *OPC? reply still on its way
+                raise TimeoutError("[Rigol] Sweep did not complete before the timeout")
+            raise
+        finally:
+            self.inst.timeout = old_timeout
+
+    def _wait_srq(self, deadline):
+        """Wait for the *OPC service request. Returns False if SRQ is unsupported."""
+        wait_for_srq = getattr(self.inst, 'wait_for_srq', None)
+        enable_event = getattr(self.inst, 'enable_event', None)
+        if wait_for_srq is None and enable_event is None:
+            return False
+        srq = pyvisa.constants.EventType.service_request
+        self.inst.query("*ESR?")  # clear a stale operation-complete bit
+        try:
+            if wait_for_srq is None:
+                enable_event(srq, pyvisa.constants.EventMechanism.queue)
+            self.inst.write("*ESE 1;*SRE 32;*OPC")
+            timeout_ms = max(int((deadline - time.perf_counter()) * 1000), 1)
+            if wait_for_srq is not None:
+                wait_for_srq(timeout_ms)
+            else:
+                self.inst.wait_on_event(srq, timeout_ms)
+        except pyvisa.errors.VisaIOError as e:
+            if e.error_code == pyvisa.constants.VI_ERROR_TMO:
+                raise TimeoutError("[Rigol] Sweep did not complete before the timeout")
+            if e.error_code == pyvisa.constants.VI_ERROR_NSUP_OPER:
+                return False
+            raise
+        finally:
+            if wait_for_srq is None:
+                try:
+                    self.inst.disable_event(srq, pyvisa.constants.EventMechanism.queue)
+                except pyvisa.errors.VisaIOError:
+                    pass
+        self.inst.query("*ESR?")
+        return True
 
     # ─── Trace ───────────────────────────────────────────────────────────────
 
@@ -185,13 +743,14 @@ class DSA815(object):
             raise ValueError("Trace number must be 1, 2, or 3")
         if mode not in valid_modes:
             raise ValueError(f"mode must be one of: {', '.join(valid_modes)}")
-        self.inst.write(f":TRACe{trace_num}:MODE {mode}")
+        self._write(f":TRACe{trace_num}:MODE {mode}")
+        self._cache_store(f'trace{trace_num}_mode', mode)
 
     def get_trace_mode(self, trace_num):
         """Return current mode string for the given trace."""
         if trace_num not in (1, 2, 3):
             raise ValueError("Trace number must be 1, 2, or 3")
-        return self.inst.query(f":TRACe{trace_num}:MODE?").strip()
+        return self._cached_query(f'trace{trace_num}_mode', f":TRACe{trace_num}:MODE?", str.strip)
 
     # ─── Sweep ───────────────────────────────────────────────────────────────
 
@@ -204,11 +763,12 @@ class DSA815(object):
         """
         if not (20e-6 <= sweep_time <= 3200):
             raise ValueError("Sweep time must be between 20 us and 3200 s")
-        self.inst.write(f":SENSe:SWEep:TIME {sweep_time}")
+        self._write(f":SENSe:SWEep:TIME {sweep_time}")
+        self._cache_drop('sweep_time')  # the instrument may lengthen it for the span and RBW
 
     def get_sweep_time(self):
         """Return current sweep time in seconds."""
-        return float(self.inst.query(":SENSe:SWEep:TIME?"))
+        return self._cached_query('sweep_time', ":SENSe:SWEep:TIME?", float)
 
     def set_sweep_count(self, count):
         """
@@ -219,11 +779,16 @@ class DSA815(object):
         """
         if not (1 <= count <= 9999):
             raise ValueError("Sweep count must be between 1 and 9999")
-        self.inst.write(f":SENSe:SWEep:COUNt {count}")
+        self._write(f":SENSe:SWEep:COUNt {count}")
+        self._cache_store('sweep_count', count)
 
     def get_sweep_count(self):
         """Return current sweep count."""
-        return int(self.inst.query(":SENSe:SWEep:COUNt?"))
+        return self._cached_query('sweep_count', ":SENSe:SWEep:COUNt?", lambda r: int(float(r)))
+
+    def get_sweep_points(self):
+        """Return the number of points per sweep (fixed at 601 on the DSA815)."""
+        return self._cached_query('points', ":SENSe:SWEep:POINts?", lambda r: int(float(r)))
 
     # ─── Format ──────────────────────────────────────────────────────────────
 
@@ -237,11 +802,12 @@ class DSA815(object):
         valid = ["ASCii", "REAL,32"]
         if data_format not in valid:
             raise ValueError(f"data_format must be one of: {', '.join(valid)}")
-        self.inst.write(f":FORMat:TRACe:DATA {data_format}")
+        self._write(f":FORMat:TRACe:DATA {data_format}")
+        self._cache_store('format', data_format)
 
     def get_format(self):
         """Return current trace data format string."""
-        return self.inst.query(":FORMat:TRACe:DATA?").strip()
+        return self._cached_query('format', ":FORMat:TRACe:DATA?", str.strip)
 
     # ─── Memory (MMEMory) ────────────────────────────────────────────────────
 
@@ -259,13 +825,111 @@ class DSA815(object):
                 info_dict[key.strip()] = value.strip()
         return info_dict
 
+    def list_files(self, directory=None):
+        """
+        List instrument storage.
+
+        Args:
+            directory (str | None): Directory to list; the current one if None.
+
+        Returns:
+            list[tuple[str, int]]: (file name, size in bytes) per file.
+        """
+        query = ":MMEMory:CATalog?" if directory is None else f":MMEMory:CATalog? {directory}"
+        listing = self.inst.query(query)
+        files = []
+        for entry in re.findall(r'"([^"]*)"', listing):
+            fields = entry.split(",")
+            size = fields[-1].strip()
+            files.append((fields[0].strip(), int(size) if size.isdigit() else -1))
+        return files
+
+    def read_file(self, file_name):
+        """
+        Return the raw contents of a file on instrument storage.
+
+        Raises:
+            FileNotFoundError: The instrument did not return the file.
+        """
+        return bytes(self.read_files([file_name])[0])
+
+    def read_files(self, file_names):
+        """
+        Return the raw contents of several files, fetched with as few
+        pipelined :MMEMory:DATA? messages as MAX_MESSAGE_LENGTH allows.
+
+        Returns:
+            list[memoryview]: File contents, in the order given.
+
+        Raises:
+            FileNotFoundError: A file was not returned; the instrument's
+                error queue is drained into the message.
+        """
+        contents = []
+        for message in self._join_commands([f":MMEMory:DATA? {name}" for name in file_names]):
+            try:
+                self.inst.write(message)
+                contents.extend(read_raw_blocks(self.inst, message.count(":MMEMory:DATA?")))
+            except (pyvisa.errors.VisaIOError, ValueError):
+                errors = self._drain_errors()
+                raise FileNotFoundError(f"File not found on instrument: {message} ({'; '.join(errors)})")
+        return contents
+
+    def load_traces(self, file_names, out=None):
+        """
+        Recall several trace files and read them with binary transfer.
+
+        Each file costs a :MMEMory:LOAD:TRACe plus queries of the recalled
+        start/stop frequencies and :TRACe:DATA? TRACE1; as many files as fit
+        into MAX_MESSAGE_LENGTH go out in one message, followed by one
+        :SYSTem:ERRor? check per message. Recalling a trace also recalls its
+        frequency range, so the analyzer is left at the last file's span.
+
+        Args:
+            file_names (sequence[str]): Trace files on the instrument.
+            out (np.ndarray | None): (files x points) buffer to decode into.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: One row of frequencies (Hz) per
+                file, built from that file's start/stop, and one row of
+                amplitudes (dBm) per file.
+
+        Raises:
+            FileNotFoundError: The instrument rejected a file of the message.
+        """
+        names = list(file_names)
+        points = self.get_sweep_points()
+        self.configure(format="REAL,32")
+        self._drain_errors()    # so stale errors are not blamed on these files
+        if out is None:
+            out = np.empty((len(names), points), dtype=np.float32)
+        freq = np.empty((len(names), points))
+        row = 0
+        for message in self._join_commands([f":MMEMory:LOAD:TRACe {name};:SENSe:FREQuency:STARt?;"
+                                            f":SENSe:FREQuency:STOP?;:TRACe:DATA? TRACE1"
+                                            for name in names]):
+            count = message.count(":TRACe:DATA?")
+            self.inst.write(message)
+            limits, _ = read_blocks_with_fields(self.inst, count, 2, out[row:row + count])
+            for key in ('trace1_mode', 'start', 'stop', 'center', 'span'):
+                self._cache.pop(key, None)  # recalled traces are shown in VIEW mode, at their own span
+            errors = self._drain_errors()
+            if errors:
+                raise FileNotFoundError(f"Instrument rejected {names[row:row + count]}: {'; '.join(errors)}")
+            for i, (start, stop) in enumerate(limits):
+                freq[row + i] = np.linspace(float(start), float(stop), points)
+            row += count
+        return freq, out
+
     def load_setup(self, file_name):
         """Load instrument setup from a file on instrument storage."""
         self.inst.write(f":MMEMory:LOAD:SETUp {file_name}")
+        self.resync()
 
     def load_state(self, file_name):
         """Load instrument state from a file on instrument storage."""
         self.inst.write(f":MMEMory:LOAD:STATe {file_name}")
+        self.resync()
 
     def save_results_to_USB(self, file_name):
         """Save current measurement results to a file on instrument storage."""
@@ -286,19 +950,26 @@ class DSA815(object):
 
     def load_trace(self, file_name, save_path):
         """
-        Load a .trc file from instrument and save trace data as CSV on the PC.
+        Load a .trc file from instrument and save the trace on the PC.
+
+        The trace is read with binary transfer through load_traces(), so its
+        frequency axis is the one saved with the file, and written as a
+        compact .dsatr file when save_path ends in '.dsatr', otherwise as CSV
+        (frequency and amplitude columns).
 
         Args:
             file_name (str): Path on instrument.
-            save_path (str): Local CSV path to write.
+            save_path (str): Local .csv or .dsatr path to write.
         """
         try:
-            self.inst.write(f":MMEMory:LOAD:TRACe {file_name}")
-            data = self.inst.query(":TRACe:DATA? TRACE1")
-            with open(save_path, 'w') as f:
-                f.write(data)
+            freq, amp = self.load_traces([file_name])
         except pyvisa.errors.VisaIOError:
             raise FileNotFoundError(f"File not found on instrument: {file_name}")
+        freq, amp = freq[0], amp[0]
+        if save_path.endswith(TRACE_FILE_EXTENSION):
+            write_trace(save_path, freq, amp)
+        else:
+            export_csv(save_path, freq, amp)
 
     def save_screenshot(self, file_name):
         """Save a screen capture to instrument storage."""
@@ -314,35 +985,190 @@ class DSA815(object):
 
     # ─── Measurements ────────────────────────────────────────────────────────
 
-    def measure_trace(self):
+    def measure_trace(self, out=None):
         """
-        Acquire one single sweep (ASCII format) and return amplitude list.
+        Acquire one single sweep (ASCII format) and return the amplitudes.
+
+        Args:
+            out (np.ndarray | None): Buffer with one element per sweep point
+                to parse the trace into.
 
         Returns:
-            list[float]: Amplitudes in dBm for each sweep point.
+            list[float] | np.ndarray: Amplitudes in dBm for each sweep point;
+                ``out`` itself when a buffer is given.
         """
-        self.inst.write(":INITiate:CONTinuous OFF")
         self.inst.write(":TRACe1:MODE WRITe")
+        self._cache_store('trace1_mode', "WRITe")
         self.inst.write(":FORMat:TRACe:DATA ASCii")
-        self.inst.write(":INITiate")
-        while int(self.inst.query(":STATus:OPERation:CONDition?")) & (1 << 3):
-            pass
+        self._cache_store('format', "ASCii")
+        self.initiate_measurement()
         data_str = self.inst.query(":TRACe:DATA? TRACE1")
-        parts = data_str.split(", ")
-        parts[0] = parts[0].split()[1]
-        return [float(x) for x in parts]
+        if out is None:
+            return decode_ascii_trace(data_str).tolist()
+        return decode_ascii_trace(data_str, out)
 
-    def get_sweep_data(self):
+    def get_sweep_data(self, out=None):
         """
         Return (frequencies, amplitudes) for the current sweep using binary transfer.
 
+        With the settings cache warm this costs a single VISA round trip
+        (the trace fetch); the frequency axis and transfer format come from
+        the cache.
+
+        Args:
+            out (np.ndarray | None): Buffer to decode the amplitudes into.
+
         Returns:
             tuple[np.ndarray, np.ndarray]: Frequency array (Hz) and amplitude array (dBm).
         """
-        start_freq = float(self.inst.query(':SENSe:FREQuency:STARt?'))
-        stop_freq  = float(self.inst.query(':SENSe:FREQuency:STOP?'))
-        num_points = int(self.inst.query(':SENSe:SWEep:POINts?'))
-        self.inst.write(":FORMat:TRACe:DATA REAL,32")
-        raw = self.inst.query_binary_values(":TRACe:DATA? TRACE1", datatype='f', container=np.array)
+        start_freq, stop_freq = self.get_freq_limits()
+        num_points = self.get_sweep_points()
+        raw = self.get_trace_data(out=out)
         freq = np.linspace(start_freq, stop_freq, num_points)
         return freq, raw
+
+    def get_trace_data(self, trace_num=1, out=None):
+        """
+        Return the amplitudes of one trace using binary transfer, without
+        reading the frequency axis.
+
+        Args:
+            trace_num (int): Trace index 1-3.
+            out (np.ndarray | None): Buffer with one element per sweep point;
+                the block is decoded straight into it instead of a new array.
+
+        Returns:
+            np.ndarray: Amplitudes in dBm (``out`` when given).
+        """
+        if trace_num not in (1, 2, 3):
+            raise ValueError("Trace number must be 1, 2, or 3")
+        if not (self.use_cache and self._cache.get('format') == "REAL,32"):
+            self.set_format("REAL,32")
+        self.inst.write(f":TRACe:DATA? TRACE{trace_num}")
+        return read_block(self.inst, out)
+
+    def get_traces(self, traces=(1, 2, 3), out=None):
+        """
+        Fetch several traces in one exchange.
+
+        All :TRACe:DATA? queries go out in a single program message and the
+        instrument answers with the blocks joined by ';', so reading
+        live + max hold + min hold costs one round trip instead of three,
+        and all rows come from the same sweep even in continuous mode.
+
+        Args:
+            traces (sequence): Trace indices 1-3 and/or 'MATH' (trace 1
+                minus trace 2), in the order of the returned rows.
+            out (np.ndarray | None): (len(traces) x points) buffer to decode
+                into instead of a new float32 array.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The shared, read-only frequency
+                axis (see get_frequency_axis()) and the amplitudes in dBm,
+                one row per requested trace.
+        """
+        labels = []
+        for trace in traces:
+            if trace in (1, 2, 3):
+                labels.append(f"TRACE{trace}")
+            elif str(trace).upper() == "MATH":
+                labels.append("MATH")
+            else:
+                raise ValueError(f"Trace must be 1, 2, 3 or 'MATH', got {trace!r}")
+        if not labels:
+            raise ValueError("No traces requested")
+        freq = self.get_frequency_axis()
+        if not (self.use_cache and self._cache.get('format') == "REAL,32"):
+            self.set_format("REAL,32")
+        self.inst.write(";".join(f":TRACe:DATA? {label}" for label in labels))
+        return freq, read_blocks(self.inst, len(labels), out)
+
+    def get_frequency_axis(self):
+        """
+        Return the sweep frequency axis in Hz as a read-only array.
+
+        The array is rebuilt only when start, stop or the point count change,
+        so callers can hold on to it between sweeps.
+        """
+        start, stop = self.get_freq_limits()
+        key = (start, stop, self.get_sweep_points())
+        if key != self._freq_axis_key:
+            self._freq_axis = np.linspace(*key)
+            self._freq_axis.flags.writeable = False
+            self._freq_axis_key = key
+        return self._freq_axis
+
+    # ─── Streaming ───────────────────────────────────────────────────────────
+
+    def iter_sweeps(self, n=None, depth=8, policy="block", trigger=True, trace_num=1):
+        """
+        Yield sweeps as SweepFrame tuples backed by a reusable ring buffer.
+
+        Each frame's ``amp`` is a view into a preallocated (depth x points)
+        float32 array and stays valid until the next frame is requested;
+        copy it to keep it longer.
+
+        With policy 'block' every sweep is acquired on demand in the calling
+        thread. With 'drop_oldest' a background thread acquires continuously
+        and the oldest unread sweeps are discarded when the consumer falls
+        behind (counted in ``frame.dropped``); do not use this driver from
+        other code while such an iterator is open.
+
+        Args:
+            n (int | None): Number of sweeps to acquire; None runs until the
+                generator is closed. With 'drop_oldest' fewer frames than
+                that may be yielded.
+            depth (int): Ring size in sweeps.
+            policy (str): 'block' or 'drop_oldest'.
+            trigger (bool): Trigger a single sweep for each frame. When
+                False the instrument is expected to sweep continuously and
+                reads are paced by the expected sweep duration.
+            trace_num (int): Trace index 1-3 to read.
+        """
+        freq = self.get_frequency_axis()
+        ring = SweepRing(depth, len(freq), policy)
+
+        def acquire():
+            if trigger:
+                self.initiate_measurement()
+            else:
+                time.sleep(self.expected_sweep_duration())
+            row = ring.acquire_slot()
+            if row is None:
+                return False
+            self.get_trace_data(trace_num, out=row)
+            ring.commit(time.time())
+            return True
+
+        producer = None
+        errors = []
+        if policy == "drop_oldest":
+            def run():
+                try:
+                    count = 0
+                    while (n is None or count < n) and acquire():
+                        count += 1
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    ring.close()
+            producer = threading.Thread(target=run, name="DSA815-iter_sweeps", daemon=True)
+            producer.start()
+
+        try:
+            yielded = 0
+            while n is None or yielded < n:
+                if producer is None:
+                    acquire()
+                item = ring.get()
+                if item is None:
+                    break
+                seq, timestamp, amp = item
+                yield SweepFrame(seq, timestamp, freq, amp, ring.dropped)
+                yielded += 1
+        finally:
+            ring.close()
+            if producer is not None:
+                producer.join()
+        if errors:
+            raise errors[0]
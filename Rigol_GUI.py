@@ -3,19 +3,128 @@ Rigol DSA815 - Standalone PyQt5 spectrum viewer.
 
 Run directly:
     python Rigol_GUI.py
+    python Rigol_GUI.py --broker 127.0.0.1:5815     # attach to Rigol_broker
 
 Or import and embed as a widget:
     from Rigol_GUI import SpectrumViewer
 """
+import queue
 import sys
+import threading
+import time
 import numpy as np
 from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 
 try:
+    from .Rigol_broker import BrokerClient
     from .Rigol_DSA815 import DSA815
+    from .Rigol_lock import LockDetector
+    from .Rigol_traceio import EXTENSION, export_csv, write_trace
 except ImportError:
+    from Rigol_broker import BrokerClient
     from Rigol_DSA815 import DSA815
+    from Rigol_lock import LockDetector
+    from Rigol_traceio import EXTENSION, export_csv, write_trace
+
+
+_STOP = object()
+
+
+class AcquisitionWorker(QtCore.QThread):
+    """
+    Owns all VISA I/O for a viewer on its own thread.
+
+    While streaming, the worker reads TRACE1 every ``interval_s`` seconds.
+    Each new trace replaces the previous unread one (latest frame wins), and
+    frame_ready is emitted only when the GUI has taken the last frame, so a
+    slow GUI never builds up a queue of stale sweeps. Anything else that
+    talks to the instrument is passed in through submit() and runs between
+    acquisitions, so the DSA815 object is only ever used from this thread.
+
+    Args:
+        sa (DSA815): Connected driver; do not use it from other threads
+            while the worker runs.
+        interval_s (float): Delay between trace reads while streaming.
+    """
+
+    frame_ready = QtCore.pyqtSignal()
+    command_done = QtCore.pyqtSignal(object, object)    # (callback, result)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, sa, interval_s=0.1, parent=None):
+        super().__init__(parent)
+        self.sa = sa
+        self.interval_s = interval_s
+        self.streaming = True
+        self.frames_acquired = 0
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._pending = False
+
+    def submit(self, fn, callback=None):
+        """
+        Run fn(sa) on the worker thread; callback(result) is then called on
+        the GUI thread. Errors are reported through the failed signal.
+        """
+        self._commands.put((fn, callback))
+
+    def set_streaming(self, state):
+        """Start or stop the periodic trace reads."""
+        self.streaming = bool(state)
+        self._commands.put(None)   # wake the loop up
+
+    def single_sweep(self):
+        """Stop streaming, trigger one sweep and publish its trace."""
+        self.streaming = False
+        self.submit(lambda sa: self._acquire(trigger=True))
+
+    def stop(self):
+        """Finish the current I/O, then end the thread and wait for it."""
+        self._commands.put(_STOP)
+        self.wait()
+
+    def take_frame(self):
+        """Return the latest unread frame as (freq, amp, timestamp), or None."""
+        with self._lock:
+            frame, self._latest, self._pending = self._latest, None, False
+        return frame
+
+    def _acquire(self, trigger=False):
+        if trigger:
+            self.sa.initiate_measurement()
+        amp = self.sa.get_trace_data()
+        freq = self.sa.get_frequency_axis()
+        with self._lock:
+            self._latest = (freq, amp, time.time())
+            notify = not self._pending
+            self._pending = True
+        self.frames_acquired += 1
+        if notify:
+            self.frame_ready.emit()
+
+    def run(self):
+        next_read = time.perf_counter()
+        while True:
+            timeout = max(0.0, next_read - time.perf_counter()) if self.streaming else None
+            try:
+                item = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                item = 'acquire'
+            if item is _STOP:
+                break
+            try:
+                if item == 'acquire':
+                    next_read = time.perf_counter() + self.interval_s
+                    self._acquire()
+                elif item is not None:
+                    fn, callback = item
+                    result = fn(self.sa)
+                    if callback is not None:
+                        self.command_done.emit(callback, result)
+            except Exception as e:
+                self.failed.emit(str(e))
 
 
 class SpectrumViewer(QtWidgets.QMainWindow):
@@ -25,14 +134,29 @@ class SpectrumViewer(QtWidgets.QMainWindow):
     Optional peak-lock detection: supply lock_freq_Hz to enable the
     lock indicator. The indicator turns green when the peak power
     inside [lock_freq_Hz - lock_bw_Hz, lock_freq_Hz + lock_bw_Hz]
-    exceeds lock_threshold_dBm.
+    exceeds lock_threshold_dBm. Detection runs through a
+    Rigol_lock.LockDetector (``self.lock_detector``), to which more windows
+    can be added.
+
+    All instrument I/O runs on an AcquisitionWorker thread; the GUI thread
+    only renders the newest trace, so slow transfers never freeze the window.
+    The measured acquisition and render rates are shown in the status bar.
 
     Args:
         lock_freq_Hz (float | None): Center frequency for lock detection in Hz.
             None disables the feature entirely.
         lock_bw_Hz (float): Half-bandwidth of the detection window in Hz.
         lock_threshold_dBm (float): Minimum peak power to declare lock (dBm).
-        update_interval_ms (int): Plot refresh interval in milliseconds.
+        lock_hysteresis_dB (float): Unlock only once the peak falls this far
+            below the threshold.
+        lock_debounce (int): Consecutive sweeps required to change state.
+        update_interval_ms (int): Interval between trace reads in milliseconds.
+        broker (str | tuple | BrokerClient | None): Read sweeps from a
+            running Rigol_broker.SweepBroker at this address instead of
+            connecting to the instrument.
+        sa (DSA815 | None): Connected driver to display instead of
+            connecting, e.g. one on Rigol_emulator; it is disconnected when
+            the viewer closes.
     """
 
     def __init__(
@@ -40,7 +164,11 @@ class SpectrumViewer(QtWidgets.QMainWindow):
         lock_freq_Hz=None,
         lock_bw_Hz=5e3,
         lock_threshold_dBm=-40,
+        lock_hysteresis_dB=0.0,
+        lock_debounce=1,
         update_interval_ms=100,
+        broker=None,
+        sa=None,
     ):
         super().__init__()
         self.setWindowTitle("Rigol DSA815 Live Spectrum")
@@ -50,18 +178,38 @@ class SpectrumViewer(QtWidgets.QMainWindow):
         self.lock_bw_Hz = lock_bw_Hz
         self.lock_threshold_dBm = lock_threshold_dBm
         self.locked = False
-
-        self.sa = DSA815()
-        self.sa.conn()
-        self.sa.inst.write(":FORMat:TRACe:DATA REAL,32")
-        self.points = int(self.sa.inst.query(':SENSe:SWEep:POINts?'))
+        self.lock_detector = LockDetector(callback=self._on_lock_event)
+        if lock_freq_Hz is not None:
+            self.lock_detector.add_window(lock_freq_Hz, lock_bw_Hz, lock_threshold_dBm,
+                                          name="Beat Note", hysteresis_dB=lock_hysteresis_dB,
+                                          debounce=lock_debounce)
+
+        if sa is not None:
+            self.sa = sa
+        elif broker is None:
+            self.sa = DSA815()
+            self.sa.conn()
+            self.sa.set_format("REAL,32")
+        else:
+            self.sa = broker if isinstance(broker, BrokerClient) else BrokerClient(broker)
+        self.points = self.sa.get_sweep_points()
         self._update_frequency_range()
 
+        self._last_frame = None
+        self.frames_rendered = 0
+
         self._build_ui()
 
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self._update_plot)
-        self.timer.start(update_interval_ms)
+        self.worker = AcquisitionWorker(self.sa, interval_s=update_interval_ms / 1000.0)
+        self.worker.frame_ready.connect(self._update_plot)
+        self.worker.command_done.connect(lambda callback, result: callback(result))
+        self.worker.failed.connect(self._on_worker_error)
+        self.worker.start()
+
+        self._rate_counts = (time.perf_counter(), 0, 0)
+        self.rate_timer = QtCore.QTimer()
+        self.rate_timer.timeout.connect(self._update_rates)
+        self.rate_timer.start(1000)
 
     # ─── UI construction ────────────────────────────────────────────────────
 
@@ -101,7 +249,7 @@ class SpectrumViewer(QtWidgets.QMainWindow):
         self.toggle_button.toggled.connect(self._toggle_updates)
         layout.addWidget(self.toggle_button)
 
-        save_btn = QtWidgets.QPushButton("Save Trace to CSV")
+        save_btn = QtWidgets.QPushButton("Save Trace")
         save_btn.clicked.connect(self._save_trace)
         layout.addWidget(save_btn)
 
@@ -132,11 +280,17 @@ class SpectrumViewer(QtWidgets.QMainWindow):
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
+        self.rate_label = QtWidgets.QLabel("Acquisition: -- fps | Render: -- fps")
+        self.statusBar().addPermanentWidget(self.rate_label)
+
     # ─── Helpers ────────────────────────────────────────────────────────────
 
     def _update_frequency_range(self):
-        self.f_start = float(self.sa.inst.query(':SENSe:FREQuency:STARt?'))
-        self.f_stop  = float(self.sa.inst.query(':SENSe:FREQuency:STOP?'))
+        self.f_start, self.f_stop = self.sa.get_freq_limits()
+        self._set_frequency_range(self.f_start, self.f_stop)
+
+    def _set_frequency_range(self, f_start, f_stop):
+        self.f_start, self.f_stop = f_start, f_stop
         self.span    = self.f_stop - self.f_start
         self.f_center = (self.f_stop + self.f_start) / 2
         self.frequencies = np.linspace(self.f_start, self.f_stop, self.points)
@@ -146,98 +300,99 @@ class SpectrumViewer(QtWidgets.QMainWindow):
             f_center = float(self.center_freq_input.text()) * 1e6
             span     = float(self.span_input.text()) * 1e6
             rbw      = float(self.rbw_input.text())
-            self.sa.set_center_frequency(f_center)
-            self.sa.set_span(span)
-            self.sa.set_RBW(rbw)
-            self._update_frequency_range()
-        except Exception as e:
+        except ValueError as e:
             QtWidgets.QMessageBox.critical(self, "Error", str(e))
+            return
+
+        def apply(sa):
+            sa.configure(center_frequency=f_center, span=span, RBW=rbw)
+            return sa.get_freq_limits()
+
+        self.worker.submit(apply, lambda limits: self._set_frequency_range(*limits))
 
     def _single_sweep(self):
-        try:
-            self.sa.inst.write(":INITiate:CONTinuous OFF")
-            self.sa.inst.write(":INITiate:IMMediate")
-            while int(self.sa.inst.query(":STATus:OPERation:CONDition?")) & (1 << 3):
-                QtWidgets.QApplication.processEvents()
-            raw = self.sa.inst.query_binary_values(
-                ":TRACe:DATA? TRACE1", datatype='f', container=np.array
-            )
-            self.curve.setData(self.frequencies, raw)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Error", str(e))
+        self.toggle_button.setChecked(True)
+        self.worker.single_sweep()
 
     def _continuous_sweep(self):
-        try:
-            self.sa.inst.write(":INITiate:CONTinuous ON")
-            if not self.timer.isActive():
-                self.timer.start()
-            self.toggle_button.setChecked(False)
-            self.toggle_button.setText("Pause Updates")
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Error", str(e))
+        self.worker.submit(lambda sa: sa.set_continuous(True))
+        self.toggle_button.setChecked(False)
+        self.worker.set_streaming(True)
 
     def _toggle_updates(self, checked):
-        if checked:
-            self.timer.stop()
-            self.toggle_button.setText("Resume Updates")
-        else:
-            self.timer.start()
-            self.toggle_button.setText("Pause Updates")
+        self.worker.set_streaming(not checked)
+        self.toggle_button.setText("Resume Updates" if checked else "Pause Updates")
 
     def _save_trace(self):
+        if self._last_frame is None:
+            QtWidgets.QMessageBox.critical(self, "Error", "No trace has been acquired yet")
+            return
+        freq, amp, timestamp = self._last_frame
         try:
-            raw = self.sa.inst.query_binary_values(
-                ":TRACe:DATA? TRACE1", datatype='f', container=np.array
-            )
-            self._update_frequency_range()
             path, _ = QtWidgets.QFileDialog.getSaveFileName(
-                self, "Save Trace", "", "CSV Files (*.csv)"
+                self, "Save Trace", "", "CSV Files (*.csv);;Binary Trace Files (*.dsatr)"
             )
             if not path:
                 return
-            with open(path, 'w') as f:
-                f.write("Frequency (Hz),Amplitude (dBm)\n")
-                for freq, amp in zip(self.frequencies, raw):
-                    f.write(f"{freq},{amp}\n")
+            if path.endswith(EXTENSION):
+                write_trace(path, freq, amp, timestamp)
+            else:
+                export_csv(path, freq, amp)
             QtWidgets.QMessageBox.information(self, "Saved", f"Trace saved to:\n{path}")
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", str(e))
 
     def _update_plot(self):
-        try:
-            raw = self.sa.inst.query_binary_values(
-                ":TRACe:DATA? TRACE1", datatype='f', container=np.array
-            )
-            self.curve.setData(self.frequencies, raw)
-
-            if self.lock_freq_Hz is not None:
-                idx = np.where(
-                    (self.frequencies >= self.lock_freq_Hz - self.lock_bw_Hz) &
-                    (self.frequencies <= self.lock_freq_Hz + self.lock_bw_Hz)
-                )[0]
-                self.locked = (
-                    len(idx) > 0 and np.max(raw[idx]) > self.lock_threshold_dBm
-                )
-                if self.locked:
-                    self.lock_label.setText("Beat Note Lock Status: LOCKED")
-                    self.lock_label.setStyleSheet("color: green; font-weight: bold; font-size: 16pt;")
-                    self.lock_led.setStyleSheet("background-color: green; border-radius: 10px;")
-                else:
-                    self.lock_label.setText("Beat Note Lock Status: UNLOCKED")
-                    self.lock_label.setStyleSheet("color: red; font-weight: bold; font-size: 16pt;")
-                    self.lock_led.setStyleSheet("background-color: red; border-radius: 10px;")
-
-        except Exception as e:
-            print(f"[SpectrumViewer] update error: {e}")
+        frame = self.worker.take_frame()
+        if frame is None:
+            return
+        freq, amp, timestamp = frame
+        self._last_frame = frame
+        self.frequencies = freq
+        self.curve.setData(freq, amp)
+        self.lock_detector.update(amp, freq, timestamp)
+        self.frames_rendered += 1
+
+    def _update_rates(self):
+        t_prev, acquired_prev, rendered_prev = self._rate_counts
+        now = time.perf_counter()
+        acquired, rendered = self.worker.frames_acquired, self.frames_rendered
+        dt = now - t_prev
+        self.rate_label.setText(
+            f"Acquisition: {(acquired - acquired_prev) / dt:.1f} fps | "
+            f"Render: {(rendered - rendered_prev) / dt:.1f} fps"
+        )
+        self._rate_counts = (now, acquired, rendered)
+
+    def _on_worker_error(self, message):
+        print(f"[SpectrumViewer] acquisition error: {message}")
+        self.statusBar().showMessage(f"Acquisition error: {message}", 5000)
+
+    def _on_lock_event(self, event):
+        if event.index != 0:
+            return
+        self.locked = event.locked
+        if self.locked:
+            self.lock_label.setText("Beat Note Lock Status: LOCKED")
+            self.lock_label.setStyleSheet("color: green; font-weight: bold; font-size: 16pt;")
+            self.lock_led.setStyleSheet("background-color: green; border-radius: 10px;")
+        else:
+            self.lock_label.setText("Beat Note Lock Status: UNLOCKED")
+            self.lock_label.setStyleSheet("color: red; font-weight: bold; font-size: 16pt;")
+            self.lock_led.setStyleSheet("background-color: red; border-radius: 10px;")
 
     def closeEvent(self, event):
-        self.timer.stop()
+        self.rate_timer.stop()
+        self.worker.stop()
         self.sa.dis()
         event.accept()
 
 
 if __name__ == '__main__':
+    broker = None
+    if "--broker" in sys.argv[1:-1]:
+        broker = sys.argv[sys.argv.index("--broker") + 1]
     app = QtWidgets.QApplication(sys.argv)
-    viewer = SpectrumViewer()
+    viewer = SpectrumViewer(broker=broker)
     viewer.show()
     sys.exit(app.exec_())
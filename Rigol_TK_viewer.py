@@ -3,6 +3,7 @@ Rigol DSA815 - Standalone Tkinter spectrum viewer.
 
 Run directly:
     python Rigol_TK_viewer.py
+    python Rigol_TK_viewer.py --broker 127.0.0.1:5815     # attach to Rigol_broker
 """
 import tkinter as tk
 from tkinter import messagebox, filedialog
@@ -13,22 +14,44 @@ import threading
 import time
 
 try:
+    from .Rigol_broker import BrokerClient
     from .Rigol_DSA815 import DSA815
+    from .Rigol_lock import LockDetector
 except ImportError:
+    from Rigol_broker import BrokerClient
     from Rigol_DSA815 import DSA815
+    from Rigol_lock import LockDetector
 
 
 class RigolTkViewer:
     """
     Tkinter-based live spectrum viewer for the Rigol DSA815.
 
+    A worker thread does all instrument I/O and keeps only the newest trace.
+    The Tk thread polls for it with after() and redraws just the trace line
+    by blitting over a cached background. The full figure (axes, ticks,
+    grid) is redrawn only when the frequency range or amplitude scale
+    changes.
+
     Args:
         master: Tk root window.
         lock_freq_Hz (float | None): Center frequency for beat-note lock detection in Hz.
             None disables the lock indicator.
         lock_bw_Hz (float): Half-bandwidth of the detection window in Hz.
         lock_threshold_dBm (float): Minimum peak power to declare lock (dBm).
-        update_interval_s (float): Trace refresh interval in seconds.
+        lock_hysteresis_dB (float): Unlock only once the peak falls this far
+            below the threshold.
+        lock_debounce (int): Consecutive sweeps required to change state.
+        update_interval_s (float): Pause between trace reads in seconds.
+        resync_every (int): Re-read the instrument settings every N traces,
+            so start/stop/span changes made on the front panel show up.
+        render_interval_ms (int): How often the Tk thread checks for a new trace.
+        broker (str | tuple | BrokerClient | None): Read sweeps from a
+            running Rigol_broker.SweepBroker at this address instead of
+            connecting to the instrument.
+        sa (DSA815 | None): Connected driver to display instead of
+            connecting, e.g. one on Rigol_emulator; it is disconnected when
+            the viewer closes.
     """
 
     def __init__(
@@ -37,7 +60,13 @@ class RigolTkViewer:
         lock_freq_Hz=None,
         lock_bw_Hz=5e3,
         lock_threshold_dBm=-40,
+        lock_hysteresis_dB=0.0,
+        lock_debounce=1,
         update_interval_s=0.2,
+        render_interval_ms=15,
+        broker=None,
+        resync_every=10,
+        sa=None,
     ):
         self.master = master
         self.master.title("Rigol DSA815 Viewer")
@@ -47,22 +76,46 @@ class RigolTkViewer:
         self.lock_bw_Hz = lock_bw_Hz
         self.lock_threshold_dBm = lock_threshold_dBm
         self.update_interval_s = update_interval_s
+        self.render_interval_ms = render_interval_ms
         self.locked = False
+        self.lock_detector = LockDetector(callback=self._on_lock_event)
+        if lock_freq_Hz is not None:
+            self.lock_detector.add_window(lock_freq_Hz, lock_bw_Hz, lock_threshold_dBm,
+                                          name="Beat Note", hysteresis_dB=lock_hysteresis_dB,
+                                          debounce=lock_debounce)
 
-        self.sa = DSA815()
-        try:
-            self.sa.conn()
-            self.sa.set_format("REAL,32")
-        except Exception as e:
-            messagebox.showerror("Connection Error", f"Failed to connect to DSA815: {e}")
-            return
+        self.resync_every = resync_every
+        self.running = False
+        self._render_job = None
+        self._worker = None
+        self.sa = sa
+        if sa is None:
+            self.sa = DSA815() if broker is None else (broker if isinstance(broker, BrokerClient) else None)
+            try:
+                if broker is None:
+                    self.sa.conn()
+                    self.sa.set_format("REAL,32")
+                elif not isinstance(broker, BrokerClient):
+                    self.sa = BrokerClient(broker)
+            except Exception as e:
+                messagebox.showerror("Connection Error", f"Failed to connect to DSA815: {e}")
+                return
 
-        self.points = int(self.sa.inst.query(':SENSe:SWEep:POINts?'))
+        self.points = self.sa.get_sweep_points()
         self._update_frequency_range()
+        self._frame_lock = threading.Lock()
+        self._latest = None
+        self._background = None
+        self._x_range = None
+        self._y_range = None
+        self.frames_acquired = 0
+        self.frames_rendered = 0
         self._build_ui()
 
         self.running = True
-        threading.Thread(target=self._update_loop, daemon=True).start()
+        self._worker = threading.Thread(target=self._acquire_loop, daemon=True)
+        self._worker.start()
+        self._render_job = self.master.after(self.render_interval_ms, self._render_loop)
 
     # ─── UI ─────────────────────────────────────────────────────────────────
 
@@ -82,7 +135,7 @@ class RigolTkViewer:
 
         fig = Figure(figsize=(8, 5), dpi=100)
         self.ax = fig.add_subplot(111, facecolor='black')
-        self.line, = self.ax.plot([], [], color='yellow')
+        self.line, = self.ax.plot([], [], color='yellow', animated=True)
         self.ax.tick_params(colors='white')
         self.ax.xaxis.label.set_color('white')
         self.ax.yaxis.label.set_color('white')
@@ -93,58 +146,110 @@ class RigolTkViewer:
         canvas = FigureCanvasTkAgg(fig, master=self.master)
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         self.canvas = canvas
+        # Every full redraw (autoscale, resize) refreshes the blit background
+        self.canvas.mpl_connect('draw_event', self._on_draw)
 
     # ─── Helpers ────────────────────────────────────────────────────────────
 
     def _update_frequency_range(self):
-        self.f_start = float(self.sa.inst.query(':SENSe:FREQuency:STARt?'))
-        self.f_stop  = float(self.sa.inst.query(':SENSe:FREQuency:STOP?'))
+        self.f_start, self.f_stop = self.sa.get_freq_limits()
         self.frequencies = np.linspace(self.f_start, self.f_stop, self.points)
 
-    def _update_loop(self):
+    def _acquire_loop(self):
+        """Worker thread: read traces, keeping only the newest one."""
         while self.running:
             try:
-                self._update_frequency_range()
-                raw = self.sa.inst.query_binary_values(
-                    ":TRACe:DATA? TRACE1", datatype='f', container=np.array
-                )
-                self.line.set_data(self.frequencies, raw)
-                self.ax.set_xlim(self.frequencies[0], self.frequencies[-1])
-                self.ax.set_ylim(min(raw) - 5, max(raw) + 5)
-                self.canvas.draw()
-
-                if self.lock_freq_Hz is not None:
-                    idx = np.where(
-                        (self.frequencies >= self.lock_freq_Hz - self.lock_bw_Hz) &
-                        (self.frequencies <= self.lock_freq_Hz + self.lock_bw_Hz)
-                    )[0]
-                    self.locked = (
-                        len(idx) > 0 and np.max(raw[idx]) > self.lock_threshold_dBm
-                    )
-                    if self.locked:
-                        self.lock_label.config(
-                            text="Beat Note Lock Status: LOCKED", fg="green"
-                        )
-                        self.lock_led.itemconfig(self.led_circle, fill="lightgreen")
-                    else:
-                        self.lock_label.config(
-                            text="Beat Note Lock Status: UNLOCKED", fg="red"
-                        )
-                        self.lock_led.itemconfig(self.led_circle, fill="red")
-
+                if self.resync_every and self.frames_acquired % self.resync_every == 0:
+                    self.sa.resync()        # pick up front-panel changes
+                raw = self.sa.get_trace_data()
+                freq = self.sa.get_frequency_axis()
+                if len(freq) != len(raw):   # point count changed on the front panel
+                    self.sa.resync()
+                    freq = self.sa.get_frequency_axis()
+                with self._frame_lock:
+                    self._latest = (freq, raw, time.time())
+                self.frames_acquired += 1
             except Exception as e:
                 print(f"[RigolTkViewer] update error: {e}")
-
             time.sleep(self.update_interval_s)
 
+    def _render_loop(self):
+        """Tk thread: draw the newest trace, if any, then reschedule."""
+        if not self.running:
+            return
+        try:
+            self._render()
+        except Exception as e:
+            print(f"[RigolTkViewer] render error: {e}")
+        self._render_job = self.master.after(self.render_interval_ms, self._render_loop)
+
+    def _render(self):
+        with self._frame_lock:
+            frame, self._latest = self._latest, None
+        if frame is None:
+            return
+        freq, raw, timestamp = frame
+        self.frequencies = freq
+        self.line.set_data(freq, raw)
+        if self._autoscale(freq, raw) or self._background is None:
+            self.canvas.draw()          # _on_draw re-captures the background
+        else:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self.line)
+            self.canvas.blit(self.ax.bbox)
+        self.frames_rendered += 1
+        self.lock_detector.update(raw, freq, timestamp)
+
+    def _autoscale(self, freq, raw):
+        """Update the axis limits if the data left them; True if they changed."""
+        x_range = (freq[0], freq[-1])
+        # Amplitude limits snap to 10 dB steps and only follow the data when
+        # it leaves them or fills less than half of them, so noise does not
+        # trigger a full redraw on every sweep.
+        lo, hi = float(np.min(raw)), float(np.max(raw))
+        y_range = self._y_range
+        if y_range is None or lo < y_range[0] or hi > y_range[1] or \
+                (hi - lo + 10) < (y_range[1] - y_range[0]) / 2:
+            y_range = (np.floor((lo - 5) / 10) * 10, np.ceil((hi + 5) / 10) * 10)
+        if x_range == self._x_range and y_range == self._y_range:
+            return False
+        self._x_range, self._y_range = x_range, y_range
+        self.ax.set_xlim(*x_range)
+        self.ax.set_ylim(*y_range)
+        return True
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def _on_lock_event(self, event):
+        if event.index != 0:
+            return
+        self.locked = event.locked
+        if self.locked:
+            self.lock_label.config(text="Beat Note Lock Status: LOCKED", fg="green")
+            self.lock_led.itemconfig(self.led_circle, fill="lightgreen")
+        else:
+            self.lock_label.config(text="Beat Note Lock Status: UNLOCKED", fg="red")
+            self.lock_led.itemconfig(self.led_circle, fill="red")
+
     def close(self):
         self.running = False
-        self.sa.dis()
+        if self._render_job is not None:
+            self.master.after_cancel(self._render_job)
+        if self._worker is not None:
+            self._worker.join(timeout=15)
+        if self.sa is not None:
+            self.sa.dis()
         self.master.destroy()
 
 
 if __name__ == '__main__':
+    import sys
+    broker = None
+    if "--broker" in sys.argv[1:-1]:
+        broker = sys.argv[sys.argv.index("--broker") + 1]
     root = tk.Tk()
-    app = RigolTkViewer(root)
+    app = RigolTkViewer(root, broker=broker)
     root.protocol("WM_DELETE_WINDOW", app.close)
     root.mainloop()
@@ -0,0 +1,139 @@
+"""
+Rigol DSA815 - asyncio front end.
+
+Every blocking VISA call runs on a single worker thread owned by the
+instrument, so calls to one analyzer stay serialized while several analyzers
+overlap on one event loop. Waiting for a sweep uses asyncio.sleep, never a
+blocked thread.
+
+    import asyncio
+    from Rigol_async import AsyncDSA815
+
+    async def main():
+        sa = AsyncDSA815()
+        await sa.conn()
+        await sa.set_span(10e6)
+        await sa.initiate_measurement()
+        freqs, amps = await sa.get_sweep_data()
+        await sa.dis()
+
+    asyncio.run(main())
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .Rigol_DSA815 import DSA815
+except ImportError:
+    from Rigol_DSA815 import DSA815
+
+
+class AsyncDSA815(object):
+    """
+    Awaitable wrapper around a DSA815.
+
+    All DSA815 settings, trace and storage methods are available as
+    coroutines with the same arguments; initiate_measurement() and
+    wait_for_sweep() are reimplemented so the sweep wait does not hold a
+    thread.
+
+    Args:
+        sa (DSA815 | None): Driver instance to wrap; a new one is created
+            from ``**kwargs`` when None.
+        **kwargs: Forwarded to DSA815() when ``sa`` is None.
+    """
+
+    def __init__(self, sa=None, **kwargs):
+        self.sa = sa if sa is not None else DSA815(**kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="DSA815")
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.dis()
+
+    # ─── Connection ─────────────────────────────────────────────────────────
+
+    async def conn(self, rm=None, **kwargs):
+        """Connect to the instrument (see DSA815.conn())."""
+        await self._call(self.sa.conn, rm=rm, **kwargs)
+
+    async def dis(self):
+        """Disconnect and stop the worker thread."""
+        await self._call(self.sa.dis)
+        self._executor.shutdown(wait=False)
+
+    # ─── Initiate ───────────────────────────────────────────────────────────
+
+    async def initiate_measurement(self, timeout=None):
+        """
+        Trigger a single sweep and wait for it without blocking the event loop.
+
+        Args:
+            timeout (float | None): See wait_for_sweep().
+        """
+        await self._call(self.sa.start_sweep)
+        await self.wait_for_sweep(timeout=timeout)
+
+    async def wait_for_sweep(self, timeout=None):
+        """
+        Wait for the sweep started by start_sweep(): sleep for the expected
+        duration, then poll the sweeping bit with a growing back-off. The
+        deadline and wait statistics are kept exactly as by
+        DSA815.wait_for_sweep(), measured from the start_sweep() call.
+
+        Args:
+            timeout (float | None): Seconds to wait before giving up. Defaults
+                to the driver's sweep_timeout_s, or twice the expected
+                duration plus 10 s.
+
+        Raises:
+            TimeoutError: The sweep did not complete within ``timeout``.
+        """
+        started, expected, deadline = await self._call(self.sa._begin_wait, timeout)
+        await asyncio.sleep(max(0.0, min(started + expected, deadline) - time.perf_counter()))
+        interval = min(max(expected * 0.02, 1e-3), 0.1)
+        while await self._call(self.sa.is_sweeping):
+            if time.perf_counter() >= deadline:
+                raise TimeoutError("[Rigol] Sweep did not complete before the timeout")
+            await asyncio.sleep(min(interval, deadline - time.perf_counter()))
+            interval = min(interval * 1.5, 0.1)
+        self.sa._end_wait(started, expected)
+
+
+def _async_method(name):
+    method = getattr(DSA815, name)
+
+    async def wrapper(self, *args, **kwargs):
+        return await self._call(getattr(self.sa, name), *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__qualname__ = f"AsyncDSA815.{name}"
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in (
+    "identify", "resync", "configure",
+    "TG_enable", "set_TG_amp", "get_TG_amp",
+    "set_freq_limits", "get_freq_limits", "set_center_frequency", "get_center_frequency",
+    "set_span", "get_span", "set_RBW", "get_RBW", "set_VBW", "get_VBW",
+    "enable_RF", "set_input_atten", "get_input_atten",
+    "set_continuous", "start_sweep", "is_sweeping", "expected_sweep_duration",
+    "set_trace_mode", "get_trace_mode",
+    "set_sweep_time", "get_sweep_time", "set_sweep_count", "get_sweep_count", "get_sweep_points",
+    "set_format", "get_format",
+    "delete_file", "get_disk_info", "list_files", "read_file", "read_files", "load_traces",
+    "load_setup", "load_state", "save_results_to_USB",
+    "save_trace", "load_trace", "save_screenshot", "save_setup", "save_state",
+    "measure_trace", "get_sweep_data", "get_trace_data", "get_traces", "get_frequency_axis",
+):
+    setattr(AsyncDSA815, _name, _async_method(_name))
+del _name
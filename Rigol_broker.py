@@ -0,0 +1,480 @@
+"""
+Rigol DSA815 - one process owns the instrument, many processes read its sweeps.
+
+SweepBroker holds the only VISA session. It acquires sweeps on its own
+thread and publishes each one into a ring of slots in a
+multiprocessing.shared_memory segment; the trace is read straight into the
+slot, so nothing is serialized per sweep. A multiprocessing.connection
+listener on localhost hands out the segment layout and runs control
+commands (configure(), get_RBW(), ...) on the acquisition thread between
+sweeps, in the order they arrive.
+
+Every slot is guarded by a sequence counter (seqlock): the broker makes it
+odd while writing and even when done, and a reader keeps a copy only if the
+counter was even and unchanged around its copy. Readers never block the
+broker, and a reader that falls behind skips to the newest sweep and counts
+the ones it missed.
+
+BrokerClient looks like a DSA815 to its users: get_trace_data(),
+get_sweep_data() and get_frequency_axis() read from the shared ring, every
+other public method is forwarded to the broker.
+
+    python Rigol_broker.py                  # or: rigol-broker --emulate
+
+    from Rigol_broker import BrokerClient
+
+    sa = BrokerClient()                     # instead of DSA815() + conn()
+    sa.configure(center_frequency=100e6, span=1e6)
+    freq, amp = sa.get_sweep_data()         # next sweep published after the call
+
+The listener uses a fixed authentication key by default; pass your own
+``authkey`` to both sides on hosts shared with other users.
+"""
+import argparse
+import queue
+import signal
+import threading
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+try:
+    from .Rigol_DSA815 import DISCOVERY_CACHE_PATH, DSA815
+    from .Rigol_stream import SweepFrame
+except ImportError:
+    from Rigol_DSA815 import DISCOVERY_CACHE_PATH, DSA815
+    from Rigol_stream import SweepFrame
+
+
+DEFAULT_ADDRESS = ("127.0.0.1", 5815)
+DEFAULT_AUTHKEY = b"rigol-dsa815"
+MAX_POINTS = 3001       # largest sweep point count of the DSA815
+
+MAGIC = 0x52444253      # "RDBS"
+VERSION = 1
+_HEADER = 64            # int64 words: magic, version, depth, max_points, published, running
+_HEADER_WORDS = 6
+
+_created = set()        # segments created by brokers in this process
+
+
+def _slot_dtype(max_points):
+    return np.dtype([
+        ('seq', '<i8'),         # seqlock counter, odd while the broker writes
+        ('index', '<i8'),       # sweep number, counting from 0
+        ('timestamp', '<f8'),
+        ('start', '<f8'),
+        ('stop', '<f8'),
+        ('points', '<i8'),
+        ('amp', '<f4', (max_points,)),
+    ])
+
+
+def parse_address(address):
+    """Accept None, ``(host, port)``, ``"host:port"`` or ``"port"``."""
+    if address is None:
+        return DEFAULT_ADDRESS
+    if isinstance(address, str):
+        host, _, port = address.rpartition(":")
+        return (host or DEFAULT_ADDRESS[0], int(port))
+    return tuple(address)
+
+
+def _attach(name):
+    """Attach to an existing segment without letting this process unlink it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:       # Python < 3.13 registers every attach for cleanup
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class BrokerError(Exception):
+    """A command forwarded to the broker raised; the message names the original error."""
+
+
+# ─── Broker ──────────────────────────────────────────────────────────────────
+
+class SweepBroker(object):
+    """
+    Own a DSA815 session and publish its sweeps to shared memory.
+
+    Args:
+        sa (DSA815): Connected driver; only the broker's acquisition thread
+            uses it once start() has been called.
+        depth (int): Sweeps kept in the shared ring.
+        address (tuple | str | None): Listener address, localhost:5815 by default.
+        authkey (bytes | None): Connection authentication key.
+        trigger (bool): Trigger a single sweep for every frame. When False
+            the instrument sweeps continuously and reads are paced by the
+            expected sweep duration.
+        trace_num (int): Trace 1-3 to publish.
+        max_points (int): Largest point count a slot can hold.
+    """
+
+    def __init__(self, sa, depth=16, address=None, authkey=None, trigger=True, trace_num=1,
+                 max_points=MAX_POINTS):
+        if depth < 2:
+            raise ValueError("depth must be at least 2")
+        self.sa = sa
+        self.depth = depth
+        self.trigger = trigger
+        self.trace_num = trace_num
+        self.max_points = max_points
+        self.address = parse_address(address)
+        self.authkey = DEFAULT_AUTHKEY if authkey is None else authkey
+        self.errors = 0
+        self.last_error = None
+
+        slot_dtype = _slot_dtype(max_points)
+        self.shm = shared_memory.SharedMemory(create=True, size=_HEADER + depth * slot_dtype.itemsize)
+        _created.add(self.shm.name)
+        self.header = np.ndarray(_HEADER_WORDS, dtype='<i8', buffer=self.shm.buf)
+        self.header[:] = (MAGIC, VERSION, depth, max_points, 0, 1)
+        self.slots = np.ndarray(depth, dtype=slot_dtype, buffer=self.shm.buf, offset=_HEADER)
+        self.slots['seq'] = 0
+
+        self._commands = queue.Queue()
+        self._stop = threading.Event()
+        self._acquirer = None
+        self._clients = []
+        self._listener = None
+
+    @property
+    def published(self):
+        """Sweeps published so far."""
+        return int(self.header[4])
+
+    def start(self):
+        """Start acquiring and accepting clients; returns immediately."""
+        self._listener = connection.Listener(self.address, authkey=self.authkey)
+        self.address = self._listener.address
+        self._acquirer = threading.Thread(target=self._acquire_loop, name="DSA815-broker", daemon=True)
+        self._acquirer.start()
+        # blocked in accept()/recv() until the process exits; never joined
+        threading.Thread(target=self._accept_loop, name="DSA815-broker-accept", daemon=True).start()
+        print(f"[Rigol] Broker publishing {self.shm.name} ({self.depth} sweeps), "
+              f"control on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def serve_forever(self):
+        """start() and block until close() or Ctrl+C."""
+        if self._listener is None:
+            self.start()
+        try:
+            while not self._stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop acquiring, disconnect clients and remove the shared segment."""
+        if self._stop.is_set() and self.shm is None:
+            return
+        self._stop.set()
+        self._commands.put(None)
+        if self._listener is not None:
+            self._listener.close()
+        for conn in list(self._clients):
+            conn.close()
+        if self._acquirer is not None and self._acquirer is not threading.current_thread():
+            self._acquirer.join(timeout=15)
+        if self.shm is not None:
+            self.header[5] = 0
+            _created.discard(self.shm.name)
+            self.shm.unlink()
+            if self._acquirer is not None and self._acquirer.is_alive():
+                # still inside a VISA call writing into a slot: unmapping now
+                # would fail, the mapping goes away with the process
+                print("[Rigol] Broker acquisition thread did not stop; shared memory left mapped")
+            else:
+                del self.header, self.slots
+                self.shm.close()
+            self.shm = None
+
+    # ─── Acquisition thread ──────────────────────────────────────────────────
+
+    def _run_commands(self):
+        while True:
+            try:
+                item = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                return
+            name, args, kwargs, reply = item
+            try:
+                reply.put(('ok', getattr(self.sa, name)(*args, **kwargs)))
+            except Exception as e:
+                reply.put(('error', f"{type(e).__name__}: {e}"))
+
+    def _publish(self):
+        sa = self.sa
+        if self.trigger:
+            sa.initiate_measurement()
+        else:
+            time.sleep(sa.expected_sweep_duration())
+        start, stop = sa.get_freq_limits()
+        points = sa.get_sweep_points()
+        if points > self.max_points:
+            raise ValueError(f"{points} sweep points do not fit the {self.max_points}-point slots")
+        index = int(self.header[4])
+        slot = self.slots[index % self.depth]
+        seq = int(slot['seq'])
+        slot['seq'] = seq + 1
+        try:
+            sa.get_trace_data(self.trace_num, out=slot['amp'][:points])
+        except BaseException:
+            slot['index'] = -1      # partly overwritten: no reader may accept it
+            raise
+        else:
+            slot['index'] = index
+            slot['timestamp'] = time.time()
+            slot['start'] = start
+            slot['stop'] = stop
+            slot['points'] = points
+        finally:
+            slot['seq'] = seq + 2   # even again whether or not the read succeeded
+        self.header[4] = index + 1
+
+    def _acquire_loop(self):
+        while not self._stop.is_set():
+            self._run_commands()
+            if self._stop.is_set():
+                break
+            try:
+                self._publish()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[Rigol] Broker acquisition error: {self.last_error}")
+                self._stop.wait(1.0)
+
+    # ─── Control connections ─────────────────────────────────────────────────
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, connection.AuthenticationError):
+                if self._stop.is_set():
+                    return
+                continue
+            self._clients.append(conn)
+            thread = threading.Thread(target=self._serve_client, args=(conn,), daemon=True)
+            thread.start()
+
+    def _serve_client(self, conn):
+        reply = queue.Queue(maxsize=1)
+        try:
+            conn.send({'shm': self.shm.name, 'depth': self.depth, 'max_points': self.max_points,
+                       'version': VERSION})
+            while not self._stop.is_set():
+                name, args, kwargs = conn.recv()
+                if name.startswith('_') or name in ('conn', 'dis'):
+                    conn.send(('error', f"AttributeError: {name} is not available through the broker"))
+                    continue
+                self._commands.put((name, args, kwargs, reply))
+                conn.send(reply.get())
+        except (OSError, EOFError):
+            pass
+        finally:
+            if conn in self._clients:
+                self._clients.remove(conn)
+            conn.close()
+
+
+# ─── Client ──────────────────────────────────────────────────────────────────
+
+class BrokerClient(object):
+    """
+    DSA815 stand-in that reads sweeps published by a SweepBroker.
+
+    Sweep reads wait for a sweep the client has not returned yet and copy it
+    out of shared memory; any other public DSA815 method is run by the
+    broker. Not thread-safe: use one client per thread.
+
+    Args:
+        address (tuple | str | None): Broker address, localhost:5815 by default.
+        authkey (bytes | None): Connection authentication key.
+        timeout_s (float): How long sweep reads wait for a new sweep.
+        poll_s (float): Polling interval while waiting.
+
+    Attributes:
+        dropped (int): Published sweeps this client skipped because it
+            read less often than the broker published.
+    """
+
+    def __init__(self, address=None, authkey=None, timeout_s=10.0, poll_s=1e-3):
+        self.address = parse_address(address)
+        self.timeout_s = timeout_s
+        self.poll_s = poll_s
+        self._conn = connection.Client(self.address,
+                                       authkey=DEFAULT_AUTHKEY if authkey is None else authkey)
+        info = self._conn.recv()
+        if info['version'] != VERSION:
+            raise IOError(f"[Rigol] Broker protocol version {info['version']}, expected {VERSION}")
+        self._shm = _attach(info['shm'])
+        self.depth = info['depth']
+        self._header = np.ndarray(_HEADER_WORDS, dtype='<i8', buffer=self._shm.buf)
+        self._slots = np.ndarray(self.depth, dtype=_slot_dtype(info['max_points']), buffer=self._shm.buf,
+                                 offset=_HEADER)
+        self.dropped = 0
+        self._next = int(self._header[4])     # oldest sweep index still acceptable
+        self._freq_axis = None
+        self._freq_axis_key = None
+        print(f"[Rigol] Attached to broker at {self.address[0]}:{self.address[1]}")
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, args, kwargs)
+
+    def _call(self, name, args, kwargs):
+        self._conn.send((name, args, kwargs))
+        reply = self._conn.recv()
+        if reply[0] == 'error':
+            raise BrokerError(f"[Rigol] {name}() failed in the broker: {reply[1]}")
+        return reply[1]
+
+    # ─── Shared ring ─────────────────────────────────────────────────────────
+
+    def _wait_for(self, count):
+        """Poll until ``count`` sweeps have been published; return the total."""
+        deadline = time.perf_counter() + self.timeout_s
+        while True:
+            published = int(self._header[4])
+            if published >= count:
+                return published
+            if not self._header[5]:
+                raise IOError("[Rigol] The broker has shut down")
+            if time.perf_counter() > deadline:
+                raise IOError(f"[Rigol] No sweep from the broker within {self.timeout_s} s")
+            time.sleep(self.poll_s)
+
+    def _read(self, out):
+        """Copy the newest sweep not returned yet into ``out``."""
+        while True:
+            published = self._wait_for(self._next + 1)
+            slot = self._slots[(published - 1) % self.depth]
+            seq = int(slot['seq'])
+            if seq & 1:         # the broker has lapped this reader and is rewriting the slot
+                time.sleep(self.poll_s)
+                continue
+            index, timestamp = int(slot['index']), float(slot['timestamp'])
+            start, stop, points = float(slot['start']), float(slot['stop']), int(slot['points'])
+            if out is None:
+                out = np.empty(points, dtype=np.float32)
+            elif len(out) != points:
+                raise ValueError(f"out has {len(out)} points, the sweep has {points}")
+            np.copyto(out, slot['amp'][:points], casting='same_kind')
+            if int(slot['seq']) == seq and index == published - 1:
+                self.dropped += index - self._next
+                self._next = index + 1
+                return index, timestamp, (start, stop, points), out
+
+    def _axis(self, key):
+        if key != self._freq_axis_key:
+            self._freq_axis = np.linspace(*key)
+            self._freq_axis.flags.writeable = False
+            self._freq_axis_key = key
+        return self._freq_axis
+
+    def read_frame(self, out=None):
+        """
+        Return the newest sweep not yet returned by this client.
+
+        Args:
+            out (np.ndarray | None): float32 destination of the sweep's length.
+
+        Returns:
+            SweepFrame: ``seq`` is the broker's sweep number and ``dropped``
+                the sweeps this client has skipped so far.
+        """
+        index, timestamp, key, amp = self._read(out)
+        return SweepFrame(index, timestamp, self._axis(key), amp, self.dropped)
+
+    def iter_sweeps(self, n=None):
+        """Yield SweepFrame tuples for the next ``n`` (or all) published sweeps."""
+        count = 0
+        while n is None or count < n:
+            yield self.read_frame()
+            count += 1
+
+    def initiate_measurement(self, timeout=None, method=None, idle=None):
+        """
+        Wait for a sweep that starts after this call, as DSA815 would
+        trigger one; the next trace read returns it.
+        """
+        self._next = int(self._header[4]) + 1
+        self._wait_for(self._next + 1)
+
+    def get_trace_data(self, trace_num=1, out=None):
+        """
+        Return the next published sweep as a float32 array (``out`` if
+        given). Traces other than the published one are read by the broker.
+        """
+        if trace_num != 1:
+            return self._call('get_trace_data', (trace_num,), {})
+        return self._read(out)[3]
+
+    def get_sweep_data(self, out=None):
+        """Return (freq, amp) of the next published sweep."""
+        _, _, key, amp = self._read(out)
+        return self._axis(key), amp
+
+    def get_frequency_axis(self):
+        """Frequency axis of the last sweep read, or of the broker's current settings."""
+        if self._freq_axis is None:
+            start, stop = self._call('get_freq_limits', (), {})
+            return self._axis((start, stop, self._call('get_sweep_points', (), {})))
+        return self._freq_axis
+
+    def dis(self):
+        """Detach from the broker; it and the other clients carry on."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            del self._header, self._slots
+            self._shm.close()
+
+
+def main(argv=None):
+    """Console entry point (``rigol-broker``)."""
+    parser = argparse.ArgumentParser(prog="rigol-broker", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--address", help="listen on host:port (default 127.0.0.1:5815)")
+    parser.add_argument("--resource", help="VISA resource to connect to (skips discovery)")
+    parser.add_argument("--serial", help="only accept the analyzer with this serial number")
+    parser.add_argument("--depth", type=int, default=16, help="sweeps kept in the shared ring")
+    parser.add_argument("--continuous", action="store_true",
+                        help="read a sweeping instrument instead of triggering each sweep")
+    parser.add_argument("--emulate", action="store_true", help="run against Rigol_emulator instead of hardware")
+    args = parser.parse_args(argv)
+
+    rm, cache_path = None, DISCOVERY_CACHE_PATH
+    if args.emulate:
+        try:
+            from .Rigol_emulator import EmulatedResourceManager
+        except ImportError:
+            from Rigol_emulator import EmulatedResourceManager
+        rm = EmulatedResourceManager()
+        cache_path = None       # keep emulated resources out of the discovery cache
+    sa = DSA815()
+    sa.conn(rm=rm, resource_name=args.resource, serial=args.serial, cache_path=cache_path)
+    sa.set_format("REAL,32")
+    broker = SweepBroker(sa, depth=args.depth, address=args.address, trigger=not args.continuous)
+    signal.signal(signal.SIGTERM, lambda signum, frame: broker.close())
+    try:
+        broker.serve_forever()
+    finally:
+        sa.dis()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+Rigol DSA815 - headless capture for long unattended runs.
+
+Runs a sweep schedule from a JSON file without a display: every step is
+applied with configure(), its sweeps are recorded into rotating waterfall
+files (one series per step), lock windows and spectral masks are evaluated
+on every sweep, and state changes are written as JSON lines. A stats line
+with sweeps/s, dropped sweeps and VISA I/O latency is printed periodically.
+
+Acquisition runs in a worker thread that writes each trace straight into a
+preallocated SweepRing slot; the main thread records and evaluates. If the
+disk falls behind, the oldest unread sweeps are dropped (and counted)
+instead of queueing, and recording files rotate with a fixed file count, so
+memory and disk use stay flat however long the run lasts.
+
+    rigol-capture capture.json
+    rigol-capture capture.json --emulate --duration 60
+
+Configuration (only ``schedule`` is required):
+
+    {
+        "output": "capture/run",        # path prefix of the recordings
+        "rows_per_file": 3600,          # sweeps per waterfall file
+        "max_files": 48,                # per step; older files are deleted
+        "events": "capture/events.jsonl",   # default: stdout
+        "stats_interval_s": 10,
+        "ring_depth": 16,
+        "schedule": [
+            {
+                "name": "fm",
+                "settings": {"freq_limits": [88e6, 108e6], "RBW": 100e3},
+                "sweeps": 10,
+                "lock": [{"freq": 100e6, "half_bw": 50e3, "threshold_dBm": -40,
+                          "name": "carrier", "hysteresis_dB": 3, "debounce": 2}],
+                "mask": {"upper": [[88e6, -30], [108e6, -30]]}
+            }
+        ]
+    }
+"""
+import argparse
+import contextlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+try:
+    from .Rigol_DSA815 import DISCOVERY_CACHE_PATH, DSA815
+    from .Rigol_lock import LockDetector
+    from .Rigol_mask import SpectralMask
+    from .Rigol_profiling import CommandStats, enable_profiling
+    from .Rigol_stream import SweepRing
+    from .Rigol_waterfall import WaterfallRecorder
+except ImportError:
+    from Rigol_DSA815 import DISCOVERY_CACHE_PATH, DSA815
+    from Rigol_lock import LockDetector
+    from Rigol_mask import SpectralMask
+    from Rigol_profiling import CommandStats, enable_profiling
+    from Rigol_stream import SweepRing
+    from Rigol_waterfall import WaterfallRecorder
+
+
+DEFAULTS = {
+    'output': "capture",
+    'rows_per_file': 3600,
+    'max_files': 48,
+    'events': None,
+    'stats_interval_s': 10.0,
+    'ring_depth': 16,
+    'resource': None,
+    'serial': None,
+}
+
+_STEP_KEYS = {'name', 'settings', 'sweeps', 'lock', 'mask'}
+
+
+def load_config(path):
+    """
+    Read and validate a capture configuration file.
+
+    Raises:
+        ValueError: Unknown keys or an empty schedule.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    unknown = set(config) - set(DEFAULTS) - {'schedule'}
+    if unknown:
+        raise ValueError(f"Unknown configuration keys: {', '.join(sorted(unknown))}")
+    config = dict(DEFAULTS, **config)
+    schedule = config.get('schedule')
+    if not schedule:
+        raise ValueError("The configuration needs a non-empty 'schedule'")
+    names = set()
+    for i, step in enumerate(schedule):
+        unknown = set(step) - _STEP_KEYS
+        if unknown:
+            raise ValueError(f"Unknown keys in schedule step {i}: {', '.join(sorted(unknown))}")
+        step.setdefault('name', f"step{i}")
+        step.setdefault('settings', {})
+        step.setdefault('sweeps', 1)
+        if step['name'] in names:
+            raise ValueError(f"Duplicate schedule step name: {step['name']}")
+        if step['sweeps'] < 1:
+            raise ValueError(f"Schedule step {step['name']} needs at least one sweep")
+        names.add(step['name'])
+    return config
+
+
+class _Step(object):
+    """Per-step recorder, detectors and the frequency axis of its sweeps."""
+
+    def __init__(self, index, spec, config, emit):
+        self.index = index
+        self.name = spec['name']
+        self.settings = {key: tuple(value) if isinstance(value, list) else value
+                         for key, value in spec['settings'].items()}
+        self.sweeps = int(spec['sweeps'])
+        self.freq = None
+        self.rbw = 0.0
+        self.recorder = WaterfallRecorder(f"{config['output']}_{self.name}",
+                                          rows_per_file=config['rows_per_file'],
+                                          max_files=config['max_files'])
+        self.lock = None
+        if spec.get('lock'):
+            self.lock = LockDetector(callback=lambda event: emit(
+                'lock', self.name, window=event.name, locked=event.locked, timestamp=event.timestamp,
+                peak_dBm=event.peak_dBm, peak_freq=event.peak_freq))
+            for window in spec['lock']:
+                self.lock.add_window(**window)
+        self.mask = None
+        self.mask_passed = None
+        if spec.get('mask'):
+            self.mask = SpectralMask(**spec['mask'])
+
+
+class CaptureRunner(object):
+    """
+    Run a capture schedule until stopped.
+
+    Args:
+        sa (DSA815): Connected analyzer.
+        config (dict): Configuration as returned by load_config().
+        events (file | None): Stream for JSON-line events; stdout if None.
+        stats (file | None): Stream for stats lines; stderr if None.
+    """
+
+    def __init__(self, sa, config, events=None, stats=None):
+        self.sa = sa
+        self.config = config
+        self.events = sys.stdout if events is None else events
+        self.stats_out = sys.stderr if stats is None else stats
+        self.steps = [_Step(i, spec, config, self._emit) for i, spec in enumerate(config['schedule'])]
+        self.ring = SweepRing(config['ring_depth'], sa.get_sweep_points(), policy="drop_oldest")
+        self.recorded = 0
+        self.errors = []
+        self._stop = threading.Event()
+        self._io_lock = threading.Lock()
+        self._io = CommandStats()
+        self.profiler = enable_profiling(sa, self._io_record, summary=False)
+
+    # ─── Events and stats ────────────────────────────────────────────────────
+
+    def _emit(self, kind, step, **fields):
+        record = dict(type=kind, step=step, **fields)
+        record.setdefault('timestamp', time.time())
+        self.events.write(json.dumps(record) + "\n")
+        self.events.flush()
+
+    def _io_record(self, record):
+        with self._io_lock:
+            self._io.add(record)
+
+    def _stats_line(self, elapsed, recorded, dropped):
+        with self._io_lock:
+            io, self._io = self._io, CommandStats()
+        line = (f"[Rigol] {time.strftime('%Y-%m-%d %H:%M:%S')} "
+                f"sweeps/s {recorded / elapsed:6.2f} | recorded {self.recorded} | "
+                f"dropped {self.ring.dropped} (+{dropped}) | "
+                f"I/O {io.calls} calls, mean {1e3 * io.total_s / max(io.calls, 1):.1f} ms, "
+                f"p90 {1e3 * io.percentile(90):.1f} ms, max {1e3 * io.max_s:.1f} ms, "
+                f"{io.errors} errors")
+        self.stats_out.write(line + "\n")
+        self.stats_out.flush()
+
+    # ─── Acquisition ─────────────────────────────────────────────────────────
+
+    def _acquire(self):
+        """Worker thread: cycle through the schedule, filling ring slots."""
+        sa = self.sa
+        try:
+            while not self._stop.is_set():
+                for step in self.steps:
+                    sa.configure(**step.settings)
+                    step.freq = sa.get_frequency_axis()
+                    step.rbw = sa.get_RBW()
+                    for _ in range(step.sweeps):
+                        if self._stop.is_set():
+                            return
+                        sa.initiate_measurement()
+                        row = self.ring.acquire_slot()
+                        if row is None:
+                            return
+                        sa.get_trace_data(out=row)
+                        self.ring.commit(time.time(), tag=step.index)
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            self.ring.close()
+
+    def stop(self):
+        """Ask the run to finish after the current sweep."""
+        self._stop.set()
+        self.ring.close()
+
+    def run(self, duration_s=None):
+        """
+        Acquire and record until stop(), the duration elapses or the
+        acquisition fails.
+
+        Returns:
+            int: Sweeps recorded.
+
+        Raises:
+            Exception: The error that stopped acquisition, if any.
+        """
+        worker = threading.Thread(target=self._acquire, name="DSA815-capture", daemon=True)
+        worker.start()
+        t_start = last = time.perf_counter()
+        recorded_at_last, dropped_at_last = 0, 0
+        interval = self.config['stats_interval_s']
+        try:
+            while True:
+                now = time.perf_counter()
+                if duration_s is not None and now - t_start >= duration_s:
+                    break
+                if interval and now - last >= interval:
+                    self._stats_line(now - last, self.recorded - recorded_at_last,
+                                     self.ring.dropped - dropped_at_last)
+                    last, recorded_at_last, dropped_at_last = now, self.recorded, self.ring.dropped
+                item = self.ring.get(timeout=0.2)
+                if item is None:
+                    if self.ring.closed and not len(self.ring):
+                        break
+                    continue
+                self._record(self.steps[self.ring.held_tag()], *item)
+        finally:
+            self.stop()
+            worker.join()
+            for step in self.steps:
+                step.recorder.close()
+        if self.errors:
+            raise self.errors[0]
+        return self.recorded
+
+    def _record(self, step, seq, timestamp, amp):
+        step.recorder.append(step.freq, amp, timestamp, rbw=step.rbw)
+        self.recorded += 1
+        if step.lock is not None:
+            step.lock.update(amp, step.freq, timestamp)
+        if step.mask is not None:
+            result = step.mask.check(amp, step.freq)
+            if result.passed != step.mask_passed:
+                step.mask_passed = result.passed
+                self._emit('mask', step.name, passed=result.passed, timestamp=timestamp,
+                           margin_dB=result.margin_dB, worst_freq=result.worst_freq,
+                           failures=result.failures)
+
+
+def main(argv=None):
+    """Console entry point (``rigol-capture``)."""
+    parser = argparse.ArgumentParser(
+        prog="rigol-capture", description=__doc__.split("\n\n")[0],
+        epilog="See the module docstring of Rigol_cli for the configuration format.")
+    parser.add_argument("config", help="JSON capture configuration")
+    parser.add_argument("--resource", help="VISA resource to connect to (skips discovery)")
+    parser.add_argument("--serial", help="only accept the analyzer with this serial number")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--stats-interval", type=float, help="seconds between stats lines (0 disables)")
+    parser.add_argument("--emulate", action="store_true", help="run against Rigol_emulator instead of hardware")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.stats_interval is not None:
+        config['stats_interval_s'] = args.stats_interval
+    rm, cache_path = None, DISCOVERY_CACHE_PATH
+    if args.emulate:
+        try:
+            from .Rigol_emulator import EmulatedResourceManager
+        except ImportError:
+            from Rigol_emulator import EmulatedResourceManager
+        rm = EmulatedResourceManager()
+        cache_path = None       # keep emulated resources out of the discovery cache
+
+    sa = DSA815()
+    with contextlib.redirect_stdout(sys.stderr):     # keep stdout for events
+        sa.conn(rm=rm, resource_name=args.resource or config['resource'], serial=args.serial or config['serial'],
+                cache_path=cache_path)
+    for path in (config['output'], config['events']):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    events = open(config['events'], 'a') if config['events'] else None
+    runner = CaptureRunner(sa, config, events=events)
+    signal.signal(signal.SIGTERM, lambda signum, frame: runner.stop())
+    try:
+        runner.run(duration_s=args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+        if events is not None:
+            events.close()
+        sa.dis()
+        print(f"[Rigol] Capture finished: {runner.recorded} sweeps recorded, "
+              f"{runner.ring.dropped} dropped", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Rigol DSA815 - trace decoding into caller-supplied buffers.
+
+Both transfer formats of :TRACe:DATA? start with an IEEE 488.2
+definite-length block header, ``#<n><length>``:
+
+    ASCii    #9000009025 -7.912e+01, -8.034e+01, ...
+    REAL,32  #9000002404 <little-endian float32 x points>
+
+The decoders below locate the payload from that header and parse it in C
+(np.frombuffer for binary data, np.fromstring for text) into an ``out``
+array when one is given, so repeated acquisition reuses one buffer and
+never goes through a Python list. Binary payloads are viewed in place and
+copied once into ``out``; numpy cannot parse text into an existing array,
+so ASCii traces are parsed into a temporary first (the copy is small next
+to the parsing). read_blocks() handles the reply to
+several trace queries sent in one message (blocks joined with ';').
+
+    from Rigol_decode import read_block
+
+    buf = np.empty(601, dtype=np.float32)
+    sa.inst.write(":TRACe:DATA? TRACE1")
+    read_block(sa.inst, out=buf)
+"""
+import numpy as np
+
+
+def parse_block_header(data, start=0):
+    """
+    Parse the IEEE 488.2 block header beginning at or after ``start``.
+
+    Args:
+        data (bytes | bytearray | str): Response containing the block.
+        start (int): Position to search from.
+
+    Returns:
+        tuple[int, int]: (payload offset, payload length in bytes). The
+            length is -1 for an indefinite-length (``#0``) block.
+
+    Raises:
+        ValueError: No valid header found.
+    """
+    text = isinstance(data, str)
+    pos = data.find("#" if text else b"#", start)
+    if pos < 0 or pos + 1 >= len(data):
+        raise ValueError("No IEEE 488.2 block header in trace data")
+    digits = int(data[pos + 1] if text else chr(data[pos + 1]))
+    if digits == 0:
+        return pos + 2, -1
+    length_field = data[pos + 2:pos + 2 + digits]
+    if len(length_field) < digits:
+        raise ValueError("Truncated IEEE 488.2 block header")
+    return pos + 2 + digits, int(length_field)
+
+
+def _into(values, out):
+    if out is None:
+        return values
+    if out.shape != values.shape:
+        raise ValueError(f"out has {out.size} points, trace has {values.size}")
+    np.copyto(out, values, casting='same_kind')
+    return out
+
+
+def decode_binary_block(data, out=None, dtype='<f4'):
+    """
+    Decode a REAL,32 block into ``out`` (or a new array).
+
+    The payload is viewed in place with np.frombuffer; the only copy is the
+    one into ``out`` (or into the new array).
+
+    Args:
+        data (bytes | bytearray | memoryview): Raw response, header included.
+        out (np.ndarray | None): Destination with one element per point.
+        dtype: Payload element type (little-endian float32 on the DSA815).
+
+    Returns:
+        np.ndarray: ``out``, or a new array if ``out`` is None.
+    """
+    offset, length = parse_block_header(data)
+    dtype = np.dtype(dtype)
+    if length < 0:
+        length = len(data) - offset
+        length -= length % dtype.itemsize
+    if offset + length > len(data):
+        raise ValueError(f"Incomplete block: expected {length} bytes, got {len(data) - offset}")
+    values = np.frombuffer(data, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+    if out is None:
+        return values.astype(dtype.newbyteorder('='))
+    return _into(values, out)
+
+
+def decode_ascii_trace(data, out=None, dtype=np.float64):
+    """
+    Decode an ASCii trace (``#9...`` header, comma-separated values).
+
+    np.fromstring has no ``out`` argument, so with ``out`` the values are
+    parsed into a temporary array and copied; without it the parsed array
+    is returned as is.
+
+    Args:
+        data (str | bytes): Raw response, header included.
+        out (np.ndarray | None): Destination with one element per point.
+        dtype: dtype of the returned array when ``out`` is None.
+
+    Returns:
+        np.ndarray: ``out``, or a new array if ``out`` is None.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("ascii")
+    offset, length = parse_block_header(data)
+    body = data[offset:] if length < 0 else data[offset:offset + length]
+    values = np.fromstring(body, dtype=out.dtype if out is not None else dtype, sep=",")
+    return _into(values, out)
+
+
+def _read_until(inst, data, size):
+    while len(data) < size:
+        data.extend(inst.read_raw())
+
+
+def read_block(inst, out=None, dtype='<f4'):
+    """
+    Read one binary block response from a VISA resource and decode it.
+
+    read_raw() is called until the whole block and its trailing newline
+    have arrived, since a read can stop early at a termination character
+    inside the binary payload. The matching query must already have been
+    written.
+
+    Args:
+        inst: pyvisa resource (or anything with read_raw()).
+        out (np.ndarray | None): Destination with one element per point.
+        dtype: Payload element type.
+
+    Returns:
+        np.ndarray: ``out``, or a new array if ``out`` is None.
+    """
+    data = inst.read_raw()
+    offset, length = parse_block_header(data)
+    if length >= 0 and offset + length >= len(data):
+        data = bytearray(data)
+        _read_until(inst, data, offset + length + 1)
+    return decode_binary_block(data, out, dtype)
+
+
+def _read_field(inst, data, pos):
+    """Read one ';'-terminated text response starting at ``pos``; return (text, next pos)."""
+    while True:
+        end = data.find(b";", pos)
+        if end >= 0:
+            return data[pos:end].decode("ascii").strip(), end + 1
+        data.extend(inst.read_raw())
+
+
+def _read_spans(inst, count, fields=0):
+    """
+    Read ``count`` ';'-joined blocks, each preceded by ``fields`` text
+    responses; return (data, [(offset, length), ...], [fields per block]).
+    """
+    data = bytearray(inst.read_raw())
+    spans, values = [], []
+    pos = 0
+    for _ in range(count):
+        texts = []
+        for _ in range(fields):
+            text, pos = _read_field(inst, data, pos)
+            texts.append(text)
+        values.append(texts)
+        _read_until(inst, data, pos + 2)
+        if data[pos] != ord("#") or not chr(data[pos + 1]).isdigit():
+            raise ValueError(f"No IEEE 488.2 block header at byte {pos} of response")
+        _read_until(inst, data, pos + 2 + int(chr(data[pos + 1])))
+        offset, length = parse_block_header(data, pos)
+        if length < 0:
+            raise ValueError("Indefinite-length blocks cannot be pipelined")
+        # every block is followed by ';' or the final newline
+        _read_until(inst, data, offset + length + 1)
+        spans.append((offset, length))
+        pos = offset + length + 1
+    return data, spans, values
+
+
+def read_blocks(inst, count, out=None, dtype='<f4'):
+    """
+    Read a response holding ``count`` binary blocks joined with ';' (the
+    reply to several :TRACe:DATA? queries sent in one message) and decode
+    block k into row k of ``out``.
+
+    Args:
+        inst: pyvisa resource (or anything with read_raw()).
+        count (int): Number of blocks in the response.
+        out (np.ndarray | None): Destination of shape (count, points).
+        dtype: Payload element type.
+
+    Returns:
+        np.ndarray: ``out``, or a new (count x points) array if ``out`` is None.
+
+    Raises:
+        ValueError: Malformed or indefinite-length block, or blocks of
+            different lengths.
+    """
+    data, spans, _ = _read_spans(inst, count)
+    return _decode_spans(data, spans, count, out, dtype)
+
+
+def read_blocks_with_fields(inst, count, fields, out=None, dtype='<f4'):
+    """
+    Like read_blocks(), for replies where every block is preceded by
+    ``fields`` plain text responses, e.g. the reply to
+    ``:SENSe:FREQuency:STARt?;:SENSe:FREQuency:STOP?;:TRACe:DATA? TRACE1``
+    repeated in one message.
+
+    Returns:
+        tuple[list[list[str]], np.ndarray]: The text responses before each
+            block, and ``out`` (or a new array) holding the decoded blocks.
+    """
+    data, spans, values = _read_spans(inst, count, fields)
+    return values, _decode_spans(data, spans, count, out, dtype)
+
+
+def _decode_spans(data, spans, count, out, dtype):
+    dtype = np.dtype(dtype)
+    lengths = {length for _, length in spans}
+    if len(lengths) != 1:
+        raise ValueError(f"Traces differ in length: {sorted(lengths)} bytes")
+    points = lengths.pop() // dtype.itemsize
+    if out is None:
+        out = np.empty((count, points), dtype=dtype.newbyteorder('='))
+    elif out.shape != (count, points):
+        raise ValueError(f"out has shape {out.shape}, traces are {(count, points)}")
+    for row, (offset, length) in zip(out, spans):
+        np.copyto(row, np.frombuffer(data, dtype=dtype, count=points, offset=offset),
+                  casting='same_kind')
+    return out
+
+
+def read_raw_blocks(inst, count):
+    """
+    Read ``count`` ';'-joined blocks of any length (e.g. the reply to
+    several :MMEMory:DATA? queries) and return their payloads.
+
+    Returns:
+        list[memoryview]: One view per block into the shared receive buffer.
+    """
+    data, spans, _ = _read_spans(inst, count)
+    view = memoryview(data)
+    return [view[offset:offset + length] for offset, length in spans]
@@ -0,0 +1,955 @@
+"""
+Rigol DSA815 - SCPI emulator for running the driver without hardware.
+
+EmulatedDSA815 models the instrument: it parses the SCPI subset the driver
+uses, models per-transaction latency, link bandwidth and sweep duration, and
+returns synthetic spectra (noise floor plus configurable tones) in ASCii or
+IEEE 488.2 REAL,32 block form. EmulatedResourceManager.open_resource()
+returns an EmulatedSession, which behaves like an open pyvisa message-based
+resource; several sessions to one instrument can be open at once.
+
+    from Rigol_DSA815 import DSA815
+    from Rigol_emulator import EmulatedResourceManager
+
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(latency_s=1e-3, bandwidth_Bps=1e6))
+    sa.initiate_measurement()
+    freqs, amps = sa.get_sweep_data()
+"""
+import json
+import re
+import time
+
+import numpy as np
+import pyvisa
+from pyvisa import constants, util
+
+
+# 1-3-10 sequences the DSA815 snaps bandwidth settings to
+_RBW_STEPS = np.array([10, 30, 100, 300, 1e3, 3e3, 10e3, 30e3, 100e3, 300e3, 1e6])
+_VBW_STEPS = np.array([1, 3, 10, 30, 100, 300, 1e3, 3e3, 10e3, 30e3, 100e3, 300e3, 1e6, 3e6])
+
+_TRACE_MODES = ("WRIT", "MAXH", "MINH", "VIEW", "BLAN", "VID", "POW")
+
+_UNITS = {
+    "HZ": 1.0, "KHZ": 1e3, "MHZ": 1e6, "GHZ": 1e9,
+    "S": 1.0, "MS": 1e-3, "US": 1e-6, "NS": 1e-9,
+    "DB": 1.0, "DBM": 1.0,
+}
+
+_NUMBER = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]*)\s*$")
+
+# Default nodes that may be omitted from a command header
+_OPTIONAL_NODES = ("IMM", "NEXT")
+
+# Condition bit set while a sweep is in progress (:STATus:OPERation:CONDition?)
+SWEEPING_BIT = 1 << 3
+
+
+# Mnemonics whose short form does not follow the four-letter rule below
+_SHORT_FORM_EXCEPTIONS = {
+    "SETUP": "SETU",
+}
+
+
+def _short_form(token):
+    """Return the SCPI short form of one header mnemonic (long or short input)."""
+    token = token.upper()
+    if token in _SHORT_FORM_EXCEPTIONS:
+        return _SHORT_FORM_EXCEPTIONS[token]
+    if len(token) <= 4:
+        return token
+    return token[:3] if token[3] in "AEIOU" else token[:4]
+
+
+def _parse_header(header):
+    """
+    Split a command header into its canonical key and numeric suffixes.
+
+    ':SENSe:FREQuency:STARt?' -> ('FREQ:STAR?', [])
+    ':TRACe2:MODE'             -> ('TRAC:MODE', [2])
+    """
+    if header.startswith("*"):
+        return header.upper(), []
+    query = header.endswith("?")
+    nodes, suffixes = [], []
+    for token in header.strip(":?").split(":"):
+        match = re.match(r"^([A-Za-z]+)(\d*)$", token)
+        if not match:
+            return None, []
+        name = _short_form(match.group(1))
+        if match.group(2):
+            suffixes.append(int(match.group(2)))
+        if name in _OPTIONAL_NODES:
+            continue
+        nodes.append(name)
+    if nodes and nodes[0] == "SENS":
+        nodes = nodes[1:]
+    return ":".join(nodes) + ("?" if query else ""), suffixes
+
+
+def _split_commands(message):
+    """Split a program message on ';' outside quoted strings."""
+    commands, current, quote = [], [], None
+    for char in message:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == ";":
+            commands.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    commands.append("".join(current).strip())
+    return [c for c in commands if c]
+
+
+def _parse_number(text):
+    match = _NUMBER.match(text)
+    if not match:
+        raise ValueError(text)
+    unit = match.group(2).upper()
+    if unit and unit not in _UNITS:
+        raise ValueError(text)
+    return float(match.group(1)) * _UNITS.get(unit, 1.0)
+
+
+def _parse_bool(text):
+    text = text.strip().upper()
+    if text in ("1", "ON"):
+        return True
+    if text in ("0", "OFF"):
+        return False
+    raise ValueError(text)
+
+
+def _snap(value, steps):
+    return float(steps[np.argmin(np.abs(np.log10(steps) - np.log10(max(value, 1e-3))))])
+
+
+class _SCPIError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class EmulatedDSA815(object):
+    """
+    Simulated DSA815, shared by every EmulatedSession opened to it.
+
+    Args:
+        resource_name (str): VISA resource string reported by the resource manager.
+        serial (str): Serial number returned in *IDN?.
+        latency_s (float): Fixed cost of every write or read transaction.
+        bandwidth_Bps (float | None): Link throughput in bytes/s; None for unlimited.
+        time_scale (float): Multiplier applied to sweep durations (e.g. 0.01 to
+            run benchmarks 100x faster than real time).
+        points (int): Points per sweep (601 on the real instrument).
+        tones (list[tuple[float, float]]): (frequency Hz, level dBm) of the
+            synthetic signals present at the input.
+        dut (callable | None): Device between the TG output and the input,
+            called as dut(freq_Hz, tg_level_dBm) and returning the gain in
+            dB per frequency; None for a through connection.
+        f_max (float): Upper frequency limit in Hz.
+        seed (int | None): Seed for the noise generator.
+    """
+
+    def __init__(
+        self,
+        resource_name="USB0::0x1AB1::0x0960::DSA8A000000001::INSTR",
+        serial="DSA8A000000001",
+        latency_s=0.0,
+        bandwidth_Bps=None,
+        time_scale=1.0,
+        points=601,
+        tones=((100e6, -30.0),),
+        dut=None,
+        f_max=1.5e9,
+        seed=None,
+    ):
+        self.resource_name = resource_name
+        self.serial = serial
+        self.latency_s = latency_s
+        self.bandwidth_Bps = bandwidth_Bps
+        self.time_scale = time_scale
+        self.points = points
+        self.tones = list(tones)
+        self.dut = dut
+        self.f_max = f_max
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.transactions = 0
+
+        self._rng = np.random.default_rng(seed)
+        self._files = {}
+        self._reset()
+
+    # ─── State ──────────────────────────────────────────────────────────────
+
+    def _reset(self):
+        self.state = {
+            "start": 0.0,
+            "stop": self.f_max,
+            "rbw": 1e6,
+            "rbw_auto": True,
+            "vbw": 1e6,
+            "vbw_auto": True,
+            "sweep_time": None,
+            "sweep_time_auto": True,
+            "sweep_count": 1,
+            "atten": 10,
+            "preamp": False,
+            "tg_state": False,
+            "tg_amp": -20.0,
+            "format": "ASCii",
+            "continuous": True,
+            "trace_modes": ["WRIT", "BLAN", "BLAN"],
+        }
+        self._traces = np.full((3, self.points), -100.0, dtype=np.float32)
+        self._avg_counts = [0, 0, 0]
+        self._errors = []
+        self._output = b""
+        self._pending_until = None  # *OPC? response held back until this time
+        self._esr = 0
+        self._ese = 0
+        self._sre = 0
+        self._opc_armed = False
+        self._recouple()
+        self._sweep_start = time.perf_counter()
+        self._sweep_end = self._sweep_start + self._sweep_duration()
+        self._sweeps_seen = 0
+
+    def _recouple(self):
+        """Recompute auto-coupled RBW, VBW and sweep time."""
+        s = self.state
+        span = s["stop"] - s["start"]
+        if s["rbw_auto"]:
+            s["rbw"] = _snap(min(max(span / 100.0, 10), 1e6), _RBW_STEPS)
+        if s["vbw_auto"]:
+            s["vbw"] = s["rbw"]
+        if s["sweep_time_auto"]:
+            if span <= 0:
+                s["sweep_time"] = 10e-3
+            else:
+                k = 2.5 * span / (s["rbw"] * min(s["rbw"], s["vbw"]))
+                s["sweep_time"] = min(max(k, 10e-3), 3200.0)
+
+    def _sweep_duration(self):
+        return self.state["sweep_time"] * self.state["sweep_count"] * self.time_scale
+
+    def _frequencies(self):
+        return np.linspace(self.state["start"], self.state["stop"], self.points)
+
+    def _synthesize(self):
+        """One synthetic sweep in dBm: thermal floor, tones and TG response."""
+        s = self.state
+        freq = self._frequencies()
+        floor = -135.0 + 10 * np.log10(s["rbw"]) + (s["atten"] - 10) - (10 if s["preamp"] else 0)
+        noise_std = 2.0 * np.sqrt(min(1.0, s["vbw"] / s["rbw"]))
+        power_mw = np.full(self.points, 10 ** (floor / 10))
+        bin_half = (freq[1] - freq[0]) / 2 if self.points > 1 else 0.0
+        sigma = s["rbw"] / 2.355
+        for tone_freq, tone_level in self.tones:
+            # Peak detector: a tone lands in every bin whose extent covers it
+            distance = np.maximum(np.abs(freq - tone_freq) - bin_half, 0.0)
+            power_mw += 10 ** (tone_level / 10) * np.exp(-0.5 * (distance / sigma) ** 2)
+        if s["tg_state"]:
+            gain = self.dut(freq, s["tg_amp"]) if self.dut is not None else 0.0
+            power_mw += 10 ** ((s["tg_amp"] + gain - (s["atten"] - 10)) / 10)
+        trace = 10 * np.log10(power_mw) + self._rng.normal(0.0, noise_std, self.points)
+        return trace.astype(np.float32)
+
+    def _complete_sweep(self):
+        new = self._synthesize()
+        for i, mode in enumerate(self.state["trace_modes"]):
+            trace = self._traces[i]
+            if mode == "WRIT":
+                trace[:] = new
+            elif mode == "MAXH":
+                np.maximum(trace, new, out=trace)
+            elif mode == "MINH":
+                np.minimum(trace, new, out=trace)
+            elif mode in ("VID", "POW"):
+                self._avg_counts[i] = min(self._avg_counts[i] + 1, self.state["sweep_count"])
+                trace += (new - trace) / self._avg_counts[i]
+
+    def _advance(self):
+        """Bring the sweep engine up to the current time."""
+        now = time.perf_counter()
+        if self.state["continuous"]:
+            duration = self._sweep_duration()
+            done = int((now - self._sweep_start) / duration) if duration > 0 else 1
+            if done > self._sweeps_seen:
+                self._sweeps_seen = done
+                self._complete_sweep()
+            return
+        if self._sweep_end is not None and now >= self._sweep_end:
+            self._sweep_end = None
+            self._complete_sweep()
+            if self._opc_armed:
+                self._opc_armed = False
+                self._esr |= 1
+
+    def _sweeping(self):
+        self._advance()
+        return self.state["continuous"] or self._sweep_end is not None
+
+    def _start_sweep(self):
+        self._sweep_start = time.perf_counter()
+        self._sweeps_seen = 0
+        self._avg_counts = [0, 0, 0]
+        self._sweep_end = self._sweep_start + self._sweep_duration()
+
+    def _settings_changed(self):
+        self._recouple()
+        if self._sweeping():
+            self._start_sweep()
+
+    # ─── Link ────────────────────────────────────────────────────────────────
+
+    def _transfer(self, nbytes):
+        self.transactions += 1
+        delay = self.latency_s
+        if self.bandwidth_Bps:
+            delay += nbytes / self.bandwidth_Bps
+        if delay > 0:
+            time.sleep(delay)
+
+    def _write(self, message):
+        """Execute one program message (commands may be joined with ';')."""
+        data = message.encode("ascii")
+        self._transfer(len(data))
+        self.bytes_written += len(data)
+        responses = []
+        for command in _split_commands(message.strip()):
+            response = self._execute(command)
+            if response is not None:
+                responses.append(response if isinstance(response, bytes) else response.encode("ascii"))
+        if responses:
+            self._output = b";".join(responses) + b"\n"
+        return len(data)
+
+    def _read_raw(self, size, timeout_ms):
+        """Return the pending response bytes, honouring the session's VISA timeout."""
+        if self._pending_until is not None:
+            wait = self._pending_until - time.perf_counter()
+            if wait > timeout_ms / 1000.0:
+                time.sleep(timeout_ms / 1000.0)
+                raise pyvisa.errors.VisaIOError(constants.VI_ERROR_TMO)
+            if wait > 0:
+                time.sleep(wait)
+            self._pending_until = None
+        if not self._output:
+            raise pyvisa.errors.VisaIOError(constants.VI_ERROR_TMO)
+        if size is None:
+            data, self._output = self._output, b""
+        else:
+            data, self._output = self._output[:size], self._output[size:]
+        self._transfer(len(data))
+        self.bytes_read += len(data)
+        return data
+
+    def _wait_srq(self, timeout_ms):
+        """Block until the service-request line is asserted (the *OPC of an armed sweep)."""
+        if not int(self._stb_query("", [])) & (1 << 6):
+            wait = None
+            if self._opc_armed and self._sweep_end is not None and self._ese & 1 and self._sre & (1 << 5):
+                wait = self._sweep_end - time.perf_counter()
+            if wait is None or wait > timeout_ms / 1000.0:
+                time.sleep(timeout_ms / 1000.0)
+                raise pyvisa.errors.VisaIOError(constants.VI_ERROR_TMO)
+            time.sleep(max(wait, 0))
+            self._advance()
+
+    def _clear(self):
+        """Device clear: drop pending output."""
+        self._output = b""
+        self._pending_until = None
+
+    # ─── Command execution ──────────────────────────────────────────────────
+
+    def _execute(self, command):
+        header, _, args = command.partition(" ")
+        key, suffixes = _parse_header(header)
+        handler = self._HANDLERS.get(key)
+        if handler is None:
+            self._errors.append((-113, "Undefined header"))
+            return None
+        try:
+            return handler(self, args.strip(), suffixes)
+        except _SCPIError as e:
+            self._errors.append((e.code, e.message))
+        except (ValueError, IndexError):
+            self._errors.append((-224, "Illegal parameter value"))
+        return None
+
+    # IEEE 488.2 common commands
+
+    def _idn(self, args, sfx):
+        return f"Rigol Technologies,DSA815,{self.serial},00.01.19.00.02"
+
+    def _rst(self, args, sfx):
+        self._reset()
+
+    def _cls(self, args, sfx):
+        self._errors = []
+        self._esr = 0
+
+    def _opc_query(self, args, sfx):
+        if self._sweeping() and not self.state["continuous"]:
+            self._pending_until = self._sweep_end
+        return "1"
+
+    def _opc(self, args, sfx):
+        if self._sweeping() and not self.state["continuous"]:
+            self._opc_armed = True
+        else:
+            self._esr |= 1
+
+    def _ese(self, args, sfx):
+        self._ese = int(_parse_number(args))
+
+    def _ese_query(self, args, sfx):
+        return str(self._ese)
+
+    def _esr_query(self, args, sfx):
+        self._advance()
+        value, self._esr = self._esr, 0
+        return str(value)
+
+    def _sre(self, args, sfx):
+        self._sre = int(_parse_number(args))
+
+    def _sre_query(self, args, sfx):
+        return str(self._sre)
+
+    def _stb_query(self, args, sfx):
+        self._advance()
+        stb = 0
+        if self._errors:
+            stb |= 1 << 2
+        if self._esr & self._ese:
+            stb |= 1 << 5
+        if stb & self._sre:
+            stb |= 1 << 6
+        return str(stb)
+
+    def _wai(self, args, sfx):
+        if self._sweeping() and not self.state["continuous"]:
+            time.sleep(max(self._sweep_end - time.perf_counter(), 0))
+            self._advance()
+
+    # Frequency
+
+    def _set_start(self, args, sfx):
+        s = self.state
+        s["start"] = min(max(_parse_number(args), 0.0), self.f_max)
+        s["stop"] = max(s["stop"], s["start"])
+        self._settings_changed()
+
+    def _set_stop(self, args, sfx):
+        s = self.state
+        s["stop"] = min(max(_parse_number(args), 0.0), self.f_max)
+        s["start"] = min(s["start"], s["stop"])
+        self._settings_changed()
+
+    def _set_center(self, args, sfx):
+        s = self.state
+        center = min(max(_parse_number(args), 0.0), self.f_max)
+        # Span shrinks so the new center stays inside the band
+        half = min((s["stop"] - s["start"]) / 2, center, self.f_max - center)
+        s["start"] = center - half
+        s["stop"] = center + half
+        self._settings_changed()
+
+    def _set_span(self, args, sfx):
+        s = self.state
+        center = (s["stop"] + s["start"]) / 2
+        half = min(max(_parse_number(args), 0.0), self.f_max) / 2
+        s["start"] = max(center - half, 0.0)
+        s["stop"] = min(center + half, self.f_max)
+        self._settings_changed()
+
+    def _get_start(self, args, sfx):
+        return repr(self.state["start"])
+
+    def _get_stop(self, args, sfx):
+        return repr(self.state["stop"])
+
+    def _get_center(self, args, sfx):
+        return repr((self.state["stop"] + self.state["start"]) / 2)
+
+    def _get_span(self, args, sfx):
+        return repr(self.state["stop"] - self.state["start"])
+
+    # Bandwidth
+
+    def _set_rbw(self, args, sfx):
+        self.state["rbw"] = _snap(_parse_number(args), _RBW_STEPS)
+        self.state["rbw_auto"] = False
+        self._settings_changed()
+
+    def _set_rbw_auto(self, args, sfx):
+        self.state["rbw_auto"] = _parse_bool(args)
+        self._settings_changed()
+
+    def _get_rbw(self, args, sfx):
+        return repr(self.state["rbw"])
+
+    def _set_vbw(self, args, sfx):
+        self.state["vbw"] = _snap(_parse_number(args), _VBW_STEPS)
+        self.state["vbw_auto"] = False
+        self._settings_changed()
+
+    def _set_vbw_auto(self, args, sfx):
+        self.state["vbw_auto"] = _parse_bool(args)
+        self._settings_changed()
+
+    def _get_vbw(self, args, sfx):
+        return str(int(self.state["vbw"]))
+
+    # Sweep
+
+    def _set_sweep_time(self, args, sfx):
+        value = _parse_number(args)
+        if not (20e-6 <= value <= 3200):
+            raise _SCPIError(-222, "Data out of range")
+        self.state["sweep_time"] = value
+        self.state["sweep_time_auto"] = False
+        self._settings_changed()
+
+    def _set_sweep_time_auto(self, args, sfx):
+        self.state["sweep_time_auto"] = _parse_bool(args)
+        self._settings_changed()
+
+    def _get_sweep_time(self, args, sfx):
+        return repr(self.state["sweep_time"])
+
+    def _set_sweep_count(self, args, sfx):
+        self.state["sweep_count"] = int(_parse_number(args))
+        self._settings_changed()
+
+    def _get_sweep_count(self, args, sfx):
+        return str(self.state["sweep_count"])
+
+    def _get_points(self, args, sfx):
+        return str(self.points)
+
+    # Input / RF / TG
+
+    def _set_atten(self, args, sfx):
+        self.state["atten"] = int(min(max(_parse_number(args), 0), 30))
+
+    def _get_atten(self, args, sfx):
+        return str(self.state["atten"])
+
+    def _set_preamp(self, args, sfx):
+        self.state["preamp"] = _parse_bool(args)
+
+    def _get_preamp(self, args, sfx):
+        return "1" if self.state["preamp"] else "0"
+
+    def _set_tg_state(self, args, sfx):
+        self.state["tg_state"] = _parse_bool(args)
+
+    def _get_tg_state(self, args, sfx):
+        return "1" if self.state["tg_state"] else "0"
+
+    def _set_tg_amp(self, args, sfx):
+        self.state["tg_amp"] = min(max(_parse_number(args), -40.0), 0.0)
+
+    def _get_tg_amp(self, args, sfx):
+        return repr(self.state["tg_amp"])
+
+    # Initiate / status
+
+    def _set_continuous(self, args, sfx):
+        continuous = _parse_bool(args)
+        if continuous and not self.state["continuous"]:
+            self.state["continuous"] = True
+            self._start_sweep()
+        elif not continuous and self.state["continuous"]:
+            self._advance()
+            self.state["continuous"] = False
+            self._sweep_end = None
+
+    def _initiate(self, args, sfx):
+        self._start_sweep()
+
+    def _get_condition(self, args, sfx):
+        return str(SWEEPING_BIT if self._sweeping() else 0)
+
+    def _get_error(self, args, sfx):
+        if not self._errors:
+            return '0,"No error"'
+        code, message = self._errors.pop(0)
+        return f'{code},"{message}"'
+
+    # Trace
+
+    def _trace_index(self, label):
+        label = label.strip().upper()
+        if label == "MATH":
+            return "MATH"
+        if label in ("TRACE1", "TRACE2", "TRACE3"):
+            return int(label[-1]) - 1
+        raise _SCPIError(-224, "Illegal parameter value")
+
+    def _set_format(self, args, sfx):
+        fmt = args.replace(" ", "").upper()
+        if fmt.startswith("ASC"):
+            self.state["format"] = "ASCii"
+        elif fmt in ("REAL", "REAL,32"):
+            self.state["format"] = "REAL,32"
+        else:
+            raise _SCPIError(-224, "Illegal parameter value")
+
+    def _get_format(self, args, sfx):
+        return "ASC" if self.state["format"] == "ASCii" else "REAL,32"
+
+    def _set_trace_mode(self, args, sfx):
+        index = (sfx[0] if sfx else 1) - 1
+        mode = _short_form(args.strip())
+        if mode not in _TRACE_MODES or not 0 <= index < 3:
+            raise _SCPIError(-224, "Illegal parameter value")
+        self.state["trace_modes"][index] = mode
+        self._avg_counts[index] = 0
+        if mode in ("MAXH", "MINH"):
+            self._traces[index][:] = -200.0 if mode == "MAXH" else 50.0
+
+    def _get_trace_mode(self, args, sfx):
+        return self.state["trace_modes"][(sfx[0] if sfx else 1) - 1]
+
+    def _trace_values(self, label):
+        self._advance()
+        index = self._trace_index(label)
+        if index == "MATH":
+            return self._traces[0] - self._traces[1]
+        return self._traces[index]
+
+    def _get_trace_data(self, args, sfx):
+        data = self._trace_values(args or "TRACE1")
+        if self.state["format"] == "REAL,32":
+            body = data.astype("<f4").tobytes()
+            return b"#9%09d" % len(body) + body
+        body = " " + ", ".join(map("{:.6e}".format, data.tolist()))
+        return "#9%09d" % len(body) + body
+
+    # MMEMory (in-memory file system)
+
+    def _file_args(self, args):
+        return [a.strip().strip("\"'") for a in args.split(",")]
+
+    def _store(self, name, kind, payload):
+        self._files[name] = {"kind": kind, "data": payload, "mtime": time.time()}
+
+    def _load(self, name, kind):
+        entry = self._files.get(name)
+        if entry is None or entry["kind"] != kind:
+            raise _SCPIError(-256, "File name not found")
+        return entry["data"]
+
+    def _mmem_store_trace(self, args, sfx):
+        label, name = self._file_args(args)
+        self._advance()
+        labels = ["TRACE1", "TRACE2", "TRACE3"] if label.upper() == "ALL" else [label]
+        traces = {lab.upper(): np.array(self._trace_values(lab)) for lab in labels}
+        self._store(name, "trace", {
+            "traces": traces, "start": self.state["start"], "stop": self.state["stop"],
+        })
+
+    def _mmem_load_trace(self, args, sfx):
+        (name,) = self._file_args(args)
+        payload = self._load(name, "trace")
+        first = payload["traces"].get("TRACE1", next(iter(payload["traces"].values())))
+        self._traces[0][:] = first
+        self.state["trace_modes"][0] = "VIEW"
+        # the trace is recalled together with the frequency range it was saved at
+        self.state["start"], self.state["stop"] = payload["start"], payload["stop"]
+        self._recouple()
+
+    def _mmem_store_screen(self, args, sfx):
+        (name,) = self._file_args(args)
+        # Minimal valid 1x1 BMP so downstream tools can open the file
+        bmp = (b"BM" + (58).to_bytes(4, "little") + b"\0\0\0\0" + (54).to_bytes(4, "little")
+               + (40).to_bytes(4, "little") + (1).to_bytes(4, "little") + (1).to_bytes(4, "little")
+               + (1).to_bytes(2, "little") + (24).to_bytes(2, "little") + b"\0" * 24 + b"\0\0\xff\0")
+        self._store(name, "screen", bmp)
+
+    def _mmem_store_setup(self, args, sfx):
+        (name,) = self._file_args(args)
+        self._store(name, "setup", {k: v for k, v in self.state.items() if k != "trace_modes"})
+
+    def _mmem_store_state(self, args, sfx):
+        name = self._file_args(args)[-1]
+        self._store(name, "state", dict(self.state, trace_modes=list(self.state["trace_modes"])))
+
+    def _mmem_load_setup(self, args, sfx):
+        (name,) = self._file_args(args)
+        self.state.update(self._load(name, "setup"))
+        self._settings_changed()
+
+    def _mmem_load_state(self, args, sfx):
+        (name,) = self._file_args(args)
+        payload = self._load(name, "state")
+        self.state.update(dict(payload, trace_modes=list(payload["trace_modes"])))
+        self._settings_changed()
+
+    def _mmem_store_results(self, args, sfx):
+        (name,) = self._file_args(args)
+        self._store(name, "results", self._frequencies().tolist())
+
+    def _mmem_delete(self, args, sfx):
+        (name,) = self._file_args(args)
+        if self._files.pop(name, None) is None:
+            raise _SCPIError(-256, "File name not found")
+
+    def _file_bytes(self, entry):
+        """Serialized file contents (screens are BMP, everything else JSON)."""
+        if "bytes" not in entry:
+            if entry["kind"] == "screen":
+                entry["bytes"] = entry["data"]
+            else:
+                entry["bytes"] = json.dumps(entry["data"], default=np.ndarray.tolist).encode("ascii")
+        return entry["bytes"]
+
+    def _mmem_catalog(self, args, sfx):
+        listing = [f'"{name},{entry["kind"]},{len(self._file_bytes(entry))}"'
+                   for name, entry in sorted(self._files.items())]
+        used = 4096 * len(self._files)
+        return ",".join([str(used), str(64 * 1024 * 1024 - used)] + listing)
+
+    def _mmem_data(self, args, sfx):
+        (name,) = self._file_args(args)
+        entry = self._files.get(name)
+        if entry is None:
+            raise _SCPIError(-256, "File name not found")
+        body = self._file_bytes(entry)
+        return b"#9%09d" % len(body) + body
+
+    def _mmem_disk_info(self, args, sfx):
+        used = 4096 * len(self._files)
+        return (f"Disk: D:\nFile System: FAT32\nTotal Space: {64 * 1024 * 1024}\n"
+                f"Used Space: {used}\nFree Space: {64 * 1024 * 1024 - used}")
+
+    _HANDLERS = {
+        "*IDN?": _idn,
+        "*RST": _rst,
+        "*CLS": _cls,
+        "*OPC": _opc,
+        "*OPC?": _opc_query,
+        "*ESE": _ese,
+        "*ESE?": _ese_query,
+        "*ESR?": _esr_query,
+        "*SRE": _sre,
+        "*SRE?": _sre_query,
+        "*STB?": _stb_query,
+        "*WAI": _wai,
+        "FREQ:STAR": _set_start,
+        "FREQ:STAR?": _get_start,
+        "FREQ:STOP": _set_stop,
+        "FREQ:STOP?": _get_stop,
+        "FREQ:CENT": _set_center,
+        "FREQ:CENT?": _get_center,
+        "FREQ:SPAN": _set_span,
+        "FREQ:SPAN?": _get_span,
+        "BAND:RES": _set_rbw,
+        "BAND:RES?": _get_rbw,
+        "BAND:RES:AUTO": _set_rbw_auto,
+        "BAND:VID": _set_vbw,
+        "BAND:VID?": _get_vbw,
+        "BAND:VID:AUTO": _set_vbw_auto,
+        "SWE:TIME": _set_sweep_time,
+        "SWE:TIME?": _get_sweep_time,
+        "SWE:TIME:AUTO": _set_sweep_time_auto,
+        "SWE:COUN": _set_sweep_count,
+        "SWE:COUN?": _get_sweep_count,
+        "SWE:POIN?": _get_points,
+        "POW:RF:ATT": _set_atten,
+        "POW:RF:ATT?": _get_atten,
+        "POW:RF:GAIN:STAT": _set_preamp,
+        "POW:RF:GAIN:STAT?": _get_preamp,
+        "OUTP:STAT": _set_tg_state,
+        "OUTP:STAT?": _get_tg_state,
+        "SOUR:POW:LEV:AMPL": _set_tg_amp,
+        "SOUR:POW:LEV:AMPL?": _get_tg_amp,
+        "INIT:CONT": _set_continuous,
+        "INIT": _initiate,
+        "STAT:OPER:COND?": _get_condition,
+        "SYST:ERR?": _get_error,
+        "FORM:TRAC:DATA": _set_format,
+        "FORM:TRAC:DATA?": _get_format,
+        "TRAC:MODE": _set_trace_mode,
+        "TRAC:MODE?": _get_trace_mode,
+        "TRAC:DATA?": _get_trace_data,
+        "MMEM:STOR:TRAC": _mmem_store_trace,
+        "MMEM:LOAD:TRAC": _mmem_load_trace,
+        "MMEM:STOR:SCR": _mmem_store_screen,
+        "MMEM:STOR:SETU": _mmem_store_setup,
+        "MMEM:LOAD:SETU": _mmem_load_setup,
+        "MMEM:STOR:STAT": _mmem_store_state,
+        "MMEM:LOAD:STAT": _mmem_load_state,
+        "MMEM:STOR:RES": _mmem_store_results,
+        "MMEM:DEL": _mmem_delete,
+        "MMEM:DISK:INF?": _mmem_disk_info,
+        "MMEM:CAT?": _mmem_catalog,
+        "MMEM:DATA?": _mmem_data,
+    }
+
+
+class EmulatedSession(object):
+    """
+    One open VISA session to an EmulatedDSA815, as returned by
+    EmulatedResourceManager.open_resource().
+
+    Sessions to the same instrument share its settings, output queue and
+    storage, but each has its own timeout, termination settings, event
+    enables and closed state, so closing one leaves the others usable.
+    Other attributes (``transactions``, ``bytes_read``, ``state``, ...) are
+    those of the instrument.
+
+    Args:
+        instrument (EmulatedDSA815): Instrument the session talks to.
+    """
+
+    def __init__(self, instrument, timeout=2000, read_termination="\n", write_termination="\n"):
+        self.instrument = instrument
+        self.resource_name = instrument.resource_name
+        self.timeout = timeout  # ms, as pyvisa
+        self.read_termination = read_termination
+        self.write_termination = write_termination
+        self._closed = False
+        self._srq_enabled = False   # service-request events queued by enable_event()
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['instrument'], name)
+
+    def _check_open(self):
+        if self._closed:
+            raise pyvisa.errors.InvalidSession()
+
+    def write(self, message, termination=None, encoding=None):
+        """Execute one program message (commands may be joined with ';')."""
+        self._check_open()
+        return self.instrument._write(message)
+
+    def read_raw(self, size=None):
+        """Return the pending response bytes, honouring the VISA timeout."""
+        self._check_open()
+        return self.instrument._read_raw(size, self.timeout)
+
+    def read(self, termination=None, encoding=None):
+        return self.read_raw().decode("ascii").rstrip("\r\n")
+
+    def query(self, message, delay=None):
+        self.write(message)
+        return self.read()
+
+    def query_binary_values(
+        self,
+        message,
+        datatype="f",
+        is_big_endian=False,
+        container=list,
+        delay=None,
+        header_fmt="ieee",
+        expect_termination=True,
+        data_points=None,
+        chunk_size=None,
+    ):
+        self.write(message)
+        return util.from_ieee_block(self.read_raw(), datatype, is_big_endian, container)
+
+    def enable_event(self, event_type, mechanism, context=None):
+        """Enable queuing of service-request events (as USB/TCPIP INSTR resources)."""
+        self._check_open()
+        if event_type != constants.EventType.service_request or mechanism != constants.EventMechanism.queue:
+            raise pyvisa.errors.VisaIOError(constants.VI_ERROR_NSUP_OPER)
+        self._srq_enabled = True
+
+    def disable_event(self, event_type, mechanism):
+        self._check_open()
+        self._srq_enabled = False
+
+    def wait_on_event(self, in_event_type, timeout, capture_timeout=False):
+        """Block until a queued service-request event arrives (the *OPC of an armed sweep)."""
+        self._check_open()
+        if in_event_type != constants.EventType.service_request or not self._srq_enabled:
+            raise pyvisa.errors.VisaIOError(constants.VI_ERROR_NENABLED)
+        self.instrument._wait_srq(timeout)
+
+    def clear(self):
+        """Device clear: drop pending output."""
+        self._check_open()
+        self.instrument._clear()
+
+    def close(self):
+        self._closed = True
+
+
+class UnreachableResource(object):
+    """
+    A listed resource that never answers, like a powered-off LAN instrument:
+    every write or read blocks for the VISA timeout and then fails.
+    """
+
+    def __init__(self, resource_name):
+        self.resource_name = resource_name
+        self.timeout = 2000  # ms, as pyvisa
+
+    def _stall(self, *args, **kwargs):
+        time.sleep(self.timeout / 1000.0)
+        raise pyvisa.errors.VisaIOError(constants.VI_ERROR_TMO)
+
+    write = read = read_raw = query = query_binary_values = _stall
+
+    def close(self):
+        pass
+
+
+class EmulatedResourceManager(object):
+    """
+    Stand-in for pyvisa.ResourceManager serving emulated instruments.
+
+    Args:
+        instruments (list[EmulatedDSA815] | None): Instruments to expose. When
+            None, ``count`` instruments are created from ``**kwargs``.
+        count (int): Number of instruments to create, with serial numbers
+            DSA8A000000001, DSA8A000000002, ...
+        unreachable (list[str]): Extra resource names that are listed but
+            never answer (see UnreachableResource).
+        **kwargs: Forwarded to EmulatedDSA815 when ``instruments`` is None.
+    """
+
+    def __init__(self, instruments=None, count=1, unreachable=(), **kwargs):
+        if instruments is None:
+            instruments = []
+            for i in range(count):
+                serial = f"DSA8A{i + 1:09d}"
+                instruments.append(EmulatedDSA815(
+                    resource_name=f"USB0::0x1AB1::0x0960::{serial}::INSTR", serial=serial, **kwargs
+                ))
+        self.instruments = {inst.resource_name: inst for inst in instruments}
+        self.unreachable = list(unreachable)
+
+    def list_resources(self, query="?*::INSTR"):
+        return tuple(self.unreachable) + tuple(self.instruments)
+
+    def open_resource(self, resource_name, **kwargs):
+        if resource_name in self.unreachable:
+            inst = UnreachableResource(resource_name)
+        else:
+            instrument = self.instruments.get(resource_name)
+            if instrument is None:
+                raise pyvisa.errors.VisaIOError(constants.VI_ERROR_RSRC_NFOUND)
+            inst = EmulatedSession(instrument)
+        for key, value in kwargs.items():
+            if key in ("timeout", "read_termination", "write_termination"):
+                setattr(inst, key, value)
+        return inst
+
+    def close(self):
+        pass
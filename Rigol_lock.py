@@ -0,0 +1,209 @@
+"""
+Rigol DSA815 - peak-lock detection over many frequency windows.
+
+LockDetector watches any number of windows (e.g. one per beat note) and
+reports, per sweep, whether the peak power inside each window is above its
+threshold. Window edges are turned into index ranges once per frequency
+axis and all window peaks are then found with one np.maximum.reduceat call,
+so the per-sweep cost hardly grows with the number of windows. Hysteresis
+and debouncing keep noisy peaks near the threshold from toggling the state.
+
+    from Rigol_lock import LockDetector
+
+    det = LockDetector(callback=print)
+    det.add_window(70e6, 5e3, -40, name="beat A", hysteresis_dB=3, debounce=2)
+    det.add_window(85e6, 5e3, -45, name="beat B")
+    for frame in sa.iter_sweeps():
+        det.update(frame.amp, frame.freq, frame.timestamp)
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+LockWindow = namedtuple('LockWindow', 'name freq half_bw threshold hysteresis debounce')
+LockWindow.__doc__ = """\
+One monitored window: peak inside [freq - half_bw, freq + half_bw] (Hz)
+locks above ``threshold`` dBm and unlocks at or below
+``threshold - hysteresis``, after ``debounce`` consecutive sweeps agree.
+"""
+
+LockEvent = namedtuple('LockEvent', 'index name locked timestamp peak_dBm peak_freq')
+LockEvent.__doc__ = """\
+A window changed state.
+
+Attributes:
+    index (int): Window index (order of add_window() calls).
+    name (str): Window name.
+    locked (bool): New state.
+    timestamp (float): Timestamp of the sweep that caused the change.
+    peak_dBm (float): Peak power in the window (-inf if the window lies
+        outside the sweep).
+    peak_freq (float | None): Frequency of the peak in Hz.
+"""
+
+
+class LockDetector(object):
+    """
+    Lock/unlock state of several frequency windows, updated once per sweep.
+
+    Args:
+        callback (callable | None): Called with each LockEvent.
+        hysteresis_dB (float): Default hysteresis for new windows.
+        debounce (int): Default number of consecutive sweeps a new state must
+            hold before it is reported.
+    """
+
+    def __init__(self, callback=None, hysteresis_dB=0.0, debounce=1):
+        self.callback = callback
+        self.hysteresis_dB = hysteresis_dB
+        self.debounce = debounce
+        self.clear()
+
+    def __len__(self):
+        return len(self.windows)
+
+    def clear(self):
+        """Remove every window."""
+        self.windows = []
+        self.locked = np.zeros(0, dtype=bool)
+        self.peaks = np.zeros(0)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._thresholds = np.zeros(0)
+        self._unlock_levels = np.zeros(0)
+        self._debounce = np.zeros(0, dtype=np.int64)
+        self._axis_key = None
+        self._freq = None
+        self._bounds = None
+        self._empty = None
+        self._buf = None
+
+    def add_window(self, freq, half_bw, threshold_dBm, name=None, hysteresis_dB=None, debounce=None):
+        """
+        Monitor a new window; it starts unlocked.
+
+        Args:
+            freq (float): Window center in Hz.
+            half_bw (float): Half-width of the window in Hz.
+            threshold_dBm (float): Peak power above which the window is locked.
+            name (str | None): Label used in events; defaults to the center frequency.
+            hysteresis_dB (float | None): Unlock only at or below
+                threshold_dBm - hysteresis_dB. Defaults to the detector's value.
+            debounce (int | None): Consecutive sweeps required to change state.
+                Defaults to the detector's value.
+
+        Returns:
+            int: Index of the window.
+        """
+        if half_bw < 0:
+            raise ValueError("half_bw must not be negative")
+        hysteresis_dB = self.hysteresis_dB if hysteresis_dB is None else hysteresis_dB
+        debounce = self.debounce if debounce is None else debounce
+        if hysteresis_dB < 0:
+            raise ValueError("hysteresis_dB must not be negative")
+        if debounce < 1:
+            raise ValueError("debounce must be at least 1")
+        if name is None:
+            name = f"{freq / 1e6:.6g} MHz"
+        self.windows.append(LockWindow(name, float(freq), float(half_bw), float(threshold_dBm),
+                                       float(hysteresis_dB), int(debounce)))
+        self.locked = np.append(self.locked, False)
+        self.peaks = np.append(self.peaks, -np.inf)
+        self._counts = np.append(self._counts, 0)
+        self._thresholds = np.array([w.threshold for w in self.windows])
+        self._unlock_levels = self._thresholds - np.array([w.hysteresis for w in self.windows])
+        self._debounce = np.array([w.debounce for w in self.windows])
+        self._axis_key = None
+        return len(self.windows) - 1
+
+    def reset(self):
+        """Mark every window unlocked and restart debouncing."""
+        self.locked[:] = False
+        self.peaks[:] = -np.inf
+        self._counts[:] = 0
+
+    def is_locked(self, window=0):
+        """Return the state of a window given by index or name."""
+        if isinstance(window, str):
+            window = [w.name for w in self.windows].index(window)
+        return bool(self.locked[window])
+
+    def set_axis(self, freq):
+        """
+        Precompute the index range of every window on a frequency axis.
+
+        update() calls this itself when the axis (point count, start or
+        stop) changes, so calling it directly is only needed to pay the cost
+        up front.
+        """
+        freq = np.asarray(freq)
+        points = len(freq)
+        lo_edges = np.array([w.freq - w.half_bw for w in self.windows])
+        hi_edges = np.array([w.freq + w.half_bw for w in self.windows])
+        lo = np.searchsorted(freq, lo_edges, side='left')
+        hi = np.searchsorted(freq, hi_edges, side='right')
+        self._empty = hi <= lo
+        # reduceat reduces a[idx[k]:idx[k + 1]] for every k, so interleaving
+        # (lo, hi) pairs gives each window's peak at the even positions,
+        # overlapping windows included. The buffer carries one -inf pad so
+        # hi may equal the point count.
+        bounds = np.empty(2 * len(self.windows), dtype=np.intp)
+        bounds[0::2] = np.minimum(lo, points)
+        bounds[1::2] = np.maximum(hi, lo)
+        self._bounds = bounds
+        self._buf = np.full(points + 1, -np.inf, dtype=np.float64)
+        self._freq = freq
+        self._axis_key = (points, float(freq[0]), float(freq[-1])) if points else (0, None, None)
+        self._counts[:] = 0
+
+    def update(self, amp, freq=None, timestamp=None):
+        """
+        Evaluate every window on one sweep.
+
+        Args:
+            amp (np.ndarray): Amplitudes in dBm.
+            freq (np.ndarray | None): Frequency axis in Hz; may be omitted
+                after the first call if the axis has not changed.
+            timestamp (float | None): Sweep time for the events; now if None.
+
+        Returns:
+            list[LockEvent]: Windows that changed state on this sweep.
+        """
+        if not self.windows:
+            return []
+        if freq is not None:
+            key = (len(freq), float(freq[0]), float(freq[-1])) if len(freq) else (0, None, None)
+            if key != self._axis_key:
+                self.set_axis(freq)
+        elif self._axis_key is None:
+            raise ValueError("freq is required until a frequency axis has been set")
+        if len(amp) != len(self._buf) - 1:
+            raise ValueError("amp does not match the frequency axis length")
+
+        self._buf[:-1] = amp
+        peaks = np.maximum.reduceat(self._buf, self._bounds)[0::2]
+        peaks[self._empty] = -np.inf
+        self.peaks = peaks
+
+        pending = np.where(self.locked, peaks <= self._unlock_levels, peaks > self._thresholds)
+        self._counts = np.where(pending, self._counts + 1, 0)
+        flips = np.flatnonzero(self._counts >= self._debounce)
+        if len(flips) == 0:
+            return []
+        self.locked[flips] = ~self.locked[flips]
+        self._counts[flips] = 0
+
+        timestamp = time.time() if timestamp is None else timestamp
+        events = []
+        for i in flips:
+            start, stop = self._bounds[2 * i], self._bounds[2 * i + 1]
+            peak_freq = None
+            if stop > start:
+                peak_freq = float(self._freq[start + int(np.argmax(self._buf[start:stop]))])
+            event = LockEvent(int(i), self.windows[i].name, bool(self.locked[i]), timestamp,
+                              float(peaks[i]), peak_freq)
+            events.append(event)
+            if self.callback is not None:
+                self.callback(event)
+        return events
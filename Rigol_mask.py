@@ -0,0 +1,174 @@
+"""
+Rigol DSA815 - host-side limit lines and spectral mask testing.
+
+A SpectralMask holds piecewise-linear upper and/or lower limits given as
+(frequency Hz, level dBm) breakpoints. The limits are interpolated onto the
+sweep axis once and reused until start, stop or the point count change, so
+checking a sweep is a few vectorized subtractions. Repeating a frequency
+gives a vertical step; outside the breakpoints a limit does not apply.
+
+check() evaluates one sweep, check_stack() a whole (sweeps x points) array,
+e.g. a waterfall history, in one go.
+
+    from Rigol_mask import SpectralMask
+
+    mask = SpectralMask(upper=[(90e6, -60), (99e6, -60), (99e6, -20),
+                               (101e6, -20), (101e6, -60), (110e6, -60)])
+    freq, amp = sa.get_sweep_data()
+    result = mask.check(amp, freq)
+    if not result.passed:
+        print(f"fails by {-result.margin_dB:.1f} dB at {result.worst_freq / 1e6:.3f} MHz")
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+MaskResult = namedtuple('MaskResult', 'passed margin_dB worst_freq worst_index failures')
+MaskResult.__doc__ = """\
+Outcome of a mask check. For check_stack() every field is an array with
+one entry per sweep.
+
+Attributes:
+    passed (bool): No point above the upper or below the lower limit.
+    margin_dB (float): Smallest distance to a limit over the sweep; negative
+        when the mask is violated, +inf if no limit covers the sweep.
+    worst_freq (float): Frequency in Hz of the point with the smallest margin.
+    worst_index (int): Sweep point index of that point.
+    failures (int): Number of points violating a limit.
+"""
+
+
+def _breakpoints(points, which):
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2:
+        raise ValueError(f"{which} limit needs at least two (freq, dBm) breakpoints")
+    if np.any(np.diff(points[:, 0]) < 0):
+        raise ValueError(f"{which} limit frequencies must be non-decreasing")
+    return points[:, 0].copy(), points[:, 1].copy()
+
+
+class SpectralMask(object):
+    """
+    Upper and/or lower limit line evaluated against sweeps.
+
+    Args:
+        upper (sequence | None): (freq Hz, dBm) breakpoints of the upper limit.
+        lower (sequence | None): (freq Hz, dBm) breakpoints of the lower limit.
+        name (str | None): Label for reports.
+
+    Raises:
+        ValueError: No limit given or malformed breakpoints.
+    """
+
+    def __init__(self, upper=None, lower=None, name=None):
+        if upper is None and lower is None:
+            raise ValueError("A mask needs an upper or a lower limit")
+        self.name = name
+        self._upper_points = None if upper is None else _breakpoints(upper, "upper")
+        self._lower_points = None if lower is None else _breakpoints(lower, "lower")
+        self._axis_key = None
+        self._freq = None
+        self.upper = None
+        self.lower = None
+        self.margin = None
+        self._scratch = None
+
+    def _interp(self, freq, points, outside):
+        if points is None:
+            return None
+        return np.interp(freq, points[0], points[1], left=outside, right=outside)
+
+    def set_axis(self, freq):
+        """
+        Interpolate the limits onto a frequency axis.
+
+        check() and check_stack() call this themselves when the axis
+        changes; afterwards ``upper`` and ``lower`` hold the limits per
+        sweep point (+inf/-inf where a limit does not apply), e.g. for
+        plotting.
+        """
+        freq = np.asarray(freq, dtype=np.float64)
+        self.upper = self._interp(freq, self._upper_points, np.inf)
+        self.lower = self._interp(freq, self._lower_points, -np.inf)
+        self.margin = np.empty(len(freq))
+        self._scratch = np.empty(len(freq))
+        self._freq = freq
+        self._axis_key = (len(freq), float(freq[0]), float(freq[-1])) if len(freq) else (0, None, None)
+
+    def _ensure_axis(self, freq, points):
+        if freq is not None:
+            key = (len(freq), float(freq[0]), float(freq[-1])) if len(freq) else (0, None, None)
+            if key != self._axis_key:
+                self.set_axis(freq)
+        elif self._axis_key is None:
+            raise ValueError("freq is required until a frequency axis has been set")
+        if points != self._axis_key[0]:
+            raise ValueError("amp does not match the frequency axis length")
+
+    def _margins(self, amp, out, scratch):
+        """Per-point margin (distance to the nearest limit, dB) into out."""
+        if self.upper is not None:
+            np.subtract(self.upper, amp, out=out)
+            if self.lower is not None:
+                np.subtract(amp, self.lower, out=scratch)
+                np.minimum(out, scratch, out=out)
+        else:
+            np.subtract(amp, self.lower, out=out)
+        return out
+
+    def check(self, amp, freq=None):
+        """
+        Evaluate one sweep.
+
+        The per-point margin stays available in ``margin`` until the next
+        call.
+
+        Args:
+            amp (np.ndarray): Amplitudes in dBm.
+            freq (np.ndarray | None): Frequency axis in Hz; may be omitted
+                after the first call if the axis has not changed.
+
+        Returns:
+            MaskResult
+        """
+        self._ensure_axis(freq, len(amp))
+        margin = self._margins(amp, self.margin, self._scratch)
+        worst = int(np.argmin(margin))
+        return MaskResult(bool(margin[worst] >= 0), float(margin[worst]), float(self._freq[worst]),
+                          worst, int(np.count_nonzero(margin < 0)))
+
+    def check_stack(self, amps, freq=None, chunk=32):
+        """
+        Evaluate every row of a (sweeps x points) array.
+
+        Rows are processed ``chunk`` at a time, which keeps the temporaries
+        small enough to stay in cache and bounded for long recordings.
+
+        Args:
+            amps (np.ndarray): Amplitudes in dBm, one sweep per row.
+            freq (np.ndarray | None): Frequency axis shared by all rows.
+            chunk (int): Rows evaluated per vectorized step.
+
+        Returns:
+            MaskResult: Fields are arrays with one entry per sweep.
+        """
+        amps = np.asarray(amps)
+        if amps.ndim != 2:
+            raise ValueError("amps must be a (sweeps x points) array")
+        sweeps, points = amps.shape
+        self._ensure_axis(freq, points)
+        margin_dB = np.empty(sweeps)
+        worst_index = np.empty(sweeps, dtype=np.intp)
+        failures = np.empty(sweeps, dtype=np.intp)
+        out = np.empty((min(chunk, sweeps), points))
+        scratch = np.empty_like(out)
+        for start in range(0, sweeps, chunk):
+            block = amps[start:start + chunk]
+            n = len(block)
+            margin = self._margins(block, out[:n], scratch[:n])
+            idx = np.argmin(margin, axis=1)
+            worst_index[start:start + n] = idx
+            margin_dB[start:start + n] = margin[np.arange(n), idx]
+            failures[start:start + n] = np.count_nonzero(margin < 0, axis=1)
+        return MaskResult(margin_dB >= 0, margin_dB, self._freq[worst_index], worst_index, failures)
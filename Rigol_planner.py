@@ -0,0 +1,252 @@
+"""
+Rigol DSA815 - sweep parameter planning against a refresh-rate or
+resolution budget.
+
+SweepModel predicts the time of one acquisition cycle (trigger, sweep,
+REAL,32 fetch) from span, RBW, VBW and point count:
+
+    sweep   = scale * max(min_sweep_s, k * span / (RBW * min(RBW, VBW)))
+    cycle   = sweep + overhead_s + (4 * points + 12) / bytes_per_s
+
+and a segmented scan costs one cycle plus one retune per segment.
+SweepPlanner searches the RBW steps for the finest resolution that meets a
+refresh rate, or the fastest setup that meets a resolution, choosing
+between one sweep over the band and a SegmentedSweep. calibrate() fits the
+model to the connected instrument and link from measured sweeps.
+
+    from Rigol_planner import SweepPlanner
+
+    planner = SweepPlanner(sa)
+    planner.calibrate()
+    plan = planner.plan_for_rate(88e6, 108e6, rate_hz=5)
+    scan = planner.apply(plan)      # SegmentedSweep when plan.segments > 1
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from .Rigol_segmented import SegmentedSweep, segment_count
+except ImportError:
+    from Rigol_segmented import SegmentedSweep, segment_count
+
+
+# RBW settings of the DSA815 (1-3-10 sequence)
+RBW_STEPS = (10, 30, 100, 300, 1e3, 3e3, 10e3, 30e3, 100e3, 300e3, 1e6)
+
+SweepPlan = namedtuple('SweepPlan', 'f_start f_stop rbw vbw sweep_time points segments resolution cycle_s rate_hz')
+SweepPlan.__doc__ = """\
+Settings chosen by SweepPlanner and their predicted cost.
+
+Attributes:
+    f_start, f_stop (float): Band in Hz.
+    rbw, vbw (float): Bandwidths in Hz.
+    sweep_time (float): Sweep time per sweep (per segment) in seconds.
+    points (int): Sweep points per sweep.
+    segments (int): 1 for a single sweep over the band, else the number of
+        SegmentedSweep segments.
+    resolution (float): Effective resolution in Hz: the larger of RBW and
+        the spacing between sweep points.
+    cycle_s (float): Predicted time for one full update of the band.
+    rate_hz (float): Predicted updates per second (1 / cycle_s).
+"""
+
+
+class SweepModel(object):
+    """
+    Timing model of one sweep plus its trace transfer.
+
+    Args:
+        k (float): Sweep-time coupling factor, sweep = k * span / (RBW * min(RBW, VBW)).
+        min_sweep_s (float): Shortest auto-coupled sweep time.
+        scale (float): Measured sweep duration per unit of reported sweep time.
+        overhead_s (float): Fixed cost per sweep: trigger, completion wait
+            and the fetch round trip.
+        bytes_per_s (float): Trace transfer throughput.
+        retune_s (float): Cost of the center-frequency write between segments.
+    """
+
+    def __init__(self, k=2.5, min_sweep_s=10e-3, scale=1.0, overhead_s=5e-3,
+                 bytes_per_s=1e6, retune_s=1e-3):
+        self.k = k
+        self.min_sweep_s = min_sweep_s
+        self.scale = scale
+        self.overhead_s = overhead_s
+        self.bytes_per_s = bytes_per_s
+        self.retune_s = retune_s
+
+    def __repr__(self):
+        return (f"SweepModel(k={self.k:.3g}, min_sweep_s={self.min_sweep_s:.3g}, scale={self.scale:.3g}, "
+                f"overhead_s={self.overhead_s:.3g}, bytes_per_s={self.bytes_per_s:.3g}, "
+                f"retune_s={self.retune_s:.3g})")
+
+    def sweep_time(self, span, rbw, vbw=None):
+        """Auto-coupled sweep time in seconds as the instrument would set it."""
+        vbw = rbw if vbw is None else vbw
+        return min(max(self.k * span / (rbw * min(rbw, vbw)), self.min_sweep_s), 3200.0)
+
+    def cycle_time(self, span, rbw, vbw=None, points=601, segments=1):
+        """Predicted seconds for ``segments`` sweeps of ``span`` each, fetched in REAL,32."""
+        per_sweep = (self.scale * self.sweep_time(span, rbw, vbw) + self.overhead_s
+                     + (4 * points + 12) / self.bytes_per_s)
+        return segments * per_sweep + (segments - 1) * self.retune_s
+
+
+class SweepPlanner(object):
+    """
+    Pick RBW, VBW, sweep time and single vs. segmented sweeping for a band.
+
+    Args:
+        sa (DSA815 | None): Connected analyzer; needed for calibrate() and
+            apply(), and to read the point count.
+        model (SweepModel | None): Timing model; defaults to nominal values.
+        points (int | None): Sweep points; read from ``sa`` if None.
+        vbw_ratio (float): VBW as a multiple of RBW.
+        points_per_rbw (float): Point density of segmented scans.
+        max_segments (int): Largest segmented scan to consider.
+    """
+
+    def __init__(self, sa=None, model=None, points=None, vbw_ratio=1.0, points_per_rbw=2.0,
+                 max_segments=1000):
+        self.sa = sa
+        self.model = SweepModel() if model is None else model
+        if points is None:
+            points = sa.get_sweep_points() if sa is not None else 601
+        self.points = points
+        self.vbw_ratio = vbw_ratio
+        self.points_per_rbw = points_per_rbw
+        self.max_segments = max_segments
+
+    # ─── Planning ────────────────────────────────────────────────────────────
+
+    def candidates(self, f_start, f_stop):
+        """
+        Return every plan worth considering for a band: for each RBW step,
+        a single sweep over the band and, when one sweep cannot resolve it,
+        a segmented scan.
+        """
+        if not f_stop > f_start:
+            raise ValueError("f_stop must be above f_start")
+        band = f_stop - f_start
+        spacing = band / (self.points - 1)
+        plans = []
+        for rbw in RBW_STEPS:
+            vbw = max(1.0, min(rbw * self.vbw_ratio, 3e6))
+            options = [(1, band, max(rbw, spacing))]
+            segments = segment_count(band, rbw, self.points, self.points_per_rbw)
+            if 1 < segments <= self.max_segments:
+                options.append((segments, (self.points - 1) * rbw / self.points_per_rbw, rbw))
+            for segments, span, resolution in options:
+                cycle = float(self.model.cycle_time(span, rbw, vbw, self.points, segments))
+                plans.append(SweepPlan(f_start, f_stop, float(rbw), float(vbw),
+                                       self.model.sweep_time(span, rbw, vbw), self.points,
+                                       segments, resolution, cycle, 1.0 / cycle))
+        return plans
+
+    def plan_for_rate(self, f_start, f_stop, rate_hz):
+        """
+        Finest resolution that still updates the band ``rate_hz`` times per
+        second (ties go to the faster plan).
+
+        Raises:
+            ValueError: No setting is fast enough.
+        """
+        plans = [p for p in self.candidates(f_start, f_stop) if p.rate_hz >= rate_hz]
+        if not plans:
+            raise ValueError(f"No setting reaches {rate_hz} updates/s over this band")
+        return min(plans, key=lambda p: (p.resolution, p.cycle_s))
+
+    def plan_for_resolution(self, f_start, f_stop, resolution_hz):
+        """
+        Fastest plan whose effective resolution is ``resolution_hz`` or finer.
+
+        Raises:
+            ValueError: Finer than the narrowest RBW, or too many segments.
+        """
+        plans = [p for p in self.candidates(f_start, f_stop) if p.resolution <= resolution_hz]
+        if not plans:
+            raise ValueError(f"No setting resolves {resolution_hz} Hz over this band")
+        return min(plans, key=lambda p: p.cycle_s)
+
+    # ─── Instrument ──────────────────────────────────────────────────────────
+
+    def apply(self, plan):
+        """
+        Put a plan into effect.
+
+        A single-sweep plan is applied with one configure() transaction and
+        None is returned. A segmented plan returns a SegmentedSweep set up
+        with the plan's RBW, VBW and sweep time; its run() configures the
+        instrument as it goes.
+        """
+        if plan.segments > 1:
+            return SegmentedSweep(self.sa, plan.f_start, plan.f_stop, plan.rbw, vbw=plan.vbw,
+                                  sweep_time=plan.sweep_time, points_per_rbw=self.points_per_rbw)
+        self.sa.configure(freq_limits=(plan.f_start, plan.f_stop), RBW=plan.rbw, VBW=plan.vbw,
+                          sweep_time=plan.sweep_time)
+        return None
+
+    def calibrate(self, setups=({},), sweeps=3):
+        """
+        Fit the model to the connected instrument from measured sweeps.
+
+        Each setup is a configure() keyword dict, applied in turn; the
+        instrument is left at the last one. Setups without ``sweep_time``
+        also fit the coupling factor k from the sweep time the instrument
+        reports. With two or more different sweep times the sweep-duration
+        scale is fitted as well, otherwise it is kept.
+
+        Args:
+            setups (sequence[dict]): Settings to measure; the current ones by default.
+            sweeps (int): Sweeps timed per setup.
+
+        Returns:
+            SweepModel: The updated model.
+        """
+        sa = self.sa
+        round_trip = _median_time(sa.identify, sweeps)
+        sweep_times, waits, fetches, ks = [], [], [], []
+        for setup in setups:
+            if setup:
+                sa.configure(**setup)
+            start, stop = sa.get_freq_limits()
+            rbw, vbw, sweep_time = sa.get_RBW(), sa.get_VBW(), sa.get_sweep_time()
+            if 'sweep_time' not in setup and sweep_time > self.model.min_sweep_s * 1.01:
+                ks.append(sweep_time * rbw * min(rbw, vbw) / (stop - start))
+            sa.get_trace_data()                 # settle the transfer format
+            for _ in range(sweeps):
+                t0 = time.perf_counter()
+                sa.initiate_measurement()
+                t1 = time.perf_counter()
+                sa.get_trace_data()
+                t2 = time.perf_counter()
+                sweep_times.append(sweep_time)
+                waits.append(t1 - t0)
+                fetches.append(t2 - t1)
+        self.points = sa.get_sweep_points()
+
+        model = self.model
+        if ks:
+            model.k = float(np.median(ks))
+        sweep_times, waits = np.array(sweep_times), np.array(waits)
+        if np.ptp(sweep_times) > 0.1 * sweep_times.max():
+            model.scale, wait_overhead = np.polyfit(sweep_times, waits, 1)
+            model.scale = max(float(model.scale), 0.0)
+        else:
+            wait_overhead = np.median(waits - model.scale * sweep_times)
+        transfer = np.median(fetches) - round_trip
+        if transfer > 0:
+            model.bytes_per_s = float((4 * self.points + 12) / transfer)
+        model.overhead_s = max(float(wait_overhead), 0.0) + round_trip
+        model.retune_s = round_trip / 2
+        return model
+
+
+def _median_time(fn, repeats):
+    times = []
+    for _ in range(max(repeats, 1)):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
@@ -0,0 +1,256 @@
+"""
+Rigol DSA815 - drive several analyzers side by side.
+
+InstrumentPool owns one DSA815 session per instrument and runs their VISA
+I/O on a thread pool with one worker per instrument, so configuration,
+triggering and trace transfer overlap instead of waiting on each analyzer in
+turn.
+
+    from Rigol_pool import InstrumentPool
+
+    pool = InstrumentPool.connect(serials=["DSA8A134700016", "DSA8A134700021"])
+    pool.configure(center_frequency=100e6, span=10e6, RBW=10e3)
+    result = pool.sweep()       # PoolSweep(freq, amp, trigger_times, read_times, serials)
+    pool.close()
+"""
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pyvisa
+
+try:
+    from .Rigol_DSA815 import (DISCOVERY_CACHE_PATH, DSA815, _read_discovery_cache,
+                               _write_discovery_cache)
+except ImportError:
+    from Rigol_DSA815 import (DISCOVERY_CACHE_PATH, DSA815, _read_discovery_cache,
+                              _write_discovery_cache)
+
+
+# How long sweep() workers wait for each other before triggering
+BARRIER_TIMEOUT_S = 30.0
+
+PoolSweep = namedtuple('PoolSweep', 'freq amp trigger_times read_times serials')
+PoolSweep.__doc__ = """\
+One sweep from every instrument in a pool, row i belonging to instrument i.
+
+Attributes:
+    freq (np.ndarray): (instruments, points) frequency axes in Hz.
+    amp (np.ndarray): (instruments, points) float32 amplitudes in dBm.
+    trigger_times (np.ndarray): time.time() at which each sweep was triggered.
+    read_times (np.ndarray): time.time() at which each trace was read.
+    serials (list[str]): Serial number of each instrument.
+"""
+
+
+def _discover(rm, serials, probe_timeout_ms):
+    """
+    Probe every listed resource once, concurrently, and return
+    {serial: resource name} for the wanted serials. Probe sessions are
+    closed again; the search stops as soon as every serial is found.
+    """
+    wanted = set(serials)
+    devices = rm.list_resources()
+    print("[Rigol] Detected VISA devices:", devices)
+    candidates = [d for d in devices if not d.startswith("ASRL")]
+    prober = DSA815()
+    prober.rm = rm
+
+    def probe(dev):
+        found = prober._probe(dev, None, probe_timeout_ms)
+        if found is None:
+            return None
+        dev, inst, idn = found
+        inst.close()
+        fields = idn.split(",")
+        return (fields[2].strip(), dev) if len(fields) > 2 else None
+
+    resources = {}
+    if not candidates:
+        return resources
+    executor = ThreadPoolExecutor(max_workers=min(len(candidates), 16))
+    for future in as_completed([executor.submit(probe, dev) for dev in candidates]):
+        result = future.result()
+        if result is not None and result[0] in wanted:
+            resources.setdefault(*result)
+            if len(resources) == len(wanted):
+                break
+    # Probes of unreachable resources finish in the background
+    executor.shutdown(wait=False)
+    return resources
+
+
+class InstrumentPool(object):
+    """
+    A set of DSA815 sessions operated in parallel.
+
+    Each instrument is only ever used by one worker at a time, so the
+    individual DSA815 objects need no locking; do not use them directly
+    while a pool call is in progress.
+
+    Args:
+        analyzers (list[DSA815]): Connected drivers.
+    """
+
+    def __init__(self, analyzers):
+        if not analyzers:
+            raise ValueError("InstrumentPool needs at least one analyzer")
+        self.analyzers = list(analyzers)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.analyzers),
+                                            thread_name_prefix="DSA815-pool")
+        self._out = None
+
+    @classmethod
+    def connect(cls, serials=None, resource_names=None, rm=None, cache_path=DISCOVERY_CACHE_PATH, **kwargs):
+        """
+        Connect to several instruments concurrently and return a pool.
+
+        Serial numbers are resolved to resources once for the whole pool:
+        from the discovery cache if it knows them all, otherwise by probing
+        every listed resource once. The sessions are then opened in
+        parallel by resource name, and the discovery cache is updated once
+        after all of them have connected.
+
+        Args:
+            serials (list[str] | None): Serial numbers to connect to.
+            resource_names (list[str] | None): VISA resources to connect to
+                (used when ``serials`` is None).
+            rm: Resource manager shared by all sessions.
+            cache_path (str | None): Discovery cache, see DSA815.conn().
+            **kwargs: Forwarded to DSA815.conn().
+
+        Raises:
+            IOError: A serial number was not found.
+        """
+        if serials is None and resource_names is None:
+            raise ValueError("Give either serials or resource_names")
+        rm = rm if rm is not None else pyvisa.ResourceManager()
+        cache = _read_discovery_cache(cache_path)
+        if serials is None:
+            analyzers = cls._open(rm, resource_names, [None] * len(resource_names), kwargs)
+        else:
+            known = cache.get('serials', {})
+            analyzers = None
+            if all(known.get(serial) for serial in serials):
+                try:
+                    analyzers = cls._open(rm, [known[serial] for serial in serials], serials, kwargs)
+                except Exception:
+                    print("[Rigol] Cached resources out of date, searching")
+            if analyzers is None:
+                found = _discover(rm, serials, kwargs.get('probe_timeout_ms', 2000))
+                missing = [serial for serial in serials if serial not in found]
+                if missing:
+                    raise IOError(f"[Rigol] DSA815 not found: {', '.join(missing)}")
+                analyzers = cls._open(rm, [found[serial] for serial in serials], serials, kwargs)
+        cache['last'] = analyzers[0].resource_name
+        for sa in analyzers:
+            if sa.serial:
+                cache.setdefault('serials', {})[sa.serial] = sa.resource_name
+        _write_discovery_cache(cache_path, cache)
+        return cls(analyzers)
+
+    @staticmethod
+    def _open(rm, resource_names, serials, kwargs):
+        """Open one session per resource in parallel; on any failure close them all and raise."""
+        analyzers = [DSA815() for _ in resource_names]
+        with ThreadPoolExecutor(max_workers=len(analyzers)) as executor:
+            futures = [executor.submit(sa.conn, rm=rm, resource_name=name, serial=serial,
+                                       cache_path=None, **kwargs)
+                       for sa, name, serial in zip(analyzers, resource_names, serials)]
+            errors = [f.exception() for f in futures]
+        failed = [e for e in errors if e is not None]
+        if failed:
+            for sa in analyzers:        # close the sessions that did open
+                sa.dis()
+            raise failed[0]
+        return analyzers
+
+    def __len__(self):
+        return len(self.analyzers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def map(self, fn, *args, **kwargs):
+        """
+        Call fn(sa, *args, **kwargs) for every analyzer in parallel.
+
+        Returns:
+            list: Results in analyzer order. The first exception raised by
+                any worker is re-raised after all have finished; an aborted
+                barrier only if no worker raised anything else.
+        """
+        futures = [self._executor.submit(fn, sa, *args, **kwargs) for sa in self.analyzers]
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise next((e for e in errors if not isinstance(e, threading.BrokenBarrierError)), errors[0])
+        return [f.result() for f in futures]
+
+    def configure(self, **settings):
+        """
+        Apply the same settings to every analyzer in parallel, each as one
+        DSA815.configure() transaction, e.g.
+        ``configure(freq_limits=(90e6, 110e6), RBW=10e3, sweep_time=0.1)``.
+        """
+        self.map(DSA815.configure, **settings)
+
+    def sweep(self, trace_num=1, timeout=None):
+        """
+        Trigger one sweep on every analyzer near-simultaneously and gather
+        the traces into one aligned array.
+
+        The workers meet at a barrier before sending :INITiate, so trigger
+        skew is set by thread wake-up rather than by the I/O of the other
+        instruments. A worker that fails before the barrier aborts it, and
+        the barrier gives up after BARRIER_TIMEOUT_S, so no worker is left
+        waiting. The returned arrays are reused by the next call; copy
+        them to keep them.
+
+        Args:
+            trace_num (int): Trace index 1-3 to read.
+            timeout (float | None): Per-instrument sweep timeout, see
+                DSA815.wait_for_sweep().
+
+        Returns:
+            PoolSweep
+        """
+        points = self.map(DSA815.get_sweep_points)
+        if len(set(points)) != 1:
+            raise ValueError(f"Analyzers disagree on sweep points: {points}")
+        n = len(self.analyzers)
+        if self._out is None or self._out.amp.shape != (n, points[0]):
+            self._out = PoolSweep(
+                np.empty((n, points[0])), np.empty((n, points[0]), dtype=np.float32),
+                np.zeros(n), np.zeros(n), [sa.serial for sa in self.analyzers],
+            )
+        out = self._out
+        barrier = threading.Barrier(n, timeout=BARRIER_TIMEOUT_S)
+
+        def acquire(sa):
+            i = self.analyzers.index(sa)
+            try:
+                out.freq[i] = sa.get_frequency_axis()
+            except BaseException:
+                barrier.abort()         # release the workers already waiting
+                raise
+            barrier.wait()
+            sa.start_sweep()
+            out.trigger_times[i] = time.time()
+            sa.wait_for_sweep(timeout=timeout)
+            sa.get_trace_data(trace_num, out=out.amp[i])
+            out.read_times[i] = time.time()
+
+        self.map(acquire)
+        return out
+
+    def close(self):
+        """Disconnect every analyzer and stop the workers."""
+        try:
+            self.map(DSA815.dis)
+        finally:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,308 @@
+"""
+Rigol DSA815 - per-command SCPI instrumentation.
+
+enable_profiling() swaps the driver's VISA resource for a proxy that times
+every write/read/query, counts bytes and errors, and hands one
+CommandRecord per call to a list of sinks. disable_profiling() puts the
+original resource back, so an unprofiled driver pays nothing at all.
+
+Sinks are plain callables taking a CommandRecord. Provided are
+SummarySink (in-memory per-command latency histograms, on by default) and
+JSONLinesSink (one JSON object per call); any function works as a callback.
+
+    from Rigol_profiling import enable_profiling, disable_profiling, JSONLinesSink
+
+    prof = enable_profiling(sa, JSONLinesSink("scpi.jsonl"))
+    for _ in range(100):
+        sa.initiate_measurement()
+        with prof.phase("parse"):
+            freq, amp = sa.get_sweep_data()
+    print(prof.summary.format())
+    disable_profiling(sa)
+"""
+import bisect
+import contextlib
+import json
+import threading
+import time
+from collections import namedtuple
+
+
+CommandRecord = namedtuple(
+    'CommandRecord', 'timestamp method command elapsed_s bytes_written bytes_read error'
+)
+CommandRecord.__doc__ = """\
+One instrumented call.
+
+Attributes:
+    timestamp (float): time.time() at the start of the call.
+    method (str): 'write', 'read', 'query', 'query_binary_values', ... or
+        'phase' for a block timed with Profiler.phase().
+    command (str): Command headers without arguments, e.g.
+        ':TRACe:DATA?' or ':SENSe:FREQuency:CENTer;:SYSTem:ERRor?'.
+    elapsed_s (float): Wall-clock duration.
+    bytes_written (int): Bytes sent (message plus termination).
+    bytes_read (int): Bytes received (decoded payload size for binary blocks).
+    error (str | None): Exception class name if the call raised.
+"""
+
+# Latency histogram bin edges: 1 us to 100 s, ten bins per decade
+_BIN_EDGES = [10 ** (e / 10.0) for e in range(-60, 21)]
+
+
+def _command_key(message):
+    """Reduce a program message to its command headers, dropping arguments."""
+    return ";".join(part.strip().split(" ", 1)[0] for part in message.split(";") if part.strip())
+
+
+class CommandStats(object):
+    """Aggregated calls of one (method, command) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.histogram = [0] * (len(_BIN_EDGES) + 1)
+
+    def add(self, record):
+        self.calls += 1
+        self.errors += record.error is not None
+        self.total_s += record.elapsed_s
+        self.max_s = max(self.max_s, record.elapsed_s)
+        self.bytes_written += record.bytes_written
+        self.bytes_read += record.bytes_read
+        self.histogram[bisect.bisect_left(_BIN_EDGES, record.elapsed_s)] += 1
+
+    def percentile(self, q):
+        """
+        Latency percentile estimated from the histogram (upper bin edge).
+
+        Args:
+            q (float): Percentile in [0, 100].
+        """
+        if not self.calls:
+            return 0.0
+        target = q / 100.0 * self.calls
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target and count:
+                return min(_BIN_EDGES[i] if i < len(_BIN_EDGES) else self.max_s, self.max_s)
+        return self.max_s
+
+
+class SummarySink(object):
+    """In-memory per-command statistics; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def __call__(self, record):
+        with self._lock:
+            key = (record.method, record.command)
+            if key not in self.stats:
+                self.stats[key] = CommandStats()
+            self.stats[key].add(record)
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def rows(self):
+        """
+        Return one dict per (method, command), slowest total first.
+
+        Keys: method, command, calls, errors, total_s, mean_s, p50_s, p90_s,
+        p99_s, max_s, bytes_written, bytes_read.
+        """
+        with self._lock:
+            items = list(self.stats.items())
+        rows = []
+        for (method, command), s in items:
+            rows.append({
+                'method': method, 'command': command, 'calls': s.calls, 'errors': s.errors,
+                'total_s': s.total_s, 'mean_s': s.total_s / s.calls,
+                'p50_s': s.percentile(50), 'p90_s': s.percentile(90), 'p99_s': s.percentile(99),
+                'max_s': s.max_s, 'bytes_written': s.bytes_written, 'bytes_read': s.bytes_read,
+            })
+        rows.sort(key=lambda r: r['total_s'], reverse=True)
+        return rows
+
+    def format(self):
+        """Return the summary as a text table."""
+        lines = [f"{'method':<20} {'command':<40} {'calls':>6} {'err':>4} {'total s':>9} "
+                 f"{'mean ms':>8} {'p90 ms':>8} {'max ms':>8} {'bytes in':>10}"]
+        for r in self.rows():
+            lines.append(f"{r['method']:<20} {r['command'][:40]:<40} {r['calls']:>6} {r['errors']:>4} "
+                         f"{r['total_s']:>9.3f} {r['mean_s'] * 1e3:>8.2f} {r['p90_s'] * 1e3:>8.2f} "
+                         f"{r['max_s'] * 1e3:>8.2f} {r['bytes_read']:>10}")
+        return "\n".join(lines)
+
+
+class JSONLinesSink(object):
+    """
+    Append one JSON object per call to a file.
+
+    Args:
+        path (str): Output file, opened for appending.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a')
+
+    def __call__(self, record):
+        line = json.dumps(record._asdict())
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Profiler(object):
+    """
+    Dispatches CommandRecords to sinks.
+
+    Args:
+        sinks (iterable): Callables receiving each CommandRecord.
+        summary (bool): Add a SummarySink, available as ``self.summary``.
+    """
+
+    def __init__(self, sinks=(), summary=True):
+        self.summary = SummarySink() if summary else None
+        self.sinks = ([self.summary] if summary else []) + list(sinks)
+
+    def emit(self, record):
+        for sink in self.sinks:
+            sink(record)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a block of host code (e.g. parsing) as a 'phase' record."""
+        timestamp, t0 = time.time(), time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.emit(CommandRecord(timestamp, 'phase', name, time.perf_counter() - t0, 0, 0, error))
+
+    def close(self):
+        """Close every sink that has a close() method."""
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+
+class InstrumentedResource(object):
+    """
+    Stand-in for a pyvisa resource that reports every I/O call to a Profiler.
+    Everything else (timeout, clear(), close(), ...) is forwarded unchanged.
+
+    Bare read()/read_raw() calls are recorded under the command headers of
+    the last query sent with write(), so a ``write(":TRACe:DATA? TRACE1")``
+    followed by read_raw() shows up as ':TRACe:DATA?' for both.
+    """
+
+    def __init__(self, inst, profiler):
+        object.__setattr__(self, '_inst', inst)
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_last_query', "")
+        object.__setattr__(self, '_write_termination_len', len(getattr(inst, 'write_termination', "") or ""))
+
+    def __getattr__(self, name):
+        return getattr(self._inst, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._inst, name, value)
+
+    def _call(self, method, message, fn, args, kwargs, measure, command=None):
+        timestamp, t0 = time.time(), time.perf_counter()
+        error, result = None, None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            written = len(message) + self._write_termination_len if message is not None else 0
+            self._profiler.emit(CommandRecord(
+                timestamp, method, command if command is not None else _command_key(message),
+                elapsed, written, measure(result) if error is None else 0, error,
+            ))
+
+    def write(self, message, *args, **kwargs):
+        if "?" in message:
+            object.__setattr__(self, '_last_query', _command_key(message))
+        return self._call('write', message, self._inst.write, (message,) + args, kwargs, lambda r: 0)
+
+    def read(self, *args, **kwargs):
+        return self._call('read', None, self._inst.read, args, kwargs, len, self._last_query)
+
+    def read_raw(self, *args, **kwargs):
+        return self._call('read_raw', None, self._inst.read_raw, args, kwargs, len, self._last_query)
+
+    def query(self, message, *args, **kwargs):
+        return self._call('query', message, self._inst.query, (message,) + args, kwargs, len)
+
+    def query_binary_values(self, message, *args, **kwargs):
+        return self._call('query_binary_values', message, self._inst.query_binary_values,
+                          (message,) + args, kwargs, _payload_size)
+
+    def query_ascii_values(self, message, *args, **kwargs):
+        return self._call('query_ascii_values', message, self._inst.query_ascii_values,
+                          (message,) + args, kwargs, _payload_size)
+
+
+def _payload_size(values):
+    nbytes = getattr(values, 'nbytes', None)
+    return int(nbytes) if nbytes is not None else 4 * len(values)
+
+
+def enable_profiling(sa, *sinks, summary=True):
+    """
+    Start instrumenting a connected DSA815.
+
+    Call after conn(); reconnecting installs a fresh, unprofiled resource.
+    If profiling is already on, the existing Profiler is returned and any
+    extra sinks are added to it.
+
+    Args:
+        sa (DSA815): Connected driver.
+        *sinks: Extra sinks (callables taking a CommandRecord).
+        summary (bool): Keep an in-memory SummarySink as ``profiler.summary``.
+
+    Returns:
+        Profiler
+    """
+    if sa.inst is None:
+        raise IOError("[Rigol] Connect before enabling profiling")
+    if isinstance(sa.inst, InstrumentedResource):
+        profiler = sa.inst._profiler
+        profiler.sinks.extend(sinks)
+        return profiler
+    profiler = Profiler(sinks, summary=summary)
+    sa.inst = InstrumentedResource(sa.inst, profiler)
+    return profiler
+
+
+def disable_profiling(sa):
+    """
+    Restore the original VISA resource and return the Profiler that was
+    installed (None if profiling was off). Sinks are left open.
+    """
+    if not isinstance(sa.inst, InstrumentedResource):
+        return None
+    profiler = sa.inst._profiler
+    sa.inst = sa.inst._inst
+    return profiler
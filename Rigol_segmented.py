@@ -0,0 +1,171 @@
+"""
+Rigol DSA815 - segmented wide-span sweeps stitched into one trace.
+
+The DSA815 returns a fixed number of points per sweep (601), so a wide span
+at narrow RBW leaves most of the band between points. SegmentedSweep splits
+the band into spans the instrument can resolve, sweeps them back to back and
+writes every segment into one preallocated frequency/amplitude array.
+
+    from Rigol_segmented import SegmentedSweep
+
+    scan = SegmentedSweep(sa, 9e3, 1.5e9, rbw=100e3).run()
+    print(len(scan.freq), scan.elapsed_s, scan.points_per_s)
+"""
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+SegmentedScan = namedtuple('SegmentedScan', 'freq amp segments elapsed_s points_per_s')
+SegmentedScan.__doc__ = """\
+Result of SegmentedSweep.run().
+
+Attributes:
+    freq (np.ndarray): Stitched frequency axis in Hz.
+    amp (np.ndarray): Stitched amplitudes in dBm (float32).
+    segments (int): Number of sweeps taken.
+    elapsed_s (float): Wall-clock time for the whole scan.
+    points_per_s (float): Output points per second of scan time.
+"""
+
+
+def segment_count(band, rbw, points, points_per_rbw=2.0, overlap_points=4):
+    """
+    Number of sweeps SegmentedSweep needs for a band, without an instrument
+    (ignores the pull-back at the top of the frequency range).
+    """
+    step = rbw / points_per_rbw
+    if band <= (points - 1) * step:
+        return 1
+    n_out = int(math.floor(band / step + 1e-9)) + 1
+    return int(math.ceil((n_out - points) / (points - 1 - overlap_points))) + 1
+
+
+class SegmentedSweep(object):
+    """
+    Plan and run a stitched sweep over [f_start, f_stop].
+
+    Segments share one frequency grid with spacing rbw / points_per_rbw, so
+    overlapping points coincide exactly. Inside an overlap each output point
+    is taken from the segment it lies further from the edge of.
+
+    Args:
+        sa (DSA815): Connected driver.
+        f_start (float): Start of the band in Hz.
+        f_stop (float): Stop of the band in Hz.
+        rbw (float): Resolution bandwidth in Hz for every segment.
+        vbw (float | None): Video bandwidth in Hz; None leaves it coupled.
+        sweep_time (float | None): Sweep time per segment in seconds; None
+            leaves it auto-coupled.
+        points_per_rbw (float): Frequency points per RBW (>= 1).
+        overlap_points (int): Points shared by neighbouring segments.
+        f_max (float): Highest frequency the instrument can tune to.
+    """
+
+    def __init__(
+        self,
+        sa,
+        f_start,
+        f_stop,
+        rbw,
+        vbw=None,
+        sweep_time=None,
+        points_per_rbw=2.0,
+        overlap_points=4,
+        f_max=1.5e9,
+    ):
+        if not (0 <= f_start < f_stop <= f_max):
+            raise ValueError("Band must satisfy 0 <= f_start < f_stop <= f_max")
+        if points_per_rbw < 1:
+            raise ValueError("points_per_rbw must be at least 1")
+        self.sa = sa
+        self.f_start = f_start
+        self.f_stop = f_stop
+        self.rbw = rbw
+        self.vbw = vbw
+        self.sweep_time = sweep_time
+        self.f_max = f_max
+
+        self.points = sa.get_sweep_points()
+        if overlap_points < 0 or overlap_points >= self.points - 1:
+            raise ValueError("overlap_points must be between 0 and points - 2")
+        self._plan(points_per_rbw, overlap_points)
+
+    def _plan(self, points_per_rbw, overlap_points):
+        P = self.points
+        step = self.rbw / points_per_rbw
+        band = self.f_stop - self.f_start
+        if band <= (P - 1) * step:
+            # One sweep already resolves the band at the requested density
+            step = band / (P - 1)
+            self.df = step
+            self.segment_span = band
+            self.n_out = P
+            offsets = [0]
+        else:
+            self.df = step
+            self.segment_span = (P - 1) * step
+            self.n_out = int(math.floor(band / step + 1e-9)) + 1
+            advance = P - 1 - overlap_points
+            n_seg = int(math.ceil((self.n_out - P) / advance)) + 1
+            # Segments that would run past the top of the instrument's range
+            # are pulled back by whole bins so the grid stays shared
+            last_allowed = int(math.floor((self.f_max - self.f_start - self.segment_span) / step + 1e-9))
+            offsets = [min(k * advance, last_allowed) for k in range(n_seg)]
+
+        self.freq = self.f_start + np.arange(self.n_out) * self.df
+        self.centers = [self.f_start + (o + (P - 1) / 2) * self.df for o in offsets]
+
+        # (output slice, source offset) per segment, splitting overlaps at the midpoint
+        self._slices = []
+        for k, offset in enumerate(offsets):
+            lo = offset if k == 0 else (offsets[k - 1] + P - 1 + offset + 1) // 2
+            hi = self.n_out if k == len(offsets) - 1 else (offset + P - 1 + offsets[k + 1] + 1) // 2
+            hi = min(hi, self.n_out, offset + P)
+            self._slices.append((lo, hi, lo - offset))
+
+    @property
+    def segments(self):
+        """Number of sweeps per scan."""
+        return len(self.centers)
+
+    def run(self, out=None):
+        """
+        Sweep every segment and return the stitched result.
+
+        Only the centre frequency is rewritten between segments; span, RBW,
+        VBW and sweep time are set once at the start.
+
+        Args:
+            out (np.ndarray | None): float32 array of length len(self.freq)
+                to fill; allocated when None.
+
+        Returns:
+            SegmentedScan
+        """
+        if out is None:
+            out = np.empty(self.n_out, dtype=np.float32)
+        elif out.shape != (self.n_out,):
+            raise ValueError(f"out must have shape ({self.n_out},)")
+
+        sa = self.sa
+        t0 = time.perf_counter()
+        half = self.segment_span / 2
+        sa.set_freq_limits(self.centers[0] - half, self.centers[0] + half)
+        sa.set_RBW(self.rbw)
+        if self.vbw is not None:
+            sa.set_VBW(self.vbw)
+        if self.sweep_time is not None:
+            sa.set_sweep_time(self.sweep_time)
+
+        for k, (center, (lo, hi, src)) in enumerate(zip(self.centers, self._slices)):
+            if k > 0:
+                sa.set_center_frequency(center)
+            sa.initiate_measurement()
+            trace = sa.get_trace_data()
+            out[lo:hi] = trace[src:src + hi - lo]
+
+        elapsed = time.perf_counter() - t0
+        return SegmentedScan(self.freq, out, self.segments, elapsed, self.n_out / elapsed)
@@ -0,0 +1,246 @@
+"""
+Rigol DSA815 - scalar network analysis with the tracking generator.
+
+ScalarNetworkAnalyzer measures |S21| of a device between the TG output and
+the RF input. A through calibration is captured once per sweep setup and
+stored under a CalKey (start, stop, points, RBW, TG level); measurements
+are then normalized with float32 vector math against the matching
+reference. A calibration taken at one TG level also serves other levels of
+the same setup, shifted by the level difference, so compression tests step
+only the TG amplitude between sweeps.
+
+    from Rigol_sna import ScalarNetworkAnalyzer
+
+    sna = ScalarNetworkAnalyzer(sa)
+    sna.setup(50e6, 150e6, rbw=30e3, tg_amp=-20)
+    input("Connect the through, then press Enter")
+    sna.calibrate(averages=4)
+    input("Insert the DUT, then press Enter")
+    freq, s21 = sna.measure()
+    sna.save("through.npz")
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+CalKey = namedtuple('CalKey', 'start stop points rbw tg_amp')
+CalKey.__doc__ = """\
+Sweep setup a through calibration is valid for: start/stop frequency (Hz),
+sweep points, RBW (Hz) and TG output level (dBm).
+"""
+
+CompressionResult = namedtuple('CompressionResult', 'freq levels gain compression_dB p1dB_in')
+CompressionResult.__doc__ = """\
+Outcome of ScalarNetworkAnalyzer.compression_test().
+
+Attributes:
+    freq (np.ndarray): Frequency axis in Hz.
+    levels (np.ndarray): TG levels stepped through, ascending (dBm).
+    gain (np.ndarray): (levels x points) float32 gain in dB.
+    compression_dB (np.ndarray): Gain drop relative to the lowest level,
+        same shape as gain.
+    p1dB_in (np.ndarray): Per frequency, the TG level at which the gain has
+        dropped by 1 dB (interpolated); NaN where that never happens.
+"""
+
+
+class ScalarNetworkAnalyzer(object):
+    """
+    |S21| measurements normalized against stored through calibrations.
+
+    Args:
+        sa (DSA815): Connected analyzer with a tracking generator.
+
+    Attributes:
+        calibrations (dict[CalKey, np.ndarray]): float32 through references in dBm.
+    """
+
+    def __init__(self, sa):
+        self.sa = sa
+        self.calibrations = {}
+        self._raw = None
+        self._acc = None
+
+    # ─── Setup ───────────────────────────────────────────────────────────────
+
+    def setup(self, start, stop, rbw=None, tg_amp=None, sweep_time=None):
+        """
+        Configure the sweep and switch the tracking generator on, in one
+        transaction. Settings left as None keep their current value.
+        """
+        settings = {'freq_limits': (start, stop)}
+        for name, value in (('RBW', rbw), ('TG_amp', tg_amp), ('sweep_time', sweep_time)):
+            if value is not None:
+                settings[name] = value
+        with self.sa.transaction():
+            self.sa.configure(**settings)
+            self.sa.TG_enable(True)
+
+    def key(self):
+        """Return the CalKey of the current setup (from the settings cache)."""
+        start, stop = self.sa.get_freq_limits()
+        return CalKey(float(start), float(stop), int(self.sa.get_sweep_points()),
+                      float(self.sa.get_RBW()), float(self.sa.get_TG_amp()))
+
+    def _sweep(self, averages):
+        """Acquire ``averages`` sweeps and return their mean in a reused buffer."""
+        points = self.sa.get_sweep_points()
+        if self._raw is None or len(self._raw) != points:
+            self._raw = np.empty(points, dtype=np.float32)
+            self._acc = np.empty(points, dtype=np.float32)
+        if averages < 1:
+            raise ValueError("averages must be at least 1")
+        self.sa.initiate_measurement()
+        self.sa.get_trace_data(out=self._acc)
+        for _ in range(averages - 1):
+            self.sa.initiate_measurement()
+            self.sa.get_trace_data(out=self._raw)
+            self._acc += self._raw
+        if averages > 1:
+            self._acc /= averages
+        return self._acc
+
+    # ─── Calibration ─────────────────────────────────────────────────────────
+
+    def calibrate(self, averages=1):
+        """
+        Capture a through calibration for the current setup.
+
+        Args:
+            averages (int): Sweeps averaged (in dB) into the reference.
+
+        Returns:
+            CalKey: Key the reference was stored under.
+        """
+        key = self.key()
+        self.calibrations[key] = self._sweep(averages).copy()
+        return key
+
+    def reference(self, key=None):
+        """
+        Return (reference, offset_dB) for a setup; normalized values are
+        ``amp - reference - offset_dB``.
+
+        An exact calibration is used when present. Otherwise a calibration
+        of the same start/stop/points/RBW at another TG level is used, with
+        the level difference as offset (the through path is linear).
+
+        Raises:
+            ValueError: No usable calibration.
+        """
+        key = self.key() if key is None else key
+        ref = self.calibrations.get(key)
+        if ref is not None:
+            return ref, 0.0
+        for cal_key, ref in self.calibrations.items():
+            if cal_key[:4] == key[:4]:
+                return ref, key.tg_amp - cal_key.tg_amp
+        raise ValueError(f"No through calibration for {key}")
+
+    def clear(self):
+        """Drop every stored calibration."""
+        self.calibrations.clear()
+
+    def save(self, path):
+        """Write all calibrations to an .npz file."""
+        keys = list(self.calibrations)
+        arrays = {f"ref{i}": self.calibrations[k] for i, k in enumerate(keys)}
+        np.savez_compressed(path, keys=np.array(keys, dtype=np.float64).reshape(-1, len(CalKey._fields)),
+                            saved=np.float64(time.time()), **arrays)
+
+    def load(self, path):
+        """
+        Add the calibrations of an .npz file written by save(); entries
+        with the same key are replaced.
+
+        Returns:
+            list[CalKey]: Keys loaded.
+        """
+        loaded = []
+        with np.load(path) as data:
+            for i, row in enumerate(data['keys']):
+                key = CalKey(float(row[0]), float(row[1]), int(row[2]), float(row[3]), float(row[4]))
+                ref = data[f"ref{i}"].astype(np.float32)
+                if len(ref) != key.points:
+                    raise ValueError(f"Calibration {i} in {path} has {len(ref)} points, key says {key.points}")
+                self.calibrations[key] = ref
+                loaded.append(key)
+        return loaded
+
+    # ─── Measurement ─────────────────────────────────────────────────────────
+
+    def normalize(self, amps, key=None, out=None):
+        """
+        Normalize raw amplitudes against a stored calibration.
+
+        Args:
+            amps (np.ndarray): One sweep or a (sweeps x points) stack in dBm.
+            key (CalKey | None): Setup the sweeps were taken with; the
+                current setup if None.
+            out (np.ndarray | None): float32 destination of the same shape.
+
+        Returns:
+            np.ndarray: |S21| in dB (float32).
+        """
+        ref, offset = self.reference(key)
+        if np.shape(amps)[-1] != len(ref):
+            raise ValueError(f"Sweeps have {np.shape(amps)[-1]} points, calibration has {len(ref)}")
+        out = np.subtract(amps, ref, out=out, dtype=np.float32)
+        if offset:
+            out -= np.float32(offset)
+        return out
+
+    def measure(self, averages=1, out=None):
+        """
+        Sweep the DUT and return its normalized response.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Frequency axis (Hz) and |S21| in
+                dB (float32, ``out`` if given).
+        """
+        raw = self._sweep(averages)
+        return self.sa.get_frequency_axis(), self.normalize(raw, out=out)
+
+    def compression_test(self, levels, averages=1):
+        """
+        Step the TG level and measure the gain at every level.
+
+        Only the TG amplitude is written between sweeps; the previous level
+        is restored afterwards. One through calibration of this setup at
+        any level is enough.
+
+        Args:
+            levels (sequence[float]): TG levels in dBm, within [-40, 0].
+            averages (int): Sweeps averaged per level.
+
+        Returns:
+            CompressionResult
+        """
+        levels = np.sort(np.asarray(levels, dtype=np.float64))
+        if len(levels) < 2:
+            raise ValueError("A compression test needs at least two levels")
+        self.reference(self.key()._replace(tg_amp=float(levels[0])))    # fail before sweeping
+        previous = self.sa.get_TG_amp()
+        gain = np.empty((len(levels), self.sa.get_sweep_points()), dtype=np.float32)
+        try:
+            for row, level in zip(gain, levels):
+                self.sa.set_TG_amp(float(level))
+                self.normalize(self._sweep(averages), out=row)
+        finally:
+            self.sa.set_TG_amp(previous)
+
+        compression = gain[0] - gain
+        # first level whose gain is 1 dB down, interpolated from the level below it
+        over = compression >= 1.0
+        hit = over.any(axis=0)
+        idx = np.argmax(over, axis=0)
+        below = np.maximum(idx - 1, 0)
+        cols = np.arange(gain.shape[1])
+        c0, c1 = compression[below, cols], compression[idx, cols]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.where(c1 > c0, (1.0 - c0) / (c1 - c0), 0.0)
+        p1dB = levels[below] + np.clip(frac, 0.0, 1.0) * (levels[idx] - levels[below])
+        p1dB[~hit] = np.nan
+        return CompressionResult(self.sa.get_frequency_axis(), levels, gain, compression, p1dB)
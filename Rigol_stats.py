@@ -0,0 +1,209 @@
+"""
+Rigol DSA815 - host-side running statistics over many sweeps.
+
+TraceStatistics keeps, per frequency point, the running mean in dB and in
+linear power, the Welford variance of the dB values, min/max hold and an
+exponential average. Memory is O(points) however many sweeps are added,
+and every update works in place on preallocated arrays. update_batch()
+folds a whole (sweeps, points) stack in at once (Chan et al. parallel
+combination), giving the same result as adding the rows one by one.
+
+    from Rigol_stats import TraceStatistics
+
+    stats = TraceStatistics(alpha=0.2)
+    for _ in range(100):
+        freq, amp = sa.get_sweep_data()
+        stats.update(amp, freq)
+    print(stats.count, stats.mean_dB.max(), stats.std_dB.max())
+"""
+import numpy as np
+
+
+_DB_TO_LN = np.log(10.0) / 10.0
+
+
+class TraceStatistics(object):
+    """
+    Per-point running statistics of amplitude traces in dBm.
+
+    Args:
+        points (int | None): Points per sweep; taken from the first sweep if None.
+        dtype: Accumulator dtype, np.float32 or np.float64.
+        alpha (float): Weight of the newest sweep in the exponential average,
+            in (0, 1].
+        ema_power (bool): Run the exponential average on linear power (like
+            the instrument's POWeravg) instead of on dB values (VIDeoavg).
+
+    Attributes:
+        count (int): Sweeps accumulated.
+        freq (np.ndarray | None): Frequency axis of the first sweep, if given.
+        mean_dB (np.ndarray): Mean of the dB values.
+        mean_power (np.ndarray): Mean linear power in mW.
+        min_hold, max_hold (np.ndarray): Per-point extremes in dBm.
+        ema_dB (np.ndarray): Exponential average in dBm.
+    """
+
+    def __init__(self, points=None, dtype=np.float64, alpha=0.1, ema_power=False):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise TypeError("dtype must be float32 or float64")
+        self.alpha = alpha
+        self.ema_power = ema_power
+        self.points = None
+        self.freq = None
+        self.count = 0
+        if points is not None:
+            self._allocate(points)
+
+    def _allocate(self, points):
+        self.points = points
+        empty = lambda: np.empty(points, dtype=self.dtype)
+        self.mean_dB = empty()
+        self._m2 = empty()
+        self.mean_power = empty()
+        self.min_hold = empty()
+        self.max_hold = empty()
+        self._ema = empty()
+        self._x = empty()
+        self._delta = empty()
+        self._lin = empty()
+        self.reset()
+
+    def reset(self):
+        """Forget every sweep (buffers are kept)."""
+        self.count = 0
+        self.freq = None
+        if self.points is not None:
+            self.mean_dB.fill(0)
+            self._m2.fill(0)
+            self.mean_power.fill(0)
+            self.min_hold.fill(np.inf)
+            self.max_hold.fill(-np.inf)
+
+    def _check(self, points, freq):
+        if self.points is None:
+            self._allocate(points)
+        elif points != self.points:
+            raise ValueError(f"Expected {self.points} points, got {points}")
+        if freq is not None:
+            if self.freq is None:
+                self.freq = np.array(freq, dtype=np.float64)
+            elif len(freq) != len(self.freq) or freq[0] != self.freq[0] or freq[-1] != self.freq[-1]:
+                raise ValueError("Frequency axis changed; call reset() first")
+
+    def _to_power(self, x, out):
+        np.multiply(x, _DB_TO_LN, out=out)
+        return np.exp(out, out=out)
+
+    def update(self, amp, freq=None):
+        """
+        Add one sweep, e.g. ``stats.update(amp, freq)`` with the arrays from
+        get_sweep_data().
+
+        Args:
+            amp (np.ndarray): Amplitudes in dBm.
+            freq (np.ndarray | None): Frequency axis; checked against the
+                first sweep's axis when given.
+        """
+        self._check(len(amp), freq)
+        x, delta, lin = self._x, self._delta, self._lin
+        np.copyto(x, amp, casting='same_kind')
+        self.count += 1
+        n = self.count
+
+        # Welford: mean += d / n; M2 += d * (x - new mean)
+        np.subtract(x, self.mean_dB, out=delta)
+        np.divide(delta, n, out=lin)
+        self.mean_dB += lin
+        np.subtract(x, self.mean_dB, out=lin)
+        lin *= delta
+        self._m2 += lin
+
+        self._to_power(x, lin)
+        np.subtract(lin, self.mean_power, out=delta)
+        delta /= n
+        self.mean_power += delta
+
+        np.minimum(self.min_hold, x, out=self.min_hold)
+        np.maximum(self.max_hold, x, out=self.max_hold)
+
+        src = lin if self.ema_power else x
+        if n == 1:
+            self._ema[:] = src
+        else:
+            np.subtract(src, self._ema, out=delta)
+            delta *= self.alpha
+            self._ema += delta
+
+    def update_batch(self, amps, freq=None):
+        """
+        Add a (sweeps, points) stack, e.g. loaded from a .dsatr file or a
+        waterfall recording. Equivalent to calling update() on each row.
+        """
+        amps = np.asarray(amps)
+        if amps.ndim != 2:
+            raise ValueError("amps must be a (sweeps, points) array")
+        k = len(amps)
+        if k == 0:
+            return
+        self._check(amps.shape[1], freq)
+        stack = amps.astype(self.dtype, copy=False)
+        na, n = self.count, self.count + k
+
+        # Chan et al.: combine (na, mean, M2) with the batch's (k, mean_b, M2_b)
+        mean_b = stack.mean(axis=0)
+        m2_b = np.square(stack - mean_b).sum(axis=0)
+        delta = mean_b - self.mean_dB
+        self.mean_dB += delta * (k / n)
+        self._m2 += m2_b + np.square(delta) * (na * k / n)
+
+        power = np.exp(stack * _DB_TO_LN)
+        self.mean_power += (power.mean(axis=0) - self.mean_power) * (k / n)
+
+        np.minimum(self.min_hold, stack.min(axis=0), out=self.min_hold)
+        np.maximum(self.max_hold, stack.max(axis=0), out=self.max_hold)
+
+        src = power if self.ema_power else stack
+        if na == 0:
+            self._ema[:] = src[0]
+            src = src[1:]
+        m = len(src)
+        if m:
+            # ema_m = (1 - a)^m ema_0 + sum_i a (1 - a)^(m - 1 - i) x_i
+            decay = 1.0 - self.alpha
+            weights = (self.alpha * decay ** np.arange(m - 1, -1, -1)).astype(self.dtype)
+            self._ema *= self.dtype.type(decay ** m)
+            self._ema += weights @ src
+        self.count = n
+
+    @property
+    def ema_dB(self):
+        """Exponential average in dBm."""
+        if self.count == 0:
+            return None
+        if self.ema_power:
+            return 10 * np.log10(self._ema)
+        return self._ema
+
+    @property
+    def mean_power_dBm(self):
+        """Mean linear power expressed in dBm (what power averaging reports)."""
+        return 10 * np.log10(self.mean_power)
+
+    def variance_dB(self, ddof=1):
+        """
+        Per-point variance of the dB values.
+
+        Args:
+            ddof (int): Delta degrees of freedom (1 for the sample variance).
+        """
+        if self.count <= ddof:
+            return np.full(self.points or 0, np.nan, dtype=self.dtype)
+        return self._m2 / (self.count - ddof)
+
+    @property
+    def std_dB(self):
+        """Per-point sample standard deviation of the dB values."""
+        return np.sqrt(self.variance_dB())
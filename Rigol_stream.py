@@ -0,0 +1,134 @@
+"""
+Rigol DSA815 - fixed-size ring buffer for streaming sweeps.
+
+SweepRing holds ``depth`` sweeps of ``points`` amplitudes in one
+preallocated array, so continuous acquisition runs without per-sweep
+allocation. It is the storage behind DSA815.iter_sweeps().
+"""
+import threading
+from collections import deque, namedtuple
+
+import numpy as np
+
+
+SweepFrame = namedtuple('SweepFrame', 'seq timestamp freq amp dropped')
+SweepFrame.__doc__ = """\
+One sweep yielded by DSA815.iter_sweeps().
+
+Attributes:
+    seq (int): Sequence number of the sweep, counting from 0.
+    timestamp (float): time.time() when the trace was read.
+    freq (np.ndarray): Frequency axis in Hz (shared, read-only).
+    amp (np.ndarray): View into the ring slot holding the amplitudes (dBm).
+    dropped (int): Sweeps discarded so far because the consumer lagged.
+"""
+
+RING_POLICIES = ("block", "drop_oldest")
+
+
+class SweepRing(object):
+    """
+    Single-producer / single-consumer ring of sweeps.
+
+    The slot holding the frame the consumer was last given is never
+    overwritten, so each view stays valid until the next get(). When every
+    other slot holds an unread sweep the producer either waits ('block') or
+    reuses the slot of the oldest unread sweep ('drop_oldest').
+
+    Args:
+        depth (int): Number of slots (>= 2).
+        points (int): Amplitudes per sweep.
+        policy (str): 'block' or 'drop_oldest'.
+        dtype: Amplitude dtype (float32 by default, as transferred).
+    """
+
+    def __init__(self, depth, points, policy="block", dtype=np.float32):
+        if depth < 2:
+            raise ValueError("depth must be at least 2")
+        if policy not in RING_POLICIES:
+            raise ValueError(f"policy must be one of: {', '.join(RING_POLICIES)}")
+        self.depth = depth
+        self.points = points
+        self.policy = policy
+        self.data = np.empty((depth, points), dtype=dtype)
+        self.timestamps = np.zeros(depth, dtype=np.float64)
+        self.seqs = np.zeros(depth, dtype=np.int64)
+        self.tags = np.zeros(depth, dtype=np.int64)
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+        self._free = deque(range(depth))
+        self._unread = deque()
+        self._held = None      # slot currently lent to the consumer
+        self._writing = None   # slot currently being filled by the producer
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        """Number of sweeps written but not yet read."""
+        return len(self._unread)
+
+    def acquire_slot(self):
+        """
+        Return the row the next sweep should be written into, waiting or
+        dropping according to the policy. Returns None once closed.
+        """
+        with self._cond:
+            while not self._free:
+                if self.closed:
+                    return None
+                if self.policy == "drop_oldest" and self._unread:
+                    self._free.append(self._unread.popleft())
+                    self.dropped += 1
+                else:
+                    self._cond.wait()
+            if self.closed:
+                return None
+            self._writing = self._free.popleft()
+            return self.data[self._writing]
+
+    def commit(self, timestamp, tag=0):
+        """
+        Publish the row returned by acquire_slot().
+
+        Args:
+            timestamp (float): Acquisition time of the sweep.
+            tag (int): Caller-defined label (e.g. which setup produced the
+                sweep), readable with held_tag() after get().
+        """
+        with self._cond:
+            slot, self._writing = self._writing, None
+            self.timestamps[slot] = timestamp
+            self.tags[slot] = tag
+            self.seqs[slot] = self.written
+            self.written += 1
+            self._unread.append(slot)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Return (seq, timestamp, amplitude view) of the oldest unread sweep.
+
+        The view stays valid until the next call to get(). Returns None if
+        the ring is closed and empty, or on timeout.
+        """
+        with self._cond:
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+                self._cond.notify_all()
+            if not self._cond.wait_for(lambda: self._unread or self.closed, timeout):
+                return None
+            if not self._unread:
+                return None
+            self._held = self._unread.popleft()
+            return int(self.seqs[self._held]), float(self.timestamps[self._held]), self.data[self._held]
+
+    def held_tag(self):
+        """Return the tag of the sweep last returned by get()."""
+        return int(self.tags[self._held])
+
+    def close(self):
+        """Wake up both sides; further acquire_slot() calls return None."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
@@ -0,0 +1,161 @@
+"""
+Rigol DSA815 - compact trace files and vectorized CSV export.
+
+A .dsatr file stores any number of traces with the same point count as
+float32 amplitudes plus per-trace start/stop/timestamp; the frequency axis
+is rebuilt on load instead of being stored. The amplitude block can be
+zlib-compressed.
+
+File layout (little endian):
+    header      32 bytes: magic, version, flags, trace count, points,
+                stored amplitude block size
+    metadata    count x (start Hz, stop Hz, timestamp) float64
+    amplitudes  count x points float32 (zlib stream if flags & 1)
+
+    from Rigol_traceio import write_trace, read_trace, export_csv
+
+    freq, amp = sa.get_sweep_data()
+    write_trace("sweep.dsatr", freq, amp)
+    export_csv("sweep.csv", freq, amp)
+"""
+import time
+import zlib
+
+import numpy as np
+
+
+MAGIC = b"DSA815TR"
+VERSION = 1
+FLAG_ZLIB = 1
+EXTENSION = ".dsatr"
+
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('flags', '<u4'),
+    ('count', '<u4'),
+    ('points', '<u4'),
+    ('block_size', '<u8'),
+])
+
+_META_DTYPE = np.dtype([
+    ('start', '<f8'),
+    ('stop', '<f8'),
+    ('timestamp', '<f8'),
+])
+
+
+class TraceSet(object):
+    """
+    Traces read from a .dsatr file.
+
+    Attributes:
+        amps (np.ndarray): (count, points) float32 amplitudes in dBm.
+        starts, stops (np.ndarray): Per-trace start/stop frequency in Hz.
+        timestamps (np.ndarray): Per-trace time.time() values.
+    """
+
+    def __init__(self, amps, meta):
+        self.amps = amps
+        self.starts = meta['start']
+        self.stops = meta['stop']
+        self.timestamps = meta['timestamp']
+
+    def __len__(self):
+        return len(self.amps)
+
+    def freq(self, index=0):
+        """Return the frequency axis of trace ``index`` in Hz."""
+        return np.linspace(self.starts[index], self.stops[index], self.amps.shape[1])
+
+
+def write_traces(path, amps, starts, stops, timestamps=None, compress=False, level=6):
+    """
+    Write many traces into one .dsatr file.
+
+    Args:
+        path (str): Destination file.
+        amps (array-like): (count, points) amplitudes in dBm, or one 1-D trace.
+        starts, stops (float | array-like): Start/stop frequency in Hz, per
+            trace or shared by all.
+        timestamps (float | array-like | None): Acquisition times; now if None.
+        compress (bool): zlib-compress the amplitude block.
+        level (int): zlib compression level.
+    """
+    amps = np.atleast_2d(np.asarray(amps, dtype='<f4'))
+    count, points = amps.shape
+    meta = np.empty(count, dtype=_META_DTYPE)
+    meta['start'] = starts
+    meta['stop'] = stops
+    meta['timestamp'] = time.time() if timestamps is None else timestamps
+    block = memoryview(np.ascontiguousarray(amps)).cast('B')
+    if compress:
+        block = zlib.compress(block, level)
+    header = np.zeros(1, dtype=_HEADER_DTYPE)
+    header[0] = (MAGIC, VERSION, FLAG_ZLIB if compress else 0, count, points, len(block))
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(meta.tobytes())
+        f.write(block)
+
+
+def read_traces(path):
+    """
+    Read every trace from a .dsatr file.
+
+    Returns:
+        TraceSet
+    """
+    with open(path, 'rb') as f:
+        header = np.frombuffer(f.read(_HEADER_DTYPE.itemsize), dtype=_HEADER_DTYPE)
+        if len(header) != 1 or header[0]['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a DSA815 trace file")
+        header = header[0]
+        if header['version'] != VERSION:
+            raise ValueError(f"Unsupported trace file version {header['version']}")
+        count, points = int(header['count']), int(header['points'])
+        meta = np.frombuffer(f.read(count * _META_DTYPE.itemsize), dtype=_META_DTYPE)
+        block = f.read(int(header['block_size']))
+    if header['flags'] & FLAG_ZLIB:
+        block = zlib.decompress(block)
+    amps = np.frombuffer(block, dtype='<f4').reshape(count, points)
+    return TraceSet(amps, meta)
+
+
+def write_trace(path, freq, amp, timestamp=None, compress=False):
+    """Write a single (freq, amp) sweep, e.g. from get_sweep_data()."""
+    write_traces(path, amp, freq[0], freq[-1], timestamp, compress)
+
+
+def read_trace(path, index=0):
+    """
+    Read one trace.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Frequency array (Hz) and amplitude array (dBm).
+    """
+    traces = read_traces(path)
+    return traces.freq(index), traces.amps[index]
+
+
+def export_csv(path, freq, amps, labels=None):
+    """
+    Write a frequency column plus one amplitude column per trace as CSV.
+
+    The whole table is formatted with a single string-format operation
+    instead of a per-line Python loop.
+
+    Args:
+        path (str): Destination file.
+        freq (np.ndarray): Frequency axis in Hz.
+        amps (array-like): One trace, or (count, points) traces sharing freq.
+        labels (list[str] | None): Column titles for the amplitude columns.
+    """
+    amps = np.atleast_2d(np.asarray(amps))
+    if labels is None:
+        labels = ["Amplitude (dBm)"] if len(amps) == 1 else [f"Trace {i + 1} (dBm)" for i in range(len(amps))]
+    table = np.column_stack((freq, amps.T))
+    row = "%.12g" + ",%.9g" * len(amps) + "\n"
+    with open(path, 'w') as f:
+        f.write("Frequency (Hz)," + ",".join(labels) + "\n")
+        f.write((row * len(table)) % tuple(table.ravel().tolist()))
@@ -0,0 +1,202 @@
+"""
+Rigol DSA815 - bulk transfer of instrument storage with a local cache.
+
+StorageSync mirrors the files on the instrument's storage into a local
+directory. Trace files (.trc) are recalled and read with binary transfer in
+pipelined batches (DSA815.load_traces()) and written as compact .dsatr
+files; screenshots, states, setups and other files are fetched raw with
+pipelined :MMEMory:DATA? queries (DSA815.read_files()).
+
+A JSON index in the destination remembers every pulled file by name and
+size, together with the storage identity from get_disk_info(). A re-sync
+skips files whose entry still matches and whose local copy exists, so only
+new or changed files cross the link. Storage has no modification times, so
+a file rewritten in place with the same size is only picked up with
+``force=True``.
+
+    from Rigol_transfer import StorageSync
+
+    sync = StorageSync(sa, "field_run")
+    result = sync.sync()
+    print(f"{len(result.pulled)} pulled, {len(result.skipped)} unchanged")
+"""
+import json
+import os
+import time
+from collections import namedtuple
+
+import pyvisa
+
+try:
+    from .Rigol_traceio import EXTENSION as TRACE_FILE_EXTENSION, write_trace
+except ImportError:
+    from Rigol_traceio import EXTENSION as TRACE_FILE_EXTENSION, write_trace
+
+
+INDEX_NAME = ".dsa815_index.json"
+TRACE_SUFFIXES = (".trc",)
+
+SyncResult = namedtuple('SyncResult', 'pulled skipped failed bytes_written elapsed_s')
+SyncResult.__doc__ = """\
+Outcome of StorageSync.sync().
+
+Attributes:
+    pulled (list[str]): Instrument files transferred.
+    skipped (list[str]): Files unchanged since the last sync.
+    failed (dict[str, str]): File name -> error message.
+    bytes_written (int): Bytes written to local files.
+    elapsed_s (float): Wall time of the sync.
+"""
+
+
+def _is_trace(name):
+    return name.lower().endswith(TRACE_SUFFIXES)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class StorageSync(object):
+    """
+    Mirror instrument storage into a local directory.
+
+    Args:
+        sa (DSA815): Connected analyzer.
+        dest (str): Local directory; created if missing.
+        batch_files (int): Files requested per batch. Within a batch the
+            driver packs as many requests per message as the message length
+            limit allows.
+        compress (bool): zlib-compress the .dsatr amplitude blocks.
+    """
+
+    def __init__(self, sa, dest, batch_files=32, compress=False):
+        self.sa = sa
+        self.dest = dest
+        self.batch_files = batch_files
+        self.compress = compress
+        os.makedirs(dest, exist_ok=True)
+        self.index_path = os.path.join(dest, INDEX_NAME)
+        self.index = self._load_index()
+
+    # ─── Index ───────────────────────────────────────────────────────────────
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {'disk': None, 'files': {}}
+        index.setdefault('disk', None)
+        index.setdefault('files', {})
+        return index
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _disk_identity(self):
+        """get_disk_info() minus the fields that change with every write."""
+        return {key: value for key, value in self.sa.get_disk_info().items()
+                if not any(word in key.lower() for word in ("used", "free"))}
+
+    def local_path(self, name):
+        """Return the local path a file on the instrument is mirrored to."""
+        base = name.replace("\\", "/").split(":")[-1].strip("/").replace("/", "_")
+        if _is_trace(base):
+            base = os.path.splitext(base)[0] + TRACE_FILE_EXTENSION
+        return os.path.join(self.dest, base)
+
+    # ─── Sync ────────────────────────────────────────────────────────────────
+
+    def plan(self, names=None, force=False, directory=None):
+        """
+        Compare instrument storage with the index.
+
+        Args:
+            names (iterable[str] | None): Restrict to these files.
+            force (bool): Pull every selected file regardless of the index.
+            directory (str | None): Instrument directory to list.
+
+        Returns:
+            tuple[list[tuple[str, int]], list[str]]: (name, size) of the
+                files to pull, and the names that are up to date.
+        """
+        listing = self.sa.list_files(directory)
+        disk = self._disk_identity()
+        known = self.index['files'] if disk == self.index['disk'] else {}
+        wanted = None if names is None else set(names)
+        pull, skipped = [], []
+        for name, size in listing:
+            if wanted is not None and name not in wanted:
+                continue
+            entry = known.get(name)
+            if (not force and entry is not None and entry['size'] == size
+                    and os.path.exists(os.path.join(self.dest, entry['local']))):
+                skipped.append(name)
+            else:
+                pull.append((name, size))
+        return pull, skipped
+
+    def sync(self, names=None, force=False, directory=None):
+        """
+        Pull new and changed files and update the index.
+
+        A batch that fails is retried file by file, so one unreadable file
+        does not stop the others.
+
+        Returns:
+            SyncResult
+        """
+        t0 = time.perf_counter()
+        pull, skipped = self.plan(names, force, directory)
+        disk = self._disk_identity()
+        if disk != self.index['disk']:
+            self.index = {'disk': disk, 'files': {}}
+        sizes = dict(pull)
+        traces = [name for name, _ in pull if _is_trace(name)]
+        others = [name for name, _ in pull if not _is_trace(name)]
+        pulled, failed = [], {}
+        written = 0
+
+        for fetch, batch_names in ([self._pull_traces, traces], [self._pull_files, others]):
+            for batch in _chunks(batch_names, self.batch_files):
+                try:
+                    done = fetch(batch)
+                except (OSError, ValueError, pyvisa.errors.VisaIOError):
+                    done = {}
+                    for name in batch:
+                        try:
+                            done.update(fetch([name]))
+                        except (OSError, ValueError, pyvisa.errors.VisaIOError) as e:
+                            failed[name] = str(e)
+                for name, (local, nbytes) in done.items():
+                    self.index['files'][name] = {
+                        'size': sizes[name], 'local': os.path.basename(local), 'synced': time.time(),
+                    }
+                    pulled.append(name)
+                    written += nbytes
+        self._save_index()
+        return SyncResult(pulled, skipped, failed, written, time.perf_counter() - t0)
+
+    def _pull_traces(self, names):
+        freq, amps = self.sa.load_traces(names)
+        now = time.time()
+        done = {}
+        for name, row, amp in zip(names, freq, amps):
+            path = self.local_path(name)
+            write_trace(path, row, amp, timestamp=now, compress=self.compress)
+            done[name] = (path, os.path.getsize(path))
+        return done
+
+    def _pull_files(self, names):
+        done = {}
+        for name, data in zip(names, self.sa.read_files(names)):
+            path = self.local_path(name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            done[name] = (path, len(data))
+        return done
@@ -0,0 +1,313 @@
+"""
+Rigol DSA815 - memory-mapped waterfall recorder for long captures.
+
+Sweeps are appended as fixed-width float32 rows to preallocated binary files
+that are written through np.memmap, so recording never holds more than one
+sweep in RAM and recordings of any length can be sliced by time or frequency
+without loading them.
+
+File layout (little endian):
+    header      256 bytes: magic, version, points, capacity, rows,
+                start/stop/RBW in Hz, creation time
+    timestamps  capacity x float64 (time.time() per row)
+    data        capacity x points x float32 (dBm)
+
+    from Rigol_waterfall import WaterfallRecorder, open_waterfall
+
+    with WaterfallRecorder("beatnote", rows_per_file=36000, rbw=sa.get_RBW()) as rec:
+        for frame in sa.iter_sweeps():
+            rec.append(frame.freq, frame.amp, frame.timestamp)
+
+    wf = open_waterfall("beatnote")
+    t, f, data = wf.select(t0=..., t1=..., f0=69.9e6, f1=70.1e6)
+"""
+import glob
+import os
+import time
+
+import numpy as np
+
+
+MAGIC = b"DSA815WF"
+VERSION = 1
+HEADER_SIZE = 256
+EXTENSION = ".dsawf"
+
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('points', '<u4'),
+    ('capacity', '<u8'),
+    ('rows', '<u8'),
+    ('start', '<f8'),
+    ('stop', '<f8'),
+    ('rbw', '<f8'),
+    ('created', '<f8'),
+])
+
+
+def _layout(points, capacity):
+    """Return (timestamps offset, data offset, file size) in bytes."""
+    ts_offset = HEADER_SIZE
+    data_offset = ts_offset + 8 * capacity
+    return ts_offset, data_offset, data_offset + 4 * points * capacity
+
+
+class WaterfallFile(object):
+    """
+    One waterfall file opened lazily through np.memmap.
+
+    Attributes ``timestamps`` and ``data`` are memory-mapped views covering
+    only the rows written so far; nothing is read until they are indexed.
+
+    Args:
+        path (str): File to open.
+        mode (str): 'r' for read-only, 'r+' to append (used by the recorder).
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self._header = np.memmap(path, dtype=_HEADER_DTYPE, mode=mode, shape=(1,))
+        header = self._header[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a DSA815 waterfall file")
+        if header['version'] != VERSION:
+            raise ValueError(f"Unsupported waterfall file version {header['version']}")
+        self.points = int(header['points'])
+        self.capacity = int(header['capacity'])
+        self.start = float(header['start'])
+        self.stop = float(header['stop'])
+        self.rbw = float(header['rbw'])
+        self.created = float(header['created'])
+        ts_offset, data_offset, _ = _layout(self.points, self.capacity)
+        self._timestamps = np.memmap(path, dtype='<f8', mode=mode, offset=ts_offset,
+                                     shape=(self.capacity,))
+        self._data = np.memmap(path, dtype='<f4', mode=mode, offset=data_offset,
+                               shape=(self.capacity, self.points))
+
+    @property
+    def rows(self):
+        """Number of sweeps written."""
+        return int(self._header[0]['rows'])
+
+    @property
+    def freq(self):
+        """Frequency axis in Hz."""
+        return np.linspace(self.start, self.stop, self.points)
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.rows]
+
+    @property
+    def data(self):
+        return self._data[:self.rows]
+
+    def row_range(self, t0=None, t1=None):
+        """Return the (first, stop) row indices with t0 <= timestamp < t1."""
+        ts = self.timestamps
+        first = 0 if t0 is None else int(np.searchsorted(ts, t0, side='left'))
+        stop = len(ts) if t1 is None else int(np.searchsorted(ts, t1, side='left'))
+        return first, stop
+
+    def column_range(self, f0=None, f1=None):
+        """Return the (first, stop) column indices with f0 <= freq <= f1."""
+        freq = self.freq
+        first = 0 if f0 is None else int(np.searchsorted(freq, f0, side='left'))
+        stop = self.points if f1 is None else int(np.searchsorted(freq, f1, side='right'))
+        return first, stop
+
+    def select(self, t0=None, t1=None, f0=None, f1=None):
+        """
+        Return (timestamps, freq, data) restricted to a time and frequency window.
+
+        ``timestamps`` and ``data`` are memory-mapped views; only the rows and
+        columns actually touched are read from disk.
+        """
+        r0, r1 = self.row_range(t0, t1)
+        c0, c1 = self.column_range(f0, f1)
+        return self.timestamps[r0:r1], self.freq[c0:c1], self.data[r0:r1, c0:c1]
+
+    def flush(self):
+        self._header.flush()
+        self._timestamps.flush()
+        self._data.flush()
+
+    def close(self):
+        """
+        Drop this object's references to the memory maps. Views handed out
+        by select() keep their mapping alive until they are released.
+        """
+        self._header = self._timestamps = self._data = None
+
+
+class WaterfallRecorder(object):
+    """
+    Append sweeps to rotating, preallocated waterfall files.
+
+    Files are named ``<base>_00000.dsawf``, ``<base>_00001.dsawf``, ... A new
+    file is started when the current one is full or when the frequency axis
+    or RBW of the incoming sweep differs from the one in the header.
+
+    Args:
+        base (str): Path prefix for the files.
+        rows_per_file (int): Sweeps preallocated per file.
+        rbw (float): RBW in Hz recorded in the header (informational).
+        max_files (int | None): Keep only the newest max_files files,
+            deleting older ones; None keeps everything.
+        flush_every (int): Flush the memory maps every N rows.
+    """
+
+    def __init__(self, base, rows_per_file=3600, rbw=0.0, max_files=None, flush_every=64):
+        if rows_per_file < 1:
+            raise ValueError("rows_per_file must be at least 1")
+        self.base = base
+        self.rows_per_file = rows_per_file
+        self.rbw = rbw
+        self.max_files = max_files
+        self.flush_every = flush_every
+        self.rows_written = 0
+        self.current = None
+        existing = sorted(glob.glob(f"{glob.escape(base)}_[0-9][0-9][0-9][0-9][0-9]{EXTENSION}"))
+        self._index = int(existing[-1][-len(EXTENSION) - 5:-len(EXTENSION)]) + 1 if existing else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open_new(self, start, stop, points, rbw):
+        self.close()
+        path = f"{self.base}_{self._index:05d}{EXTENSION}"
+        self._index += 1
+        _, _, size = _layout(points, self.rows_per_file)
+        with open(path, 'wb') as f:
+            header = np.zeros(1, dtype=_HEADER_DTYPE)
+            header[0] = (MAGIC, VERSION, points, self.rows_per_file, 0, start, stop, rbw, time.time())
+            f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+            f.truncate(size)  # sparse preallocation
+        self.current = WaterfallFile(path, mode="r+")
+        self._prune()
+
+    def _prune(self):
+        if self.max_files is None:
+            return
+        files = sorted(glob.glob(f"{glob.escape(self.base)}_[0-9][0-9][0-9][0-9][0-9]{EXTENSION}"))
+        for path in files[:-self.max_files]:
+            os.remove(path)
+
+    def append(self, freq, amp, timestamp=None, rbw=None):
+        """
+        Append one sweep, e.g. ``rec.append(*sa.get_sweep_data())``.
+
+        Args:
+            freq (np.ndarray): Frequency axis of the sweep in Hz.
+            amp (np.ndarray): Amplitudes in dBm.
+            timestamp (float | None): time.time() of the sweep; now if None.
+            rbw (float | None): RBW of the sweep, if it may have changed.
+        """
+        if rbw is not None:
+            self.rbw = rbw
+        points = len(amp)
+        start, stop = float(freq[0]), float(freq[-1])
+        cur = self.current
+        if (cur is None or cur.rows >= cur.capacity or cur.points != points
+                or cur.start != start or cur.stop != stop or cur.rbw != self.rbw):
+            self._open_new(start, stop, points, self.rbw)
+            cur = self.current
+        row = cur.rows
+        cur._data[row] = amp
+        cur._timestamps[row] = time.time() if timestamp is None else timestamp
+        cur._header[0]['rows'] = row + 1
+        self.rows_written += 1
+        if (row + 1) % self.flush_every == 0:
+            cur.flush()
+
+    def close(self):
+        """Flush and close the current file."""
+        if self.current is not None:
+            self.current.flush()
+            self.current.close()
+            self.current = None
+
+
+class WaterfallSeries(object):
+    """
+    All rotated files of one recording, opened lazily.
+
+    Args:
+        base (str): Path prefix passed to WaterfallRecorder.
+    """
+
+    def __init__(self, base):
+        pattern = f"{glob.escape(base)}_[0-9][0-9][0-9][0-9][0-9]{EXTENSION}"
+        self.paths = sorted(glob.glob(pattern))
+        if not self.paths:
+            raise FileNotFoundError(f"No waterfall files match {base}_*{EXTENSION}")
+        self._files = {}
+
+    def file(self, index):
+        """Return the WaterfallFile for paths[index], opening it on first use."""
+        if index not in self._files:
+            self._files[index] = WaterfallFile(self.paths[index])
+        return self._files[index]
+
+    @property
+    def rows(self):
+        return sum(self.file(i).rows for i in range(len(self.paths)))
+
+    def select(self, t0=None, t1=None, f0=None, f1=None):
+        """
+        Return (timestamps, freq, data) for a time and frequency window.
+
+        All selected rows must share one frequency axis; files whose time
+        range lies outside [t0, t1) are skipped without reading their data.
+
+        Raises:
+            ValueError: The selected rows span different frequency axes.
+        """
+        ts_parts, data_parts, freq = [], [], None
+        axis = None
+        for i in range(len(self.paths)):
+            wf = self.file(i)
+            if wf.rows == 0:
+                continue
+            ts = wf.timestamps
+            if (t1 is not None and ts[0] >= t1) or (t0 is not None and ts[-1] < t0):
+                continue
+            ts_sel, f_sel, d_sel = wf.select(t0, t1, f0, f1)
+            if len(ts_sel) == 0:
+                continue
+            if axis is None:
+                axis, freq = (wf.start, wf.stop, wf.points), f_sel
+            elif axis != (wf.start, wf.stop, wf.points):
+                raise ValueError("Selection spans files with different frequency axes")
+            ts_parts.append(ts_sel)
+            data_parts.append(d_sel)
+        if not ts_parts:
+            return np.empty(0), np.empty(0), np.empty((0, 0), dtype=np.float32)
+        if len(ts_parts) == 1:
+            return ts_parts[0], freq, data_parts[0]
+        return np.concatenate(ts_parts), freq, np.concatenate(data_parts)
+
+    def close(self):
+        for wf in self._files.values():
+            wf.close()
+        self._files.clear()
+
+
+def open_waterfall(path):
+    """
+    Open a recording for reading.
+
+    Args:
+        path (str): A single .dsawf file, or the base prefix of a rotated
+            recording.
+
+    Returns:
+        WaterfallFile | WaterfallSeries
+    """
+    if path.endswith(EXTENSION) and os.path.exists(path):
+        return WaterfallFile(path)
+    return WaterfallSeries(path)
@@ -0,0 +1,82 @@
+"""
+N emulated instruments swept one after another (DSA815) versus concurrently
+from a single event loop (AsyncDSA815).
+
+    python benchmarks/bench_async.py [N]
+"""
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_async import AsyncDSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _make_rm(n, latency_s):
+    return EmulatedResourceManager(count=n, latency_s=latency_s, bandwidth_Bps=1e6, seed=0)
+
+
+def run_sequential(n, sweeps, sweep_time, latency_s):
+    rm = _make_rm(n, latency_s)
+    analyzers = []
+    for name in rm.list_resources():
+        sa = DSA815()
+        sa.conn(rm=rm, resource_name=name, cache_path=None)
+        sa.set_sweep_time(sweep_time)
+        analyzers.append(sa)
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        for sa in analyzers:
+            sa.initiate_measurement()
+            sa.get_sweep_data()
+    elapsed = time.perf_counter() - t0
+    for sa in analyzers:
+        sa.dis()
+    return elapsed
+
+
+async def _run_concurrent(n, sweeps, sweep_time, latency_s):
+    rm = _make_rm(n, latency_s)
+    analyzers = [AsyncDSA815() for _ in range(n)]
+    await asyncio.gather(*(sa.conn(rm=rm, resource_name=name, cache_path=None)
+                           for sa, name in zip(analyzers, rm.list_resources())))
+    await asyncio.gather(*(sa.set_sweep_time(sweep_time) for sa in analyzers))
+
+    async def sweep(sa):
+        await sa.initiate_measurement()
+        return await sa.get_sweep_data()
+
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        await asyncio.gather(*(sweep(sa) for sa in analyzers))
+    elapsed = time.perf_counter() - t0
+    await asyncio.gather(*(sa.dis() for sa in analyzers))
+    return elapsed
+
+
+def run(n=4, sweeps=5, sweep_time=0.05, latency_s=2e-3):
+    """Return wall-clock seconds and sweeps/s for both approaches."""
+    sequential = run_sequential(n, sweeps, sweep_time, latency_s)
+    concurrent = asyncio.run(_run_concurrent(n, sweeps, sweep_time, latency_s))
+    total = n * sweeps
+    return {
+        'instruments': n,
+        'sweeps_per_instrument': sweeps,
+        'sequential_s': sequential,
+        'concurrent_s': concurrent,
+        'sequential_sweeps_per_s': total / sequential,
+        'concurrent_sweeps_per_s': total / concurrent,
+        'speedup': sequential / concurrent,
+    }
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    r = run(n=n)
+    print(f"\n{n} instruments x {r['sweeps_per_instrument']} sweeps (50 ms sweep, 2 ms/transaction)")
+    print(f"sequential : {r['sequential_s']:.3f} s  ({r['sequential_sweeps_per_s']:.1f} sweeps/s)")
+    print(f"concurrent : {r['concurrent_s']:.3f} s  ({r['concurrent_sweeps_per_s']:.1f} sweeps/s)")
+    print(f"speedup    : {r['speedup']:.2f}x")
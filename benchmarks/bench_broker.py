@@ -0,0 +1,118 @@
+"""
+N consumers of the same sweeps: each reading the trace over the link vs.
+one SweepBroker publishing into shared memory, on the emulator with
+per-transaction latency.
+
+Consumers run as threads here; in separate processes the instrument
+traffic is the same.
+
+    python benchmarks/bench_broker.py
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_broker import BrokerClient, SweepBroker
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _connect(points, latency_s, bandwidth_Bps):
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(points=points, latency_s=latency_s,
+                                       bandwidth_Bps=bandwidth_Bps, time_scale=0.0, seed=0),
+            cache_path=None)
+    sa.set_format("REAL,32")
+    sa.get_frequency_axis()
+    return sa
+
+
+def _direct(consumers, sweeps, points, latency_s, bandwidth_Bps):
+    """One sweep, then every consumer reads TRACE1 itself."""
+    sa = _connect(points, latency_s, bandwidth_Bps)
+    fetches = []
+    tx0 = sa.inst.transactions
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        sa.initiate_measurement()
+        for _ in range(consumers):
+            t1 = time.perf_counter()
+            sa.get_trace_data()
+            fetches.append(time.perf_counter() - t1)
+    elapsed = time.perf_counter() - t0
+    result = {
+        'sweeps_per_s': sweeps / elapsed,
+        'transactions_per_sweep': (sa.inst.transactions - tx0) / sweeps,
+        'fetch_us': float(np.median(fetches)) * 1e6,
+    }
+    sa.dis()
+    return result
+
+
+def _brokered(consumers, sweeps, points, latency_s, bandwidth_Bps, depth):
+    sa = _connect(points, latency_s, bandwidth_Bps)
+    broker = SweepBroker(sa, depth=depth, address=("127.0.0.1", 0))
+    tx0 = sa.inst.transactions
+    broker.start()
+    clients = [BrokerClient(broker.address) for _ in range(consumers)]
+    delivery, copies, dropped = [], [], []
+    buffers = [np.empty(points, dtype=np.float32) for _ in clients]
+
+    def consume(client, out):
+        for _ in range(sweeps):
+            frame = client.read_frame(out)
+            delivery.append(time.time() - frame.timestamp)
+        dropped.append(client.dropped)
+        t1 = time.perf_counter()
+        for _ in range(sweeps):
+            client._next -= 1           # re-read the same sweep: copy cost alone
+            client.read_frame(out)
+        copies.append((time.perf_counter() - t1) / sweeps)
+
+    threads = [threading.Thread(target=consume, args=(c, b)) for c, b in zip(clients, buffers)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t0
+    published = broker.published
+    transactions = sa.inst.transactions - tx0
+    for client in clients:
+        client.dis()
+    broker.close()
+    sa.dis()
+    return {
+        'sweeps_per_s': published / elapsed,
+        'transactions_per_sweep': transactions / max(published, 1),
+        'delivery_us': float(np.median(delivery)) * 1e6,
+        'copy_us': float(np.median(copies)) * 1e6,
+        'dropped': int(sum(dropped)),
+    }
+
+
+def run(consumers=3, sweeps=100, points=601, latency_s=1e-3, bandwidth_Bps=1e6, depth=16):
+    """Return {'direct': {...}, 'broker': {...}, 'transaction_ratio'}."""
+    results = {
+        'direct': _direct(consumers, sweeps, points, latency_s, bandwidth_Bps),
+        'broker': _brokered(consumers, sweeps, points, latency_s, bandwidth_Bps, depth),
+    }
+    results['transaction_ratio'] = (results['direct']['transactions_per_sweep']
+                                    / results['broker']['transactions_per_sweep'])
+    return results
+
+
+if __name__ == '__main__':
+    r = run()
+    print("\n3 consumers, 601 points (1 ms/transaction, 1 MB/s)")
+    d, b = r['direct'], r['broker']
+    print(f"direct  {d['sweeps_per_s']:6.1f} sweeps/s  {d['transactions_per_sweep']:5.1f} tx/sweep"
+          f"  fetch {d['fetch_us']:7.0f} us per consumer")
+    print(f"broker  {b['sweeps_per_s']:6.1f} sweeps/s  {b['transactions_per_sweep']:5.1f} tx/sweep"
+          f"  delivery {b['delivery_us']:5.0f} us, copy {b['copy_us']:5.1f} us per consumer"
+          f"  ({b['dropped']} dropped)")
+    print(f"instrument transactions {r['transaction_ratio']:.1f}x fewer")
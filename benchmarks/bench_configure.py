@@ -0,0 +1,78 @@
+"""
+Reconfiguration latency for a segment-hopping workload: each hop moves the
+center frequency and re-applies RBW, VBW, sweep time and attenuation, once
+through the individual set_* calls and once through DSA815.configure().
+
+    python benchmarks/bench_configure.py [hops]
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+SETTINGS = dict(span=10e6, RBW=30e3, VBW=10e3, sweep_time=0.01, input_atten=10)
+
+
+def _connect(latency_s):
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(latency_s=latency_s, bandwidth_Bps=1e6, seed=0),
+            cache_path=None)
+    return sa
+
+
+def run_individual(hops, latency_s):
+    sa = _connect(latency_s)
+    t0 = time.perf_counter()
+    transactions = sa.inst.transactions
+    for i in range(hops):
+        sa.set_center_frequency(100e6 + i * 10e6)
+        sa.set_RBW(SETTINGS['RBW'])
+        sa.set_VBW(SETTINGS['VBW'])
+        sa.set_sweep_time(SETTINGS['sweep_time'])
+        sa.set_input_atten(SETTINGS['input_atten'])
+    elapsed = time.perf_counter() - t0
+    transactions = sa.inst.transactions - transactions
+    sa.dis()
+    return elapsed / hops, transactions / hops
+
+
+def run_configure(hops, latency_s):
+    sa = _connect(latency_s)
+    sa.configure(**SETTINGS)
+    t0 = time.perf_counter()
+    transactions = sa.inst.transactions
+    for i in range(hops):
+        sa.configure(center_frequency=100e6 + i * 10e6, **SETTINGS)
+    elapsed = time.perf_counter() - t0
+    transactions = sa.inst.transactions - transactions
+    sa.dis()
+    return elapsed / hops, transactions / hops
+
+
+def run(hops=50, latency_s=2e-3):
+    """Return seconds and VISA transactions per hop for both approaches."""
+    individual_s, individual_tx = run_individual(hops, latency_s)
+    configure_s, configure_tx = run_configure(hops, latency_s)
+    return {
+        'hops': hops,
+        'individual_s_per_hop': individual_s,
+        'configure_s_per_hop': configure_s,
+        'individual_transactions_per_hop': individual_tx,
+        'configure_transactions_per_hop': configure_tx,
+        'speedup': individual_s / configure_s,
+    }
+
+
+if __name__ == '__main__':
+    hops = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    r = run(hops=hops)
+    print(f"\n{hops} segment hops (2 ms/transaction)")
+    print(f"individual set_* : {r['individual_s_per_hop'] * 1e3:6.2f} ms/hop"
+          f"  ({r['individual_transactions_per_hop']:.1f} transactions)")
+    print(f"configure()      : {r['configure_s_per_hop'] * 1e3:6.2f} ms/hop"
+          f"  ({r['configure_transactions_per_hop']:.1f} transactions)")
+    print(f"speedup          : {r['speedup']:.2f}x")
@@ -0,0 +1,60 @@
+"""
+Lock detection cost per sweep: the viewers' original np.where mask per
+window versus LockDetector, for a growing number of windows.
+
+    python benchmarks/bench_lock.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_lock import LockDetector
+
+
+def _legacy(freq, amp, windows):
+    locked = []
+    for f0, half_bw, threshold in windows:
+        idx = np.where((freq >= f0 - half_bw) & (freq <= f0 + half_bw))[0]
+        locked.append(len(idx) > 0 and np.max(amp[idx]) > threshold)
+    return locked
+
+
+def run(window_counts=(1, 10, 50, 200), points=601, repeats=500):
+    """Return {windows: {'legacy_us', 'detector_us', 'speedup'}} per sweep."""
+    rng = np.random.default_rng(0)
+    freq = np.linspace(50e6, 150e6, points)
+    amps = rng.normal(-80, 5, (16, points)).astype(np.float32)
+    results = {}
+    for n in window_counts:
+        windows = [(f0, 200e3, -70.0) for f0 in rng.uniform(50e6, 150e6, n)]
+        detector = LockDetector()
+        for window in windows:
+            detector.add_window(*window)
+        detector.set_axis(freq)
+
+        t0 = time.perf_counter()
+        for i in range(repeats):
+            _legacy(freq, amps[i % len(amps)], windows)
+        legacy = (time.perf_counter() - t0) / repeats
+
+        t0 = time.perf_counter()
+        for i in range(repeats):
+            detector.update(amps[i % len(amps)], freq)
+        vectorized = (time.perf_counter() - t0) / repeats
+
+        results[n] = {
+            'legacy_us': legacy * 1e6,
+            'detector_us': vectorized * 1e6,
+            'speedup': legacy / vectorized,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'windows':>8} {'np.where (us)':>14} {'LockDetector (us)':>18} {'speedup':>8}")
+    for n, r in results.items():
+        print(f"{n:>8} {r['legacy_us']:>14.1f} {r['detector_us']:>18.1f} {r['speedup']:>7.1f}x")
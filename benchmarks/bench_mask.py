@@ -0,0 +1,74 @@
+"""
+Spectral mask checking cost per sweep: a per-point Python loop (limits
+interpolated for every point of every sweep) versus SpectralMask.check()
+on single sweeps and SpectralMask.check_stack() on a recorded stack.
+
+    python benchmarks/bench_mask.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_mask import SpectralMask
+
+
+UPPER = [(90e6, -60), (99e6, -60), (99e6, -20), (101e6, -20), (101e6, -60), (110e6, -60)]
+LOWER = [(99.5e6, -40), (100.5e6, -40)]
+
+
+def _limit(points, f, outside):
+    for (f0, l0), (f1, l1) in zip(points, points[1:]):
+        if f0 <= f <= f1:
+            return l0 if f1 == f0 else l0 + (l1 - l0) * (f - f0) / (f1 - f0)
+    return outside
+
+
+def _python_loop(freq, amp):
+    worst = float('inf')
+    for f, a in zip(freq.tolist(), amp.tolist()):
+        worst = min(worst, _limit(UPPER, f, float('inf')) - a, a - _limit(LOWER, f, float('-inf')))
+    return worst >= 0, worst
+
+
+def run(point_counts=(601, 3001), sweeps=1000, loop_sweeps=5):
+    """Return {points: {'python_loop_us', 'check_us', 'check_stack_us', 'speedup'}} per sweep."""
+    rng = np.random.default_rng(0)
+    results = {}
+    for points in point_counts:
+        freq = np.linspace(90e6, 110e6, points)
+        amps = rng.normal(-75, 6, (sweeps, points)).astype(np.float32)
+        mask = SpectralMask(upper=UPPER, lower=LOWER)
+        mask.set_axis(freq)
+
+        t0 = time.perf_counter()
+        for i in range(loop_sweeps):
+            _python_loop(freq, amps[i])
+        loop = (time.perf_counter() - t0) / loop_sweeps
+
+        t0 = time.perf_counter()
+        for amp in amps:
+            mask.check(amp, freq)
+        single = (time.perf_counter() - t0) / sweeps
+
+        t0 = time.perf_counter()
+        mask.check_stack(amps, freq)
+        stack = (time.perf_counter() - t0) / sweeps
+
+        results[points] = {
+            'python_loop_us': loop * 1e6,
+            'check_us': single * 1e6,
+            'check_stack_us': stack * 1e6,
+            'speedup': loop / single,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'points':>7} {'python loop (us)':>17} {'check (us)':>11} {'check_stack (us)':>17} {'speedup':>8}")
+    for points, r in results.items():
+        print(f"{points:>7} {r['python_loop_us']:>17.1f} {r['check_us']:>11.1f} "
+              f"{r['check_stack_us']:>17.2f} {r['speedup']:>7.0f}x")
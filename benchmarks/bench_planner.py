@@ -0,0 +1,54 @@
+"""
+SweepPlanner model accuracy on the emulator: calibrate from two setups,
+then compare predicted and measured update time for plans at several
+target refresh rates.
+
+    python benchmarks/bench_planner.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+from Rigol_planner import SweepPlanner
+
+
+def run(rates=(20, 5, 1), band=(88e6, 108e6), repeats=2, latency_s=1e-3, bandwidth_Bps=1e6):
+    """Return {rate: {'rbw', 'segments', 'predicted_s', 'measured_s', 'error'}}."""
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(latency_s=latency_s, bandwidth_Bps=bandwidth_Bps, seed=0),
+            cache_path=None)
+    planner = SweepPlanner(sa)
+    planner.calibrate([dict(freq_limits=band, RBW=100e3, VBW=100e3),
+                       dict(freq_limits=band, RBW=10e3, VBW=10e3)], sweeps=2)
+    results = {}
+    for rate in rates:
+        plan = planner.plan_for_rate(band[0], band[1], rate)
+        scan = planner.apply(plan)
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            if scan is None:
+                sa.initiate_measurement()
+                sa.get_trace_data()
+            else:
+                scan.run()
+        measured = (time.perf_counter() - t0) / repeats
+        results[rate] = {
+            'rbw': plan.rbw,
+            'segments': plan.segments,
+            'predicted_s': plan.cycle_s,
+            'measured_s': measured,
+            'error': measured / plan.cycle_s - 1,
+        }
+    sa.dis()
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'target/s':>8} {'RBW':>8} {'segments':>9} {'predicted ms':>13} {'measured ms':>12} {'error':>7}")
+    for rate, r in results.items():
+        print(f"{rate:>8} {r['rbw']:>8.0f} {r['segments']:>9} {r['predicted_s'] * 1e3:>13.1f} "
+              f"{r['measured_s'] * 1e3:>12.1f} {r['error']:>+7.1%}")
@@ -0,0 +1,86 @@
+"""
+N emulated instruments swept one after another (DSA815) versus together
+through an InstrumentPool, with the trigger skew between instruments.
+
+    python benchmarks/bench_pool.py [N]
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_DSA815 import DSA815
+from Rigol_pool import InstrumentPool
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _make_rm(n, latency_s):
+    return EmulatedResourceManager(count=n, latency_s=latency_s, bandwidth_Bps=1e6, seed=0)
+
+
+def run_sequential(n, sweeps, sweep_time, latency_s):
+    rm = _make_rm(n, latency_s)
+    analyzers = []
+    for name in rm.list_resources():
+        sa = DSA815()
+        sa.conn(rm=rm, resource_name=name, cache_path=None)
+        sa.set_sweep_time(sweep_time)
+        analyzers.append(sa)
+    skews = []
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        triggers = []
+        for sa in analyzers:
+            triggers.append(time.time())
+            sa.initiate_measurement()
+            sa.get_trace_data()
+        skews.append(max(triggers) - min(triggers))
+    elapsed = time.perf_counter() - t0
+    for sa in analyzers:
+        sa.dis()
+    return elapsed, float(np.mean(skews))
+
+
+def run_pool(n, sweeps, sweep_time, latency_s):
+    rm = _make_rm(n, latency_s)
+    pool = InstrumentPool.connect(resource_names=list(rm.list_resources()), rm=rm, cache_path=None)
+    pool.configure(sweep_time=sweep_time)
+    skews = []
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        result = pool.sweep()
+        skews.append(result.trigger_times.max() - result.trigger_times.min())
+    elapsed = time.perf_counter() - t0
+    pool.close()
+    return elapsed, float(np.mean(skews))
+
+
+def run(n=4, sweeps=5, sweep_time=0.05, latency_s=2e-3):
+    """Return wall-clock seconds, sweeps/s and mean trigger skew for both approaches."""
+    sequential, sequential_skew = run_sequential(n, sweeps, sweep_time, latency_s)
+    pooled, pooled_skew = run_pool(n, sweeps, sweep_time, latency_s)
+    total = n * sweeps
+    return {
+        'instruments': n,
+        'sweeps_per_instrument': sweeps,
+        'sequential_s': sequential,
+        'pool_s': pooled,
+        'sequential_sweeps_per_s': total / sequential,
+        'pool_sweeps_per_s': total / pooled,
+        'sequential_trigger_skew_s': sequential_skew,
+        'pool_trigger_skew_s': pooled_skew,
+        'speedup': sequential / pooled,
+    }
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    r = run(n=n)
+    print(f"\n{n} instruments x {r['sweeps_per_instrument']} sweeps (50 ms sweep, 2 ms/transaction)")
+    print(f"sequential : {r['sequential_s']:.3f} s  ({r['sequential_sweeps_per_s']:.1f} sweeps/s)"
+          f"  trigger skew {r['sequential_trigger_skew_s'] * 1e3:.1f} ms")
+    print(f"pool       : {r['pool_s']:.3f} s  ({r['pool_sweeps_per_s']:.1f} sweeps/s)"
+          f"  trigger skew {r['pool_trigger_skew_s'] * 1e3:.2f} ms")
+    print(f"speedup    : {r['speedup']:.2f}x")
@@ -0,0 +1,99 @@
+"""
+Viewer render rate at several point counts: SpectrumViewer (PyQt5 +
+pyqtgraph) and RigolTkViewer (matplotlib blitting) each run against an
+emulated DSA815 with their own acquisition worker, and the frames they
+render per second are counted next to the frames acquired. Qt runs with
+the offscreen platform, so no display is needed; the Tk viewer needs one
+and reports 'skipped' without it.
+
+    python benchmarks/bench_render.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _emulated(points, latency_s):
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(points=points, latency_s=latency_s, time_scale=0.0,
+                                       seed=0, tones=[(100e6, -30.0)]),
+            cache_path=None)
+    sa.set_format("REAL,32")
+    return sa
+
+
+def _measure(viewer, pump, frames, timeout_s):
+    """Pump the viewer's event loop until it has rendered ``frames`` more traces."""
+    deadline = time.perf_counter() + timeout_s
+    while viewer.frames_rendered < 1 and time.perf_counter() < deadline:
+        pump()                  # first frame: full draw, axes and background
+    acquired, rendered = _acquired(viewer), viewer.frames_rendered
+    t0 = time.perf_counter()
+    while viewer.frames_rendered - rendered < frames and time.perf_counter() < deadline:
+        pump()
+    elapsed = time.perf_counter() - t0
+    return {
+        'render_fps': (viewer.frames_rendered - rendered) / elapsed,
+        'acquire_fps': (_acquired(viewer) - acquired) / elapsed,
+    }
+
+
+def _acquired(viewer):
+    worker = getattr(viewer, 'worker', None)
+    return worker.frames_acquired if worker is not None else viewer.frames_acquired
+
+
+def run_qt(points, frames, latency_s=1e-3, timeout_s=30.0):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+    from Rigol_GUI import SpectrumViewer
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    viewer = SpectrumViewer(sa=_emulated(points, latency_s), update_interval_ms=0)
+    viewer.show()
+    try:
+        return _measure(viewer, app.processEvents, frames, timeout_s)
+    finally:
+        viewer.close()
+        app.processEvents()
+
+
+def run_tk(points, frames, latency_s=1e-3, timeout_s=30.0):
+    import tkinter as tk
+    from Rigol_TK_viewer import RigolTkViewer
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise RuntimeError(f"no display: {e}")
+    viewer = RigolTkViewer(root, sa=_emulated(points, latency_s), update_interval_s=0, render_interval_ms=1)
+    try:
+        return _measure(viewer, root.update, frames, timeout_s)
+    finally:
+        viewer.close()
+
+
+def run(point_counts=(601, 3001, 10001), frames=60):
+    """Return {viewer: {points: {...fps}}}; a viewer that cannot run reports 'skipped'."""
+    results = {}
+    for name, bench in (('qt', run_qt), ('tk', run_tk)):
+        try:
+            results[name] = {points: bench(points, frames) for points in point_counts}
+        except (ImportError, RuntimeError) as e:
+            results[name] = {'skipped': str(e)}
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    for viewer, r in results.items():
+        print(f"\n{viewer}")
+        if 'skipped' in r:
+            print(f"  skipped: {r['skipped']}")
+            continue
+        for points, m in r.items():
+            print(f"  {points:>6} points  " + "  ".join(f"{k} {v:7.1f}" for k, v in m.items()))
@@ -0,0 +1,61 @@
+"""
+Settings round-trip cost: one set_* followed by the matching get_*, with
+the settings cache on and off, plus the settings reads behind each
+get_sweep_data() call.
+
+    python benchmarks/bench_settings.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _round_trips(use_cache, repeats, latency_s):
+    sa = DSA815(use_cache=use_cache)
+    sa.conn(rm=EmulatedResourceManager(latency_s=latency_s, seed=0), cache_path=None)
+    tx0 = sa.inst.transactions
+    t0 = time.perf_counter()
+    for i in range(repeats):
+        sa.set_center_frequency(100e6 + i * 1e3)
+        sa.get_center_frequency()
+        sa.set_RBW(10e3)
+        sa.get_RBW()
+    round_trip = (time.perf_counter() - t0) / (2 * repeats)
+    round_trip_tx = (sa.inst.transactions - tx0) / (2 * repeats)
+
+    sa.get_sweep_data()
+    tx0 = sa.inst.transactions
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        sa.get_freq_limits()
+        sa.get_sweep_points()
+    axis = (time.perf_counter() - t0) / repeats
+    axis_tx = (sa.inst.transactions - tx0) / repeats
+    sa.dis()
+    return {
+        'set_get_s': round_trip,
+        'set_get_transactions': round_trip_tx,
+        'axis_lookup_s': axis,
+        'axis_lookup_transactions': axis_tx,
+    }
+
+
+def run(repeats=50, latency_s=1e-3):
+    """Return {'cached': {...}, 'uncached': {...}} per-operation costs."""
+    return {
+        'uncached': _round_trips(False, repeats, latency_s),
+        'cached': _round_trips(True, repeats, latency_s),
+    }
+
+
+if __name__ == '__main__':
+    r = run()
+    print("\nSettings round trips (1 ms/transaction)")
+    for mode in ('uncached', 'cached'):
+        m = r[mode]
+        print(f"{mode:<9} set+get {m['set_get_s'] * 1e3:6.2f} ms ({m['set_get_transactions']:.1f} tx)"
+              f"   axis lookup {m['axis_lookup_s'] * 1e3:6.2f} ms ({m['axis_lookup_transactions']:.1f} tx)")
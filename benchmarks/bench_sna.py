@@ -0,0 +1,58 @@
+"""
+Through-normalization cost: the hand-written loop (get_sweep_data() list
+arithmetic per sweep) versus ScalarNetworkAnalyzer.normalize() on single
+float32 sweeps and on a recorded (sweeps x points) stack.
+
+    python benchmarks/bench_sna.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_sna import CalKey, ScalarNetworkAnalyzer
+
+
+def run(point_counts=(601, 3001), sweeps=1000):
+    """Return {points: {'python_us', 'normalize_us', 'stack_us', 'speedup'}} per sweep."""
+    rng = np.random.default_rng(0)
+    results = {}
+    for points in point_counts:
+        key = CalKey(50e6, 150e6, points, 30e3, -20.0)
+        sna = ScalarNetworkAnalyzer(sa=None)
+        sna.calibrations[key] = rng.normal(-20, 0.5, points).astype(np.float32)
+        amps = rng.normal(-25, 3, (sweeps, points)).astype(np.float32)
+        ref_list = sna.calibrations[key].tolist()
+        out = np.empty(points, dtype=np.float32)
+
+        t0 = time.perf_counter()
+        for amp in amps[:50]:
+            [a - r for a, r in zip(amp.tolist(), ref_list)]
+        python = (time.perf_counter() - t0) / 50
+
+        t0 = time.perf_counter()
+        for amp in amps:
+            sna.normalize(amp, key, out=out)
+        single = (time.perf_counter() - t0) / sweeps
+
+        t0 = time.perf_counter()
+        sna.normalize(amps, key)
+        stack = (time.perf_counter() - t0) / sweeps
+
+        results[points] = {
+            'python_us': python * 1e6,
+            'normalize_us': single * 1e6,
+            'stack_us': stack * 1e6,
+            'speedup': python / single,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'points':>7} {'python (us)':>12} {'normalize (us)':>15} {'stack (us)':>11} {'speedup':>8}")
+    for points, r in results.items():
+        print(f"{points:>7} {r['python_us']:>12.1f} {r['normalize_us']:>15.2f} {r['stack_us']:>11.2f} "
+              f"{r['speedup']:>7.0f}x")
@@ -0,0 +1,68 @@
+"""
+Startup-to-first-sweep time with unreachable LAN resources on the bus:
+the original serial discovery versus concurrent probing, cold and with the
+discovery cache warm.
+
+    python benchmarks/bench_startup.py
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _serial_conn(sa, rm):
+    """Discovery as DSA815.conn() did it originally: one resource at a time."""
+    sa.rm = rm
+    for dev in rm.list_resources():
+        try:
+            inst = rm.open_resource(dev)
+            idn = inst.query("*IDN?")
+            if "DSA815" in idn or "Rigol" in idn:
+                sa.inst = inst
+                sa.inst.timeout = 10000
+                return
+            inst.close()
+        except Exception:
+            pass
+    raise IOError("DSA815 not found")
+
+
+def _first_sweep(connect):
+    sa = DSA815()
+    t0 = time.perf_counter()
+    connect(sa)
+    sa.initiate_measurement()
+    sa.get_sweep_data()
+    elapsed = time.perf_counter() - t0
+    sa.dis()
+    return elapsed
+
+
+def run(unreachable=3, probe_timeout_ms=500):
+    """Return startup-to-first-sweep seconds for each discovery mode."""
+    names = [f"TCPIP0::10.0.0.{i + 10}::INSTR" for i in range(unreachable)]
+    rm = EmulatedResourceManager(unreachable=names, latency_s=1e-3, time_scale=0.1, seed=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "discovery.json")
+        return {
+            'unreachable_resources': unreachable,
+            'serial_s': _first_sweep(lambda sa: _serial_conn(sa, rm)),
+            'parallel_cold_s': _first_sweep(
+                lambda sa: sa.conn(rm=rm, probe_timeout_ms=probe_timeout_ms, cache_path=cache)),
+            'parallel_cached_s': _first_sweep(
+                lambda sa: sa.conn(rm=rm, probe_timeout_ms=probe_timeout_ms, cache_path=cache)),
+            'by_serial_cached_s': _first_sweep(
+                lambda sa: sa.conn(rm=rm, serial="DSA8A000000001", cache_path=cache)),
+        }
+
+
+if __name__ == '__main__':
+    r = run()
+    print(f"\nStartup to first sweep, {r['unreachable_resources']} unreachable LAN resources listed")
+    for key in ('serial_s', 'parallel_cold_s', 'parallel_cached_s', 'by_serial_cached_s'):
+        print(f"{key[:-2]:<18} {r[key]:.3f} s")
@@ -0,0 +1,66 @@
+"""
+Sweep-completion latency on the emulated instrument.
+
+Compares the legacy busy-wait loop against the 'poll', 'opc' and 'srq'
+strategies of DSA815.wait_for_sweep(): mean overhead beyond the sweep time,
+and VISA transactions per sweep.
+
+    python benchmarks/bench_sweep_wait.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _busy_wait(sa):
+    sa.inst.write(":INITiate:CONTinuous OFF")
+    sa.inst.write(":INITiate:IMMediate")
+    while int(sa.inst.query(":STATus:OPERation:CONDition?")) & (1 << 3):
+        pass
+
+
+def run(sweep_time=0.05, repeats=10, latency_s=1e-3):
+    """
+    Return {method: {'mean_overhead_s', 'transactions_per_sweep', 'cpu_s_per_sweep'}}.
+    """
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(latency_s=latency_s, seed=0), cache_path=None)
+    sa.set_sweep_time(sweep_time)
+    results = {}
+
+    n0, cpu0, t0 = sa.inst.transactions, time.process_time(), time.perf_counter()
+    for _ in range(repeats):
+        _busy_wait(sa)
+    elapsed = time.perf_counter() - t0
+    results['busy-wait'] = {
+        'mean_overhead_s': elapsed / repeats - sweep_time,
+        'transactions_per_sweep': (sa.inst.transactions - n0) / repeats,
+        'cpu_s_per_sweep': (time.process_time() - cpu0) / repeats,
+    }
+
+    for method in ("poll", "opc", "srq"):
+        sa.reset_wait_stats()
+        n0, cpu0 = sa.inst.transactions, time.process_time()
+        for _ in range(repeats):
+            sa.initiate_measurement(method=method)
+        results[method] = {
+            'mean_overhead_s': sa.get_wait_stats()['mean_overhead_s'],
+            'transactions_per_sweep': (sa.inst.transactions - n0) / repeats,
+            'cpu_s_per_sweep': (time.process_time() - cpu0) / repeats,
+        }
+    sa.dis()
+    return results
+
+
+if __name__ == '__main__':
+    sweep_time = 0.05
+    results = run(sweep_time=sweep_time)
+    print(f"\nSweep time {sweep_time * 1e3:.0f} ms, 1 ms per VISA transaction")
+    print(f"{'method':<10} {'overhead (ms)':>14} {'VISA txn/sweep':>15} {'CPU (ms)/sweep':>15}")
+    for method, r in results.items():
+        print(f"{method:<10} {r['mean_overhead_s'] * 1e3:>14.2f} "
+              f"{r['transactions_per_sweep']:>15.1f} {r['cpu_s_per_sweep'] * 1e3:>15.2f}")
@@ -0,0 +1,53 @@
+"""
+Pulling stored traces off the instrument: one load_trace() call per file
+versus StorageSync (pipelined binary batches), plus a re-sync where every
+file is unchanged.
+
+    python benchmarks/bench_sync.py
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+from Rigol_transfer import StorageSync
+
+
+def _timed(sa, fn):
+    tx0 = sa.inst.transactions
+    t0 = time.perf_counter()
+    fn()
+    return {'s': time.perf_counter() - t0, 'transactions': sa.inst.transactions - tx0}
+
+
+def run(files=100, latency_s=1e-3, bandwidth_Bps=1e6):
+    """Return {'per_file': {...}, 'sync': {...}, 'resync': {...}, 'speedup'}."""
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(latency_s=latency_s, bandwidth_Bps=bandwidth_Bps, seed=0),
+            cache_path=None)
+    names = [f"D:\\TRACE\\T{i:04d}.trc" for i in range(files)]
+    for name in names:
+        sa.save_trace("TRACE1", name)
+    tmp = tempfile.mkdtemp(prefix="bench_sync_")
+    try:
+        per_file = _timed(sa, lambda: [sa.load_trace(name, os.path.join(tmp, f"{i}.dsatr"))
+                                       for i, name in enumerate(names)])
+        sync = StorageSync(sa, os.path.join(tmp, "mirror"))
+        cold = _timed(sa, sync.sync)
+        warm = _timed(sa, sync.sync)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    sa.dis()
+    return {'per_file': per_file, 'sync': cold, 'resync': warm, 'speedup': per_file['s'] / cold['s']}
+
+
+if __name__ == '__main__':
+    r = run()
+    print("\n100 stored traces (1 ms/transaction, 1 MB/s)")
+    for mode in ('per_file', 'sync', 'resync'):
+        print(f"{mode:<9} {r[mode]['s'] * 1e3:8.1f} ms  {r[mode]['transactions']:5d} tx")
+    print(f"speedup {r['speedup']:.2f}x")
@@ -0,0 +1,75 @@
+"""
+Trace file throughput: the viewer's original per-line CSV writer versus
+export_csv() and the binary .dsatr format (plain and zlib-compressed).
+
+    python benchmarks/bench_traceio.py
+"""
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Rigol_traceio import export_csv, read_traces, write_traces
+
+
+def _legacy_csv(path, freq, amp):
+    with open(path, 'w') as f:
+        f.write("Frequency (Hz),Amplitude (dBm)\n")
+        for fr, a in zip(freq, amp):
+            f.write(f"{fr},{a}\n")
+
+
+def _timed(fn, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats
+
+
+def run(traces=200, points=601, repeats=3):
+    """
+    Return {case: {'write_traces_per_s', 'read_traces_per_s', 'bytes_per_trace'}}.
+    """
+    rng = np.random.default_rng(0)
+    freq = np.linspace(90e6, 110e6, points)
+    amps = (rng.normal(-80, 2, (traces, points))).astype(np.float32)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.csv")
+        t_write = _timed(lambda: [_legacy_csv(path, freq, a) for a in amps], repeats)
+        t_read = _timed(lambda: [np.loadtxt(path, delimiter=',', skiprows=1) for _ in range(traces)], 1)
+        results['csv (per-line loop)'] = {
+            'write_traces_per_s': traces / t_write,
+            'read_traces_per_s': traces / t_read,
+            'bytes_per_trace': os.path.getsize(path),
+        }
+
+        path = os.path.join(tmp, "vector.csv")
+        t_write = _timed(lambda: [export_csv(path, freq, a) for a in amps], repeats)
+        results['csv (export_csv)'] = {
+            'write_traces_per_s': traces / t_write,
+            'read_traces_per_s': results['csv (per-line loop)']['read_traces_per_s'],
+            'bytes_per_trace': os.path.getsize(path),
+        }
+
+        for name, compress in (('dsatr', False), ('dsatr + zlib', True)):
+            path = os.path.join(tmp, name.replace(' + ', '_') + ".dsatr")
+            t_write = _timed(lambda: write_traces(path, amps, freq[0], freq[-1], compress=compress), repeats)
+            t_read = _timed(lambda: read_traces(path), repeats)
+            results[name] = {
+                'write_traces_per_s': traces / t_write,
+                'read_traces_per_s': traces / t_read,
+                'bytes_per_trace': os.path.getsize(path) / traces,
+            }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'format':<22} {'write traces/s':>15} {'read traces/s':>15} {'bytes/trace':>12}")
+    for name, r in results.items():
+        print(f"{name:<22} {r['write_traces_per_s']:>15.0f} {r['read_traces_per_s']:>15.0f} "
+              f"{r['bytes_per_trace']:>12.0f}")
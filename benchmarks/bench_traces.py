@@ -0,0 +1,60 @@
+"""
+Reading live + max hold + min hold: three get_trace_data() calls vs. one
+pipelined get_traces() exchange, on the emulator with per-transaction
+latency.
+
+    python benchmarks/bench_traces.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _measure(sa, fetch, repeats):
+    fetch()                     # warm the settings cache
+    tx0 = sa.inst.transactions
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fetch()
+    elapsed = time.perf_counter() - t0
+    return {
+        'fetch_s': elapsed / repeats,
+        'fetches_per_s': repeats / elapsed,
+        'transactions': (sa.inst.transactions - tx0) / repeats,
+    }
+
+
+def run(traces=(1, 2, 3), repeats=50, points=601, latency_s=1e-3, bandwidth_Bps=1e6):
+    """Return {'separate': {...}, 'pipelined': {...}, 'speedup'}."""
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(points=points, latency_s=latency_s,
+                                       bandwidth_Bps=bandwidth_Bps, seed=0),
+            cache_path=None)
+    sa.set_trace_mode(2, "MAXHold")
+    sa.set_trace_mode(3, "MINHold")
+
+    def separate():
+        sa.get_frequency_axis()
+        return [sa.get_trace_data(t) for t in traces]
+
+    results = {
+        'separate': _measure(sa, separate, repeats),
+        'pipelined': _measure(sa, lambda: sa.get_traces(traces), repeats),
+    }
+    sa.dis()
+    results['speedup'] = results['pipelined']['fetches_per_s'] / results['separate']['fetches_per_s']
+    return results
+
+
+if __name__ == '__main__':
+    r = run()
+    print("\nTRACE1-3, 601 points (1 ms/transaction, 1 MB/s)")
+    for mode in ('separate', 'pipelined'):
+        m = r[mode]
+        print(f"{mode:<10} {m['fetch_s'] * 1e3:6.2f} ms/fetch  {m['fetches_per_s']:6.1f} fetches/s"
+              f"  {m['transactions']:.1f} tx")
+    print(f"speedup {r['speedup']:.2f}x")
@@ -0,0 +1,68 @@
+"""
+Sweeps/s and bytes/s for the two trace paths: measure_trace() (ASCii) and
+initiate_measurement() + get_sweep_data() (REAL,32), at several point counts.
+
+    python benchmarks/bench_transfer.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Rigol_DSA815 import DSA815
+from Rigol_emulator import EmulatedResourceManager
+
+
+def _connect(points, latency_s, bandwidth_Bps):
+    sa = DSA815()
+    sa.conn(rm=EmulatedResourceManager(points=points, latency_s=latency_s,
+                                       bandwidth_Bps=bandwidth_Bps, seed=0),
+            cache_path=None)
+    sa.set_sweep_time(1e-3)     # keep the sweep itself out of the measurement
+    return sa
+
+
+def _measure(sa, acquire, sweeps):
+    acquire()                   # warm the settings cache
+    read0 = sa.inst.bytes_read
+    t0 = time.perf_counter()
+    for _ in range(sweeps):
+        acquire()
+    elapsed = time.perf_counter() - t0
+    return {
+        'sweeps_per_s': sweeps / elapsed,
+        'bytes_per_s': (sa.inst.bytes_read - read0) / elapsed,
+        'bytes_per_sweep': (sa.inst.bytes_read - read0) / sweeps,
+    }
+
+
+def run(point_counts=(601, 3001), sweeps=20, latency_s=1e-3, bandwidth_Bps=1e6):
+    """Return {points: {'ascii': {...}, 'real32': {...}, 'speedup'}}."""
+    results = {}
+    for points in point_counts:
+        sa = _connect(points, latency_s, bandwidth_Bps)
+        ascii_ = _measure(sa, sa.measure_trace, sweeps)
+
+        def binary():
+            sa.initiate_measurement()
+            return sa.get_sweep_data()
+
+        real32 = _measure(sa, binary, sweeps)
+        sa.dis()
+        results[points] = {
+            'ascii': ascii_,
+            'real32': real32,
+            'speedup': real32['sweeps_per_s'] / ascii_['sweeps_per_s'],
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print(f"\n{'points':>7} {'format':>7} {'sweeps/s':>9} {'kB/s':>8} {'bytes/sweep':>12}")
+    for points, r in results.items():
+        for fmt in ('ascii', 'real32'):
+            m = r[fmt]
+            print(f"{points:>7} {fmt:>7} {m['sweeps_per_s']:>9.1f} {m['bytes_per_s'] / 1e3:>8.1f} "
+                  f"{m['bytes_per_sweep']:>12.0f}")
+        print(f"{'':>7} speedup {r['speedup']:.2f}x")
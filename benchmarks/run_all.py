@@ -0,0 +1,147 @@
+"""
+Run every benchmark against the emulator and write the results as JSON,
+tagged with the git commit, so runs can be compared across commits.
+
+    python benchmarks/run_all.py                         # -> benchmarks/results/<commit>.json
+    python benchmarks/run_all.py --quick -o quick.json   # smaller workloads
+    python benchmarks/run_all.py --only transfer,lock
+    python benchmarks/run_all.py --compare base.json new.json
+"""
+import sys
+import os
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import time
+import traceback
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+
+# (name, module, run() kwargs for --quick)
+SUITE = [
+    ('transfer',   'bench_transfer',   dict(point_counts=(601,), sweeps=5)),
+    ('traces',     'bench_traces',     dict(repeats=10)),
+    ('settings',   'bench_settings',   dict(repeats=10)),
+    ('configure',  'bench_configure',  dict(hops=10)),
+    ('sweep_wait', 'bench_sweep_wait', dict(repeats=3)),
+    ('planner',    'bench_planner',    dict(rates=(20, 5), repeats=1)),
+    ('traceio',    'bench_traceio',    dict(traces=50, repeats=1)),
+    ('sync',       'bench_sync',       dict(files=20)),
+    ('lock',       'bench_lock',       dict(window_counts=(1, 50), repeats=100)),
+    ('mask',       'bench_mask',       dict(point_counts=(601,), sweeps=100, loop_sweeps=2)),
+    ('sna',        'bench_sna',        dict(point_counts=(601,), sweeps=100)),
+    ('render',     'bench_render',     dict(point_counts=(601,), frames=20)),
+    ('async',      'bench_async',      dict(n=2, sweeps=2)),
+    ('pool',       'bench_pool',       dict(n=2, sweeps=2)),
+    ('broker',     'bench_broker',     dict(consumers=2, sweeps=20)),
+    ('startup',    'bench_startup',    dict(unreachable=1)),
+]
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _jsonable(value):
+    """Make benchmark results JSON-safe (numpy scalars, int keys, tuples)."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def run_suite(only=None, quick=False):
+    """Run the selected benchmarks and return the full result document."""
+    doc = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': {},
+    }
+    for name, module, quick_kwargs in SUITE:
+        if only and name not in only:
+            continue
+        print(f"[bench] {name} ...", flush=True)
+        t0 = time.perf_counter()
+        try:
+            bench = importlib.import_module(module)
+            result = bench.run(**(quick_kwargs if quick else {}))
+        except Exception as e:
+            traceback.print_exc()
+            result = {'error': f"{type(e).__name__}: {e}"}
+        doc['results'][name] = _jsonable(result)
+        doc['results'][name]['_elapsed_s'] = time.perf_counter() - t0
+    return doc
+
+
+def _flatten(tree, prefix=""):
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and not key.startswith('_'):
+            flat[path] = value
+    return flat
+
+
+def compare(base_path, new_path):
+    """Print every numeric result of two runs side by side with their ratio."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    a, b = _flatten(base['results']), _flatten(new['results'])
+    print(f"{'metric':<60} {base['meta']['commit']:>12} {new['meta']['commit']:>12} {'new/base':>9}")
+    for key in sorted(set(a) | set(b)):
+        old_v, new_v = a.get(key), b.get(key)
+        ratio = f"{new_v / old_v:9.2f}" if old_v and new_v is not None else f"{'-':>9}"
+        fmt = lambda v: f"{v:12.4g}" if v is not None else f"{'-':>12}"
+        print(f"{key:<60} {fmt(old_v)} {fmt(new_v)} {ratio}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ",".join(n for n, _, _ in SUITE))
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast smoke run")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    only = set(args.only.split(",")) if args.only else None
+    doc = run_suite(only=only, quick=args.quick)
+    path = args.output
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{doc['meta']['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=2)
+    print(f"[bench] results written to {path}")
+
+
+if __name__ == '__main__':
+    main()